@@ -1,19 +1,32 @@
-import ccxt
-import yaml
+import asyncio
+import os
+import sys
+
+# Add the project root directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
 import pandas as pd
 
+from src.utils.clients import get_client, get_config
+from src.utils.rate_limit import AsyncTokenBucket
+
+DATA_DIR = "data/crypto"
+OHLCV_HEADER = "timestamp,open,high,low,close,volume\n"
+
+
 # Load API keys from config
-with open("config/config.yaml", 'r') as f:
-    config = yaml.safe_load(f)
+def load_kraken_keys():
+    config = get_config()
+    return {
+        'apiKey': config['kraken']['api_key'],
+        'secret': config['kraken']['secret_key'],
+    }
 
-KRAKEN_API_KEY = config['kraken']['api_key']
-KRAKEN_SECRET_KEY = config['kraken']['secret_key']
 
-# Initialize Kraken API
-kraken = ccxt.kraken({
-    'apiKey': KRAKEN_API_KEY,
-    'secret': KRAKEN_SECRET_KEY,
-})
+# Shared Kraken client, built on first use
+def get_kraken():
+    return get_client('kraken')
+
 
 def fetch_crypto_data(symbol):
     """
@@ -23,7 +36,7 @@ def fetch_crypto_data(symbol):
     """
     try:
         # Fetch OHLCV data from Kraken (1-day candles)
-        ohlcv = kraken.fetch_ohlcv(symbol, timeframe='1d')
+        ohlcv = get_kraken().fetch_ohlcv(symbol, timeframe='1d')
 
         # Convert to a DataFrame
         df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
@@ -36,6 +49,139 @@ def fetch_crypto_data(symbol):
     except Exception as e:
         print(f"Error fetching data for {symbol}: {e}")
 
+
+def ohlcv_path(symbol, timeframe='1d', data_dir=DATA_DIR):
+    """CSV path for a pair; daily candles keep the historical <symbol>_data.csv name."""
+    suffix = '' if timeframe == '1d' else f"_{timeframe}"
+    return os.path.join(data_dir, f"{symbol.replace('/', '_')}{suffix}_data.csv")
+
+
+def last_stored_timestamp(path):
+    """
+    Returns the timestamp (ms) of the last candle in a CSV, reading only its tail.
+
+    :param path: CSV written by fetch_crypto_data or sync_crypto_data
+    :return: Milliseconds since epoch, or None if the file has no candles
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    if not lines:
+        return None
+    field = lines[-1].split(b',')[0].decode().strip()
+    try:
+        return int(pd.Timestamp(field).tz_localize(None).value // 1_000_000)
+    except ValueError:
+        return None  # only the header is present
+
+
+def append_candles(path, candles, timeframe_ms):
+    """
+    Appends candles to a CSV, creating it with a header if needed.
+
+    :param path: Target CSV path
+    :param candles: List of [timestamp_ms, open, high, low, close, volume]
+    :param timeframe_ms: Candle length, used to pick the timestamp format
+    """
+    fmt = '%Y-%m-%d' if timeframe_ms % 86_400_000 == 0 else '%Y-%m-%d %H:%M:%S'
+    rows = ''.join(
+        f"{pd.Timestamp(ts, unit='ms').strftime(fmt)},{o},{h},{l},{c},{v}\n"
+        for ts, o, h, l, c, v in candles
+    )
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        rows = OHLCV_HEADER + rows
+    else:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                rows = '\n' + rows
+    with open(path, 'a') as f:
+        f.write(rows)
+
+
+async def sync_symbol(exchange, symbol, timeframe, limiter, data_dir=DATA_DIR, limit=720):
+    """
+    Brings one pair/timeframe CSV up to date, paging forward from its last candle.
+
+    Only closed candles are stored; the one still forming is picked up by the
+    next sync.
+
+    :return: Number of candles appended
+    """
+    path = ohlcv_path(symbol, timeframe, data_dir)
+    timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+    last = last_stored_timestamp(path)
+    since = None if last is None else last + timeframe_ms
+    appended = 0
+
+    while True:
+        async with limiter:
+            candles = await exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+        now = exchange.milliseconds()
+        candles = [c for c in candles if (last is None or c[0] > last) and c[0] + timeframe_ms <= now]
+        if not candles:
+            break
+        append_candles(path, candles, timeframe_ms)
+        appended += len(candles)
+        last = candles[-1][0]
+        since = last + timeframe_ms
+        if len(candles) < limit:
+            break
+
+    return appended
+
+
+async def sync_many(symbols, timeframes=('1d',), exchange=None, data_dir=DATA_DIR, rate=None, burst=5, concurrency=16, limit=720):
+    """
+    Syncs every symbol/timeframe pair concurrently under one rate limit.
+
+    :param symbols: Trading pairs (e.g., ['BTC/USD', 'ETH/USD'])
+    :param timeframes: ccxt timeframes to keep (e.g., ['1d', '1h'])
+    :param exchange: ccxt async exchange (or a stand-in); defaults to Kraken
+    :param rate: Requests per second (default: the exchange's ccxt rateLimit)
+    :param burst: Requests allowed back to back before throttling kicks in
+    :param concurrency: Maximum requests in flight
+    :param limit: Candles requested per page
+    :return: Dict of (symbol, timeframe) to candles appended, or the exception raised
+    """
+    owns_exchange = exchange is None
+    if owns_exchange:
+        import ccxt.async_support as ccxt_async
+        # Throttling is done by our bucket, shared across all tasks
+        exchange = ccxt_async.kraken(dict(load_kraken_keys(), enableRateLimit=False))
+    limiter = AsyncTokenBucket(rate or 1000.0 / exchange.rateLimit, burst)
+    semaphore = asyncio.Semaphore(concurrency)
+    pairs = [(symbol, timeframe) for symbol in symbols for timeframe in timeframes]
+
+    async def run(symbol, timeframe):
+        async with semaphore:
+            return await sync_symbol(exchange, symbol, timeframe, limiter, data_dir, limit)
+
+    try:
+        results = await asyncio.gather(*(run(*pair) for pair in pairs), return_exceptions=True)
+    finally:
+        if owns_exchange:
+            await exchange.close()
+    return dict(zip(pairs, results))
+
+
+def sync_crypto_data(symbols, timeframes=('1d',), **kwargs):
+    """
+    Incrementally updates data/crypto for a list of pairs; see sync_many.
+    """
+    results = asyncio.run(sync_many(symbols, timeframes, **kwargs))
+    for (symbol, timeframe), result in results.items():
+        if isinstance(result, Exception):
+            print(f"Error syncing {symbol} {timeframe}: {result}")
+        else:
+            print(f"{symbol} {timeframe}: {result} new candles")
+    return results
+
+
 # Example usage
 if __name__ == '__main__':
-    fetch_crypto_data('BTC/USD')
+    sync_crypto_data(['BTC/USD'])
@@ -1,21 +1,18 @@
-from web3 import Web3
-import yaml
+import os
+import sys
 
-# Load API keys from config
-with open("config/config.yaml", 'r') as f:
-    config = yaml.safe_load(f)
+# Add the project root directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-INFURA_URL = config['web3']['infura_url']
-
-# Initialize Web3 connection
-web3 = Web3(Web3.HTTPProvider(INFURA_URL))
+from src.utils.abi_registry import get_contract
 
 def fetch_aave_data():
     """
     Fetches data from Aave protocol via Web3.
     """
     lending_pool_address = '0x398EC7346DcD622eDc5ae82352F02bE94C62d119'  # Aave Lending Pool address
-    lending_pool = web3.eth.contract(address=lending_pool_address, abi=[])
+    # Shared handle with the LendingPool ABI, over the shared Web3 connection
+    lending_pool = get_contract('aave', lending_pool_address)
 
     # Fetch data (specific methods depend on contract ABI)
     # Example: Get available liquidity or interest rates
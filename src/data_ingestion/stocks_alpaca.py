@@ -1,17 +1,31 @@
+import json
 import os
-import yaml
-from alpaca_trade_api.rest import REST, TimeFrame
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
 import pandas as pd
 
+from src.utils.clients import get_client, get_config
+
+DATA_DIR = "data/stocks"
+STOCK_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap']
+
+
 # Load API keys from config
-with open("config/config.yaml", 'r') as f:
-    config = yaml.safe_load(f)
+def load_alpaca_keys():
+    config = get_config()
+    return config['alpaca']['api_key'], config['alpaca']['secret_key']
+
 
-ALPACA_API_KEY = config['alpaca']['api_key']
-ALPACA_SECRET_KEY = config['alpaca']['secret_key']
+# Shared Alpaca client, built on first use with a keep-alive pool of pool_size connections
+def get_alpaca(pool_size=10):
+    return get_client('alpaca', pool_size=pool_size)
 
-# Initialize Alpaca API
-api = REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, base_url='https://paper-api.alpaca.markets')
 
 def fetch_stock_data(symbol, start_date, end_date):
     """
@@ -21,13 +35,211 @@ def fetch_stock_data(symbol, start_date, end_date):
     :param start_date: Start date for fetching data (format: 'YYYY-MM-DD')
     :param end_date: End date for fetching data (format: 'YYYY-MM-DD')
     """
-    bars = api.get_barset(symbol, TimeFrame.Day, start=start_date, end=end_date)
-    df = pd.DataFrame(bars[symbol])
-
-    # Save the data
-    df.to_csv(f"data/stocks/{symbol}_data.csv", index=False)
+    backfill_stock_data([symbol], start_date, end_date)
     print(f"Data for {symbol} saved!")
 
+
+def date_chunks(start_date, end_date, chunk_days):
+    """
+    Splits [start_date, end_date] into consecutive [start, end) windows.
+
+    :return: List of (start, end) UTC Timestamps
+    """
+    start = pd.Timestamp(start_date, tz='UTC')
+    end = pd.Timestamp(end_date, tz='UTC') + pd.Timedelta(days=1)
+    edges = list(pd.date_range(start, end, freq=f'{chunk_days}D'))
+    if edges[-1] < end:
+        edges.append(end)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def with_retry(call, retries=5, backoff=1.0, max_backoff=60.0):
+    """
+    Calls ``call()`` and retries failures with exponential backoff and jitter.
+
+    :param call: Zero-argument callable
+    :param retries: Attempts after the first failure
+    :param backoff: Delay before the first retry, in seconds
+    :param max_backoff: Upper bound on any single delay
+    """
+    for attempt in range(retries + 1):
+        try:
+            return call()
+        except Exception:
+            if attempt == retries:
+                raise
+            delay = min(max_backoff, backoff * 2 ** attempt)
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+
+def bars_path(symbol, timeframe, data_dir=DATA_DIR):
+    """CSV path for a symbol; daily bars keep the historical <symbol>_data.csv name."""
+    label = str(timeframe)
+    suffix = '' if label == '1Day' else f"_{label}"
+    return os.path.join(data_dir, f"{symbol}{suffix}_data.csv")
+
+
+def _checkpoint_path(path):
+    name = os.path.basename(path)[:-len('_data.csv')]
+    return os.path.join(os.path.dirname(path), f".{name}_backfill.json")
+
+
+def _read_checkpoint(path):
+    """
+    Completed [start, end) ranges of a bars CSV.
+
+    Checkpoints written before ranges were tracked only hold 'completed_through',
+    which does not say where the backfill started; they are ignored and the
+    chunks refetched (merging drops the duplicates).
+    """
+    try:
+        with open(_checkpoint_path(path)) as f:
+            ranges = json.load(f)['completed']
+        return [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in ranges]
+    except (OSError, ValueError, KeyError, TypeError):
+        return []
+
+
+def _write_checkpoint(path, ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    target = _checkpoint_path(path)
+    with open(target + '.tmp', 'w') as f:
+        json.dump({'completed': [[start.isoformat(), end.isoformat()] for start, end in merged]}, f)
+    os.replace(target + '.tmp', target)
+    return merged
+
+
+def _covered(ranges, start, end):
+    return any(done_start <= start and end <= done_end for done_start, done_end in ranges)
+
+
+def _stored_header(path):
+    """Column order of an existing CSV (our files pad headers with spaces)."""
+    with open(path) as f:
+        return [col.strip() for col in f.readline().lstrip('\ufeff').split(',')]
+
+
+def _last_stored(path):
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    try:
+        last = pd.Timestamp(lines[-1].split(b',')[0].decode().strip())
+    except (IndexError, ValueError):
+        return None
+    return last.tz_localize('UTC') if last.tz is None else last
+
+
+def _merge_bars(path, bars):
+    """Rewrites a symbol CSV with ``bars`` merged in by timestamp; stored rows win over duplicates."""
+    stored = pd.read_csv(path, dtype=str, encoding='utf-8-sig', skipinitialspace=True)
+    stored.columns = stored.columns.str.strip()
+    stored = stored.apply(lambda col: col.str.strip())
+    keys = pd.to_datetime(stored['timestamp'], utc=True)
+    fresh = bars[~bars['timestamp'].isin(keys)]
+    if fresh.empty:
+        return 0
+    merged = pd.concat([stored.assign(_key=keys),
+                        fresh.reindex(columns=stored.columns).assign(_key=fresh['timestamp'])], ignore_index=True)
+    merged = merged.sort_values('_key', kind='stable').drop(columns='_key')
+    merged.to_csv(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+    return len(fresh)
+
+
+def append_bars(path, bars):
+    """
+    Writes a chunk of bars into a symbol CSV, keeping its existing column order.
+
+    Chunks after the last stored bar are appended; a chunk that overlaps or
+    precedes the stored bars (a resumed chunk, an earlier range backfilled
+    later) is merged in by timestamp and the file rewritten in order.
+
+    :param path: Target CSV path
+    :param bars: DataFrame of bars indexed by UTC timestamp
+    :return: Number of rows written
+    """
+    bars = bars.reset_index().rename(columns={'index': 'timestamp'})
+    if bars.empty:
+        return 0
+    if os.path.exists(path) and os.path.getsize(path):
+        last = _last_stored(path)
+        if last is not None and bars['timestamp'].min() <= last:
+            return _merge_bars(path, bars)
+        bars.reindex(columns=_stored_header(path)).to_csv(path, mode='a', header=False, index=False)
+    else:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        bars.reindex(columns=STOCK_COLUMNS).to_csv(path, index=False)
+    return len(bars)
+
+
+def backfill_symbol(api, symbol, start_date, end_date, chunk_days=90, data_dir=DATA_DIR, timeframe=None, **retry):
+    """
+    Backfills one symbol chunk by chunk, skipping chunks completed by earlier runs.
+
+    Each chunk is written to the CSV and checkpointed before the next one is
+    requested, so memory is bounded by one chunk and a crash loses at most the
+    chunk in flight. Every timeframe has its own CSV (see bars_path) and its
+    checkpoint records the date ranges completed so far, so any range can be
+    backfilled in any order.
+
+    :param timeframe: Alpaca TimeFrame (default: daily bars)
+    :return: Number of bars written
+    """
+    if timeframe is None:
+        from alpaca_trade_api.rest import TimeFrame
+        timeframe = TimeFrame.Day
+    path = bars_path(symbol, timeframe, data_dir)
+    completed = _read_checkpoint(path)
+    written = 0
+
+    for chunk_start, chunk_end in date_chunks(start_date, end_date, chunk_days):
+        if _covered(completed, chunk_start, chunk_end):
+            continue
+        bars = with_retry(lambda: api.get_bars(symbol, timeframe, start=chunk_start.isoformat(),
+                                               end=chunk_end.isoformat(), adjustment='raw').df, **retry)
+        if not bars.empty:
+            bars = bars[(bars.index >= chunk_start) & (bars.index < chunk_end)]
+            written += append_bars(path, bars)
+        completed = _write_checkpoint(path, completed + [(chunk_start, chunk_end)])
+
+    return written
+
+
+def backfill_stock_data(symbols, start_date, end_date, chunk_days=90, max_workers=8, api=None, data_dir=DATA_DIR,
+                        timeframe=None, **retry):
+    """
+    Backfills many symbols in parallel over one pooled HTTP session.
+
+    :param symbols: Stock symbols (e.g., ['AAPL', 'MSFT'])
+    :param start_date: First date to fetch (format: 'YYYY-MM-DD')
+    :param end_date: Last date to fetch, inclusive (format: 'YYYY-MM-DD')
+    :param chunk_days: Days requested per call
+    :param max_workers: Symbols fetched concurrently
+    :param api: Alpaca REST client (or a stand-in); defaults to the shared client
+    :param data_dir: Directory holding the symbol CSVs (see bars_path)
+    :param timeframe: Alpaca TimeFrame (default: daily bars)
+    :return: Dict of symbol to bars written, or the exception that stopped it
+    """
+    api = api or get_alpaca(pool_size=max_workers)
+    os.makedirs(data_dir, exist_ok=True)
+
+    def run(symbol):
+        try:
+            return backfill_symbol(api, symbol, start_date, end_date, chunk_days, data_dir, timeframe, **retry)
+        except Exception as e:
+            print(f"Error backfilling {symbol}: {e}")
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip(symbols, pool.map(run, symbols)))
+
 # Example usage
 if __name__ == '__main__':
     fetch_stock_data('AAPL', '2022-01-01', '2023-01-01')
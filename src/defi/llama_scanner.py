@@ -0,0 +1,263 @@
+import codecs
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+# DeFi Llama /protocols scanner.
+#
+# The payload is several megabytes and changes a few times an hour, so each
+# scan is a conditional GET (If-None-Match / If-Modified-Since). A 304 costs
+# one round trip and returns the table already in memory (or on disk). A new
+# payload is parsed object by object as it streams in, keeping only the
+# columns we use, into a columnar DataFrame that is filtered and ranked with
+# vectorized operations. Every changed payload is also appended to a SQLite
+# history, so TVL and APY can be compared over time.
+
+PROTOCOLS_URL = "https://api.llama.fi/protocols"
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '../../data/.cache/defillama')
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), '../../data/defi/protocol_history.sqlite')
+
+STRING_FIELDS = ('name', 'slug', 'chain', 'category')
+NUMBER_FIELDS = ('tvl', 'apy', 'change_1d', 'change_7d')
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_array(chunks):
+    """
+    Yields the elements of a JSON array as its text arrives.
+
+    :param chunks: Iterable of str or bytes pieces of one JSON array
+    """
+    buffer = ''
+    started = False
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            # Keeps a multi-byte character split across chunks for the next one
+            chunk = utf8.decode(chunk)
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break  # element not complete yet
+            if end == len(buffer) and not isinstance(item, (dict, list)):
+                break  # a number or literal may continue in the next chunk
+            position = end
+            yield item
+        buffer = buffer[position:]
+    if utf8.decode(b'', final=True) or buffer.strip() or not started:
+        raise ValueError("Truncated JSON array")
+
+
+def protocols_table(items):
+    """
+    Builds the columnar protocol table from parsed /protocols elements.
+
+    Only the raw field values are gathered per element; cleaning happens per
+    column. Missing or null TVL/APY count as 0, like the old dict-based filter.
+    """
+    fields = STRING_FIELDS + NUMBER_FIELDS
+    columns = tuple([] for _ in fields)
+    appends = tuple(zip(fields, (column.append for column in columns)))
+    for item in items:
+        get = item.get
+        for field, append in appends:
+            append(get(field))
+
+    table = {}
+    for field, values in zip(fields, columns):
+        raw = pd.Series(values, dtype=object)
+        if field in STRING_FIELDS:
+            table[field] = raw.where(raw.map(type) == str, 'Unknown')
+        else:
+            table[field] = pd.to_numeric(raw, errors='coerce').fillna(0.0).astype(np.float64)
+    return pd.DataFrame(table)
+
+
+def filter_protocols(table, min_tvl=0, min_apy=0, chain=None, top=None):
+    """
+    Protocols meeting the thresholds, highest APY first.
+
+    :param chain: Keep only this chain (e.g. 'Ethereum')
+    :param top: Keep only the best ``top`` rows
+    """
+    mask = (table['tvl'].to_numpy() >= min_tvl) & (table['apy'].to_numpy() >= min_apy)
+    if chain is not None:
+        mask &= table['chain'].to_numpy() == chain
+    selected = table[mask]
+    order = np.argsort(-selected['apy'].to_numpy(), kind='stable')
+    if top is not None:
+        order = order[:top]
+    return selected.iloc[order].reset_index(drop=True)
+
+
+class ProtocolHistory:
+
+    def __init__(self, path=HISTORY_PATH):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " taken_at REAL NOT NULL, name TEXT NOT NULL, chain TEXT, tvl REAL, apy REAL,"
+            " PRIMARY KEY (name, taken_at)"
+            ") WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS snapshots_taken_at ON snapshots (taken_at)")
+
+    def record(self, table, taken_at=None):
+        """Appends one snapshot of the protocol table."""
+        taken_at = time.time() if taken_at is None else taken_at
+        rows = zip([taken_at] * len(table), table['name'], table['chain'],
+                   table['tvl'].tolist(), table['apy'].tolist())
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+        return taken_at
+
+    def times(self):
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT DISTINCT taken_at FROM snapshots ORDER BY taken_at")]
+
+    def snapshot(self, at=None):
+        """The latest snapshot taken at or before ``at`` (default: the latest one)."""
+        with self._lock:
+            row = self._db.execute("SELECT MAX(taken_at) FROM snapshots WHERE taken_at <= ?",
+                                   (time.time() if at is None else at,)).fetchone()
+            if row[0] is None:
+                return None
+            frame = pd.read_sql_query("SELECT name, chain, tvl, apy FROM snapshots WHERE taken_at = ?",
+                                      self._db, params=(row[0],))
+        frame.attrs['taken_at'] = row[0]
+        return frame
+
+    def deltas(self, since, until=None):
+        """
+        Change in TVL and APY per protocol between two snapshots.
+
+        :param since: Compare against the snapshot in force at this time (seconds since epoch)
+        :param until: Later time (default: the latest snapshot)
+        :return: DataFrame of name, chain, tvl, apy, tvl_delta, apy_delta, biggest APY gains first
+        """
+        before, after = self.snapshot(since), self.snapshot(until)
+        if before is None or after is None:
+            return None
+        merged = after.merge(before[['name', 'tvl', 'apy']], on='name', how='left', suffixes=('', '_before'))
+        merged['tvl_delta'] = merged['tvl'] - merged['tvl_before']
+        merged['apy_delta'] = merged['apy'] - merged['apy_before']
+        merged = merged.drop(columns=['tvl_before', 'apy_before'])
+        return merged.sort_values('apy_delta', ascending=False, na_position='last', kind='stable').reset_index(drop=True)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ProtocolScanner:
+
+    def __init__(self, url=PROTOCOLS_URL, cache_dir=CACHE_DIR, history=None, session=None, timeout=30):
+        """
+        :param url: Protocols endpoint
+        :param cache_dir: Where the last table and its validators are kept between runs
+        :param history: ProtocolHistory to record changed payloads in (None to skip)
+        :param session: requests.Session (a pooled keep-alive session by default)
+        """
+        self.url = url
+        self.cache_dir = cache_dir
+        self.history = history
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.table = None
+        self.validators = {}
+        self.last_status = None
+
+    def _meta_path(self):
+        return os.path.join(self.cache_dir, 'meta.json')
+
+    def _table_path(self):
+        return os.path.join(self.cache_dir, 'protocols.npz')
+
+    def _load_cache(self):
+        try:
+            with open(self._meta_path()) as f:
+                validators = json.load(f)
+            with np.load(self._table_path()) as arrays:
+                table = pd.DataFrame({field: arrays[field].astype(object) if field in STRING_FIELDS else arrays[field]
+                                      for field in STRING_FIELDS + NUMBER_FIELDS})
+        except (OSError, ValueError, KeyError):
+            return
+        self.table, self.validators = table, validators
+
+    def _save_cache(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging = self._table_path() + '.tmp.npz'
+        np.savez(staging, **{field: self.table[field].to_numpy(dtype=str if field in STRING_FIELDS else np.float64)
+                             for field in STRING_FIELDS + NUMBER_FIELDS})
+        os.replace(staging, self._table_path())
+        with open(self._meta_path() + '.tmp', 'w') as f:
+            json.dump(self.validators, f)
+        os.replace(self._meta_path() + '.tmp', self._meta_path())
+
+    def scan(self):
+        """
+        Returns the current protocol table, downloading it only if it changed.
+
+        :return: DataFrame with name, slug, chain, category, tvl, apy, change_1d and change_7d
+        """
+        if self.table is None:
+            self._load_cache()
+
+        headers = {}
+        if self.table is not None:
+            if self.validators.get('etag'):
+                headers['If-None-Match'] = self.validators['etag']
+            if self.validators.get('last_modified'):
+                headers['If-Modified-Since'] = self.validators['last_modified']
+
+        with self.session.get(self.url, headers=headers, stream=True, timeout=self.timeout) as response:
+            self.last_status = response.status_code
+            if response.status_code == 304:
+                return self.table
+            response.raise_for_status()
+            table = protocols_table(iter_json_array(response.iter_content(chunk_size=64 * 1024)))
+            validators = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+
+        self.table, self.validators = table, validators
+        self._save_cache()
+        if self.history is not None:
+            self.history.record(table)
+        return table
+
+
+_default_scanner = None
+
+
+# Shared scanner with the default cache and history, created on first use
+def get_protocol_scanner():
+    global _default_scanner
+    if _default_scanner is None:
+        _default_scanner = ProtocolScanner(history=ProtocolHistory())
+    return _default_scanner
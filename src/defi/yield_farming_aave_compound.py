@@ -1,38 +1,25 @@
-import json
-import time
-from web3 import Web3
-import yaml
+import asyncio
 import os
+import sys
 
-# Load configuration
-with open("config/config.yaml", 'r') as file:
-    config = yaml.safe_load(file)
+# Add the project root directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-# Connect to Infura
-web3 = Web3(Web3.HTTPProvider(config['web3']['infura_url']))
+from src.defi.yield_scheduler import LendingMarkets, YieldScheduler
+from src.utils.clients import get_client, get_config
 
-# Convert addresses to checksum format
-aave_address = Web3.to_checksum_address(config['aave']['contract_address'])
-compound_address = Web3.to_checksum_address(config['compound']['contract_address'])
+# Web3, the Aave/Compound contracts and the wallet settings are loaded on first use
+# (see src/utils/clients.py)
 
-# Load Aave and Compound ABIs
-with open(config['aave']['abi_path'], 'r') as file:
-    aave_abi = json.load(file)  # Load ABI directly if it's a list
-with open(config['compound']['abi_path'], 'r') as file:
-    compound_abi = json.load(file)  # Load ABI directly if it's a list
 
-# Initialize contracts
-aave_contract = web3.eth.contract(address=aave_address, abi=aave_abi)
-compound_contract = web3.eth.contract(address=compound_address, abi=compound_abi)
-
-wallet_address = config['web3']['wallet_address']
-private_key = config['web3']['private_key']
+def wallet_address():
+    return get_config()['web3']['wallet_address']
 
 # Function to interact with Aave
 def check_aave_yield():
     try:
         # Example function call: Get some data from the Aave contract
-        reserve_data = aave_contract.functions.getReserveData(wallet_address).call()
+        reserve_data = get_client('aave').functions.getReserveData(wallet_address()).call()
         print(f"Aave Reserve Data: {reserve_data}")
     except Exception as e:
         print(f"Error fetching Aave reserves: {e}")
@@ -41,18 +28,32 @@ def check_aave_yield():
 def check_compound_yield():
     try:
         # Example function call: Get some data from the Compound contract
-        account_liquidity = compound_contract.functions.getAccountLiquidity(wallet_address).call()
+        account_liquidity = get_client('compound').functions.getAccountLiquidity(wallet_address()).call()
         print(f"Compound Account Liquidity: {account_liquidity}")
     except Exception as e:
         print(f"Error fetching Compound data: {e}")
 
-# Function to run the bot periodically
-def run_yield_farming_bot():
-    while True:
-        print("Checking Aave and Compound for yield farming opportunities...")
-        check_aave_yield()
-        check_compound_yield()
-        time.sleep(3600)
+# All Aave reserves and Compound markets from config.yaml, read over the shared JSON-RPC client
+def lending_markets():
+    config = get_config()
+    return LendingMarkets(get_client('eth_rpc'), aave_pool=config['aave']['contract_address'],
+                          comptroller=config['compound']['contract_address'])
+
+
+# Downstream hook for a rate that moved past the scheduler's threshold
+def report_rate_change(event):
+    moved = f" (moved {event['change']:.2f} pts)" if event['change'] is not None else ""
+    print(f"[block {event['block']}] {event['protocol']} {event['market']}: "
+          f"supply {event['supply_apy']:.2f}% borrow {event['borrow_apy']:.2f}%{moved}")
+
+
+# Function to run the bot: polls both protocols in batched reads, faster while rates are moving
+def run_yield_farming_bot(min_change=0.25, min_interval=12.0, max_interval=3600.0, on_change=report_rate_change):
+    print("Watching Aave and Compound for yield farming opportunities...")
+    scheduler = YieldScheduler(lending_markets(), min_change=min_change,
+                               min_interval=min_interval, max_interval=max_interval)
+    asyncio.run(scheduler.run(on_change))
+
 
 if __name__ == "__main__":
     run_yield_farming_bot()
@@ -1,46 +1,37 @@
+import os
+import sys
+import time
+
 import requests
 
+# Add the project root directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.defi.llama_scanner import filter_protocols, get_protocol_scanner
+
 # Set the lower thresholds for testing
 MIN_TVL = 1000
 MIN_APY = 2
-MemoryError
 
-def fetch_defi_data():
-    url = "https://api.llama.fi/protocols"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        filtered_protocols = []
-
-        # Display all protocols and their details before filtering
-        print("Checking All Protocols:")
-        for protocol in data:
-            # Extract values with defaults
-            name = protocol.get('name', 'Unknown')
-            tvl = protocol.get('tvl') if protocol.get('tvl') is not None else 0
-            apy = protocol.get('apy') if protocol.get('apy') is not None else 0
-            chain = protocol.get('chain', 'Unknown')
-
-            # Print protocol info
-            print(f"Protocol: {name}")
-            print(f"  TVL: {tvl}")
-            print(f"  APY: {apy}")
-            print(f"  Chain: {chain}")
-            print("-----")
 
-            # Filter protocols meeting the threshold requirements
-            if tvl >= MIN_TVL and apy >= MIN_APY:
-                filtered_protocols.append({
-                    "name": name,
-                    "tvl": tvl,
-                    "apy": apy,
-                    "chain": chain
-                })
+def fetch_defi_data(min_tvl=MIN_TVL, min_apy=MIN_APY, scanner=None):
+    """
+    High-yield protocols from DeFi Llama, sorted by APY.
+
+    The protocol list is only downloaded again when DeFi Llama reports a change
+    (see src/defi/llama_scanner.py); otherwise the cached table is filtered.
 
-        # Sort protocols by APY in descending order
-        sorted_protocols = sorted(filtered_protocols, key=lambda x: x['apy'], reverse=True)
+    :return: List of dicts with name, tvl, apy and chain, or None on a request error
+    """
+    scanner = scanner or get_protocol_scanner()
+    try:
+        started = time.perf_counter()
+        table = scanner.scan()
+        print(f"Scanned {len(table)} protocols in {(time.perf_counter() - started) * 1000:.1f} ms "
+              f"({'unchanged' if scanner.last_status == 304 else 'updated'})")
+
+        sorted_protocols = filter_protocols(table, min_tvl, min_apy)[['name', 'tvl', 'apy', 'chain']]
+        sorted_protocols = sorted_protocols.to_dict('records')
 
         # Display high-yield farming opportunities after filtering
         print("\nHigh-Yield Farming Opportunities (Sorted by APY):")
@@ -53,10 +44,18 @@ def fetch_defi_data():
 
         return sorted_protocols
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"Error fetching DeFi data: {e}")
         return None
 
+
+# Change in TVL and APY since ``hours`` ago, from the scanner's snapshot history
+def yield_deltas(hours=24, scanner=None):
+    scanner = scanner or get_protocol_scanner()
+    if scanner.history is None:
+        return None
+    return scanner.history.deltas(time.time() - hours * 3600)
+
+
 if __name__ == "__main__":
     fetch_defi_data()
-
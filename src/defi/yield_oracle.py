@@ -0,0 +1,204 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Lending-rate oracle for code that must not wait on the network.
+#
+# YieldOracle keeps the latest Aave/Compound rates in memory and refreshes
+# them from a background thread; reading them is a couple of attribute
+# lookups, so a strategy can ask on every bar without blocking on RPC. A
+# snapshot older than the TTL is treated as missing rather than served.
+# Each refresh can be appended to a CSV, and ReplayYieldOracle serves such a
+# history to backtests with the same interface: at bar time t it answers
+# with the last snapshot taken at or before t, never a later one.
+
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), '../../data/defi/lending_rates.csv')
+HISTORY_COLUMNS = ['timestamp', 'block', 'protocol', 'market', 'supply_apy', 'borrow_apy']
+
+
+def make_snapshot(rates, taken_at, block=None):
+    """
+    Bundles a LendingMarkets.read() result with the best supply rate per protocol.
+
+    :param rates: Dict of (protocol, market) to {'supply_apy', 'borrow_apy'}
+    :param taken_at: Seconds since the epoch
+    """
+    best = {}
+    for (protocol, market), rate in rates.items():
+        if protocol not in best or rate['supply_apy'] > best[protocol][1]:
+            best[protocol] = (market, rate['supply_apy'])
+    return {'taken_at': taken_at, 'block': block, 'rates': rates, 'best': best}
+
+
+def _supply_apy(snapshot, protocol, market):
+    if snapshot is None:
+        return None
+    if market is None:
+        best = snapshot['best'].get(protocol)
+        return best[1] if best else None
+    rate = snapshot['rates'].get((protocol, market))
+    return rate['supply_apy'] if rate else None
+
+
+class YieldOracle:
+
+    def __init__(self, markets, ttl=600.0, refresh_interval=None, history_path=None, clock=time.time):
+        """
+        :param markets: LendingMarkets
+        :param ttl: Seconds a snapshot is served after it was taken
+        :param refresh_interval: Seconds between background refreshes (default: a third of the TTL)
+        :param history_path: CSV every refresh is appended to, for ReplayYieldOracle (None to skip)
+        """
+        self.markets = markets
+        self.ttl = ttl
+        self.refresh_interval = ttl / 3 if refresh_interval is None else refresh_interval
+        self.history_path = history_path
+        self.clock = clock
+        self.errors = 0
+        self._snapshot = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """Reads every market now and swaps the new snapshot in."""
+        block = self.markets.rpc.block_number()
+        rates = self.markets.read(block)
+        snapshot = make_snapshot(rates, self.clock(), block)
+        # Readers see either the old or the new snapshot, never a mix
+        self._snapshot = snapshot
+        if self.history_path:
+            append_history(self.history_path, snapshot)
+        return snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Error refreshing lending rates: {e}")
+            self._stop.wait(self.refresh_interval)
+
+    def start(self):
+        """Starts the background refresh thread (once)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='yield-oracle', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def snapshot(self, now=None):
+        """
+        The latest snapshot, or None if there is none yet or it is older than the TTL.
+
+        :param now: Ignored; accepted so live and replayed oracles are interchangeable
+        """
+        snapshot = self._snapshot
+        if snapshot is None or self.clock() - snapshot['taken_at'] > self.ttl:
+            return None
+        return snapshot
+
+    def supply_apy(self, protocol, market=None, now=None):
+        """
+        Supply APY in percent, from memory only.
+
+        :param market: Market address (default: the protocol's best market)
+        :return: APY, or None when no fresh rate is known
+        """
+        return _supply_apy(self.snapshot(now), protocol, market)
+
+
+class ReplayYieldOracle:
+
+    def __init__(self, snapshots, ttl=None):
+        """
+        :param snapshots: Snapshot dicts (see make_snapshot), taken_at in seconds since the epoch
+        :param ttl: Seconds a snapshot stays valid in replay (default: until the next one)
+        """
+        self.snapshots = sorted(snapshots, key=lambda snapshot: snapshot['taken_at'])
+        self.times = np.asarray([snapshot['taken_at'] for snapshot in self.snapshots], dtype=np.float64)
+        self.ttl = ttl
+        self._cursor = 0
+
+    @classmethod
+    def from_csv(cls, path=HISTORY_PATH, ttl=None):
+        """Loads a rate history written by YieldOracle(history_path=...)."""
+        frame = pd.read_csv(path)
+        snapshots = []
+        for (taken_at, block), rows in frame.groupby(['timestamp', 'block'], sort=True, dropna=False):
+            rates = {(protocol, market): {'supply_apy': supply, 'borrow_apy': borrow}
+                     for protocol, market, supply, borrow in zip(rows['protocol'], rows['market'],
+                                                                 rows['supply_apy'], rows['borrow_apy'])}
+            snapshots.append(make_snapshot(rates, float(taken_at), None if pd.isna(block) else int(block)))
+        return cls(snapshots, ttl)
+
+    def snapshot(self, now):
+        """
+        The last snapshot taken at or before ``now``.
+
+        Bars are usually asked for in order, so the search starts from the
+        previous answer and costs O(1) per bar.
+
+        :param now: Bar time (datetime, Timestamp or seconds since the epoch)
+        """
+        if not isinstance(now, (int, float, np.number)):
+            now = pd.Timestamp(now).timestamp()
+        times, n = self.times, len(self.times)
+        i = self._cursor
+        if i + 1 < n and times[i + 1] <= now:
+            i += 1
+        if not (i < n and times[i] <= now and (i + 1 == n or times[i + 1] > now)):
+            i = int(np.searchsorted(times, now, side='right')) - 1
+            if i < 0:
+                return None
+        self._cursor = i
+        snapshot = self.snapshots[i]
+        if self.ttl is not None and now - snapshot['taken_at'] > self.ttl:
+            return None
+        return snapshot
+
+    def supply_apy(self, protocol, market=None, now=None):
+        return _supply_apy(self.snapshot(now), protocol, market)
+
+
+def append_history(path, snapshot):
+    """Appends one snapshot to a rate-history CSV, writing the header for a new file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    rows = pd.DataFrame([(snapshot['taken_at'], snapshot['block'], protocol, market, rate['supply_apy'], rate['borrow_apy'])
+                         for (protocol, market), rate in snapshot['rates'].items()], columns=HISTORY_COLUMNS)
+    rows.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+
+_default_oracle = None
+_default_lock = threading.Lock()
+
+
+# Shared live oracle over the configured Aave/Compound markets, started on first use
+def get_yield_oracle(**kwargs):
+    global _default_oracle
+    if _default_oracle is None:
+        with _default_lock:
+            if _default_oracle is None:
+                from src.defi.yield_farming_aave_compound import lending_markets
+                _default_oracle = YieldOracle(lending_markets(), history_path=HISTORY_PATH, **kwargs).start()
+    return _default_oracle
+
+
+def running_yield_oracle():
+    """The shared live oracle if something already started it, else None."""
+    return _default_oracle
@@ -0,0 +1,218 @@
+import asyncio
+import inspect
+import logging
+import time
+
+from src.utils.eth_rpc import block_tag
+
+# Batched Aave/Compound rate reads and an adaptive polling scheduler.
+#
+# LendingMarkets discovers every Aave reserve (LendingPool.getReserves) and
+# Compound market (Comptroller.getAllMarkets) once, then reads all of their
+# rates with raw eth_calls grouped into JSON-RPC batches, pinned to a single
+# block so the two protocols are compared at the same point in time.
+#
+# YieldScheduler polls those reads. It tracks how fast rates are moving and
+# picks the next delay so that a move of about half the change threshold is
+# expected between polls: quiet markets are polled rarely, busy ones often,
+# always within [min_interval, max_interval]. Only a rate that moved at
+# least min_change since it was last reported triggers the callback.
+
+# Function selectors (first 4 bytes of keccak256 of the signature)
+GET_RESERVES_SELECTOR = '0902f1ac'       # getReserves()
+GET_RESERVE_DATA_SELECTOR = '35ea6a75'   # getReserveData(address)
+GET_ALL_MARKETS_SELECTOR = 'b0772d0b'    # getAllMarkets()
+SUPPLY_RATE_SELECTOR = 'ae9d70b0'        # supplyRatePerBlock()
+BORROW_RATE_SELECTOR = 'f8f9da28'        # borrowRatePerBlock()
+
+RAY = 10 ** 27
+MANTISSA = 10 ** 18
+# 12 s blocks since the merge
+BLOCKS_PER_DAY = 7200
+
+RATE_FIELDS = ('supply_apy', 'borrow_apy')
+
+
+def _words(result):
+    raw = bytes.fromhex(result[2:] if result.startswith('0x') else result)
+    return [int.from_bytes(raw[i:i + 32], 'big') for i in range(0, len(raw), 32)]
+
+
+def _address_word(address):
+    return format(int(address, 16), '064x')
+
+
+def decode_address_array(result):
+    """Decodes an ABI-encoded address[] return value."""
+    words = _words(result)
+    start = words[0] // 32
+    return ['0x' + format(word, '040x') for word in words[start + 1:start + 1 + words[start]]]
+
+
+def ray_to_apy(rate):
+    """Aave v1 annual rate in ray (1e27) to percent."""
+    return rate / RAY * 100
+
+
+def per_block_to_apy(rate, blocks_per_day=BLOCKS_PER_DAY):
+    """Compound per-block rate mantissa (1e18) to percent APY, compounded daily."""
+    return ((rate / MANTISSA * blocks_per_day + 1) ** 365 - 1) * 100
+
+
+class LendingMarkets:
+
+    def __init__(self, rpc, aave_pool=None, comptroller=None, batch_size=200, blocks_per_day=BLOCKS_PER_DAY):
+        """
+        :param rpc: EthRPC client (or anything with call() and batch())
+        :param aave_pool: Aave LendingPool address (config.yaml's aave.contract_address)
+        :param comptroller: Compound Comptroller address (config.yaml's compound.contract_address)
+        :param batch_size: eth_calls per JSON-RPC batch request
+        """
+        self.rpc = rpc
+        self.aave_pool = aave_pool
+        self.comptroller = comptroller
+        self.batch_size = batch_size
+        self.blocks_per_day = blocks_per_day
+        self.aave_reserves = None
+        self.compound_markets = None
+
+    def _eth_call(self, to, data, block):
+        return 'eth_call', ({'to': to, 'data': '0x' + data}, block_tag(block))
+
+    def discover(self):
+        """Lists Aave reserves and Compound markets, in one batch request."""
+        calls = []
+        if self.aave_pool:
+            calls.append(self._eth_call(self.aave_pool, GET_RESERVES_SELECTOR, 'latest'))
+        if self.comptroller:
+            calls.append(self._eth_call(self.comptroller, GET_ALL_MARKETS_SELECTOR, 'latest'))
+        results = iter(self.rpc.batch(calls))
+        self.aave_reserves = decode_address_array(next(results)) if self.aave_pool else []
+        self.compound_markets = decode_address_array(next(results)) if self.comptroller else []
+        return self.aave_reserves, self.compound_markets
+
+    def _calls(self, block):
+        if self.aave_reserves is None:
+            self.discover()
+        keys, calls = [], []
+        for reserve in self.aave_reserves:
+            keys.append(('aave', reserve))
+            calls.append(self._eth_call(self.aave_pool, GET_RESERVE_DATA_SELECTOR + _address_word(reserve), block))
+        for market in self.compound_markets:
+            keys.append(('compound', market))
+            calls.append(self._eth_call(market, SUPPLY_RATE_SELECTOR, block))
+            calls.append(self._eth_call(market, BORROW_RATE_SELECTOR, block))
+        return keys, calls
+
+    def _decode(self, keys, results):
+        rates = {}
+        results = iter(results)
+        for protocol, market in keys:
+            if protocol == 'aave':
+                # (totalLiquidity, availableLiquidity, totalBorrowsStable, totalBorrowsVariable,
+                #  liquidityRate, variableBorrowRate, ...)
+                words = _words(next(results))
+                rates[(protocol, market)] = {'supply_apy': ray_to_apy(words[4]), 'borrow_apy': ray_to_apy(words[5])}
+            else:
+                supply, borrow = (_words(next(results))[0] for _ in range(2))
+                rates[(protocol, market)] = {'supply_apy': per_block_to_apy(supply, self.blocks_per_day),
+                                             'borrow_apy': per_block_to_apy(borrow, self.blocks_per_day)}
+        return rates
+
+    def _chunks(self, calls):
+        return [calls[i:i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+
+    def read(self, block='latest'):
+        """
+        Supply and borrow APY (percent) of every market at ``block``.
+
+        :return: Dict of (protocol, market address) to {'supply_apy', 'borrow_apy'}
+        """
+        keys, calls = self._calls(block)
+        results = [result for chunk in self._chunks(calls) for result in self.rpc.batch(chunk)]
+        return self._decode(keys, results)
+
+    async def read_async(self, block='latest'):
+        """Like read(), with the batch requests sent concurrently."""
+        if self.aave_reserves is None:
+            await asyncio.to_thread(self.discover)
+        keys, calls = self._calls(block)
+        replies = await asyncio.gather(*(asyncio.to_thread(self.rpc.batch, chunk) for chunk in self._chunks(calls)))
+        return self._decode(keys, [result for reply in replies for result in reply])
+
+
+class YieldScheduler:
+
+    def __init__(self, markets, min_change=0.25, min_interval=12.0, max_interval=3600.0, smoothing=0.5):
+        """
+        :param markets: LendingMarkets
+        :param min_change: APY move (percentage points) that triggers the callback
+        :param min_interval: Shortest delay between polls, in seconds (about one block)
+        :param max_interval: Longest delay between polls, in seconds
+        :param smoothing: Weight of the latest observation in the rate-speed average
+        """
+        self.markets = markets
+        self.min_change = min_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self.interval = min_interval
+        self.speed = 0.0        # smoothed fastest APY move, percentage points per second
+        self.block = None
+        self.rates = {}
+        self.reported = {}      # (protocol, market) -> rates when last reported
+        self._read_at = None
+
+    def _adapt(self, rates, now):
+        if self._read_at is not None and now > self._read_at:
+            move = max((abs(rate[field] - self.rates[key][field])
+                        for key, rate in rates.items() if key in self.rates for field in RATE_FIELDS), default=0.0)
+            self.speed = self.smoothing * move / (now - self._read_at) + (1 - self.smoothing) * self.speed
+            # Expect a move of about half the threshold before the next poll
+            target = 0.5 * self.min_change / self.speed if self.speed > 0 else self.max_interval
+            self.interval = min(self.max_interval, max(self.min_interval, target))
+        self.rates, self._read_at = rates, now
+
+    def changes(self, rates, block):
+        """Events for rates that moved at least min_change since they were last reported."""
+        events = []
+        for (protocol, market), rate in rates.items():
+            previous = self.reported.get((protocol, market))
+            change = None if previous is None else max(abs(rate[f] - previous[f]) for f in RATE_FIELDS)
+            if change is not None and change < self.min_change:
+                continue
+            self.reported[(protocol, market)] = rate
+            events.append({'protocol': protocol, 'market': market, 'block': block, **rate,
+                           'previous': previous, 'change': change})
+        return events
+
+    async def poll(self, now=None):
+        """
+        Reads every market if a new block was mined.
+
+        :param now: Monotonic time of the poll (default: time.monotonic())
+        :return: List of rate-change events
+        """
+        block = await asyncio.to_thread(self.markets.rpc.block_number)
+        if block == self.block:
+            return []
+        rates = await self.markets.read_async(block)
+        self.block = block
+        self._adapt(rates, time.monotonic() if now is None else now)
+        return self.changes(rates, block)
+
+    async def run(self, on_change, stop=None):
+        """
+        Polls until ``stop()`` returns True, calling ``on_change`` (sync or async) for each event.
+        """
+        while not (stop and stop()):
+            try:
+                events = await self.poll()
+            except Exception as e:
+                logging.error(f"Error reading lending rates: {e}")
+                events = []
+            for event in events:
+                result = on_change(event)
+                if inspect.isawaitable(result):
+                    await result
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,259 @@
+import importlib
+import importlib.util
+import itertools
+import logging
+import os
+import re
+import time
+from multiprocessing import Pool
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.engine.cerebro import run_cerebro, transactions
+from src.engine.metrics import bars_per_year, compute_metrics, fill_arrays, trade_pnl
+from src.utils.data_loader import load_ohlcv
+
+# Unattended backtests over a manifest of strategies x datasets x cash.
+#
+# Every job runs in a worker process (multiprocessing.Pool, as in sweep.py).
+# Workers load each dataset once through load_ohlcv's memory-mapped cache and
+# send back plain data only: the metrics of src/engine/metrics.py and the
+# flattened analyzer output, which become one row of the results table, and
+# the bar-by-bar equity and fills for the plot. Plots are drawn from that data
+# with matplotlib's non-interactive Agg backend as separate pool tasks, so
+# nothing opens a window and the table never waits on rendering.
+#
+# A manifest is a dict, or a YAML/JSON file holding one:
+#
+#   strategies:                      # registry names or dotted class paths
+#     - MomentumStrategy
+#     - {strategy: MeanReversionStrategy, name: MR-20, params: {period: 20}}
+#   datasets:
+#     BTC/USD: data/crypto/BTC_USD_data.csv
+#   cash: [10000, 1000000]          # optional, one run per value
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'data/batch')
+
+STRATEGIES = {
+    'MeanReversionStrategy': 'src.strategies.mean_reversion.MeanReversionStrategy',
+    'MomentumStrategy': 'src.strategies.momentum.MomentumStrategy',
+    'EnhancedStrategy': 'src.tests.backtesting.EnhancedStrategy',
+}
+
+ANALYZERS = {
+    'sharpe': bt.analyzers.SharpeRatio,
+    'drawdown': bt.analyzers.DrawDown,
+    'trades': bt.analyzers.TradeAnalyzer,
+    'returns': bt.analyzers.Returns,
+    'transactions': bt.analyzers.Transactions,
+}
+
+# Per-worker dataset cache
+_worker = {}
+
+
+class EquityCurve(bt.Analyzer):
+    """Portfolio value at the close of every bar."""
+
+    def start(self):
+        self.values = []
+
+    def next(self):
+        self.values.append(self.strategy.broker.getvalue())
+
+    def get_analysis(self):
+        return np.asarray(self.values, dtype=np.float64)
+
+
+def load_manifest(manifest):
+    """
+    :param manifest: Manifest dict, or path to a YAML/JSON file (YAML is a superset of JSON)
+    :return: Manifest dict
+    """
+    if isinstance(manifest, dict):
+        return manifest
+    with open(manifest) as f:
+        return yaml.safe_load(f) or {}
+
+
+def resolve_strategy(name):
+    """Strategy class for a registry name ('MomentumStrategy') or a dotted path ('pkg.module.Class')."""
+    path = STRATEGIES.get(name, name)
+    module, _, attr = path.rpartition('.')
+    if not module:
+        raise ValueError(f"Unknown strategy: {name}")
+    return getattr(importlib.import_module(module), attr)
+
+
+def expand_jobs(manifest):
+    """
+    Expands a manifest into one job per strategy, dataset and cash setting.
+
+    :return: List of job dicts (id, strategy, label, params, dataset, path, cash)
+    """
+    manifest = load_manifest(manifest)
+    strategies = [entry if isinstance(entry, dict) else {'strategy': entry} for entry in manifest.get('strategies', [])]
+    datasets = manifest.get('datasets', {})
+    cash = manifest.get('cash', 10000.0)
+    cash = cash if isinstance(cash, (list, tuple)) else [cash]
+
+    jobs = []
+    for entry, (dataset, path), amount in itertools.product(strategies, datasets.items(), cash):
+        jobs.append({
+            'id': len(jobs),
+            'strategy': entry['strategy'],
+            'label': entry.get('name', entry['strategy'].rpartition('.')[2]),
+            'params': dict(entry.get('params') or {}),
+            'dataset': dataset,
+            'path': path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path),
+            'cash': float(amount),
+        })
+    return jobs
+
+
+def flatten_analysis(analysis, prefix):
+    """Flattens nested analyzer output into {'prefix.key.subkey': scalar}."""
+    flat = {}
+    for key, value in analysis.items():
+        name = f"{prefix}.{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_analysis(value, name))
+        elif isinstance(value, (int, float, np.number, type(None))):
+            flat[name] = value
+    return flat
+
+
+def run_job(job):
+    """
+    Runs one manifest job.
+
+    :param job: Job dict from expand_jobs
+    :return: (results table row, curve dict for render_plot)
+    """
+    row = {key: job[key] for key in ('id', 'label', 'dataset', 'cash')}
+    row['params'] = repr(job['params']) if job['params'] else ''
+    start = time.perf_counter()
+    try:
+        data_df = _worker.get(job['path'])
+        if data_df is None:
+            data_df = _worker[job['path']] = load_ohlcv(job['path'])
+        analyzers = dict(ANALYZERS, equity=EquityCurve)
+        result, final_value = run_cerebro(resolve_strategy(job['strategy']), data_df, job['cash'], analyzers=analyzers,
+                                          **job['params'])
+    except Exception as e:
+        logging.exception("Batch job %s on %s failed", job['label'], job['dataset'])
+        row.update(error=f"{type(e).__name__}: {e}", seconds=time.perf_counter() - start)
+        return row, None
+
+    fills = transactions(result)
+    equity = result.analyzers.equity.get_analysis()
+    position, traded = fill_arrays(fills, len(data_df), data_df.index)
+    row.update(final_value=final_value, return_pct=(final_value / job['cash'] - 1) * 100, fills=len(fills))
+    row.update(compute_metrics(equity, trade_pnl(fills), position, traded, bars_per_year(data_df.index)))
+    for name in ANALYZERS:
+        if name != 'transactions':
+            row.update(flatten_analysis(result.analyzers.getbyname(name).get_analysis(), name))
+    row.update(error='', seconds=time.perf_counter() - start)
+
+    curve = {
+        'index': data_df.index.asi8,
+        'close': data_df['close'].to_numpy(dtype=np.float64),
+        'value': equity,
+        'fills': [(pd.Timestamp(dt).value, size, price) for dt, size, price in fills],
+    }
+    return row, curve
+
+
+def plot_path(out_dir, job):
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', f"{job['id']:03d}_{job['label']}_{job['dataset']}_{job['cash']:g}").strip('_')
+    return os.path.join(out_dir, 'plots', f"{slug}.png")
+
+
+def render_plot(curve, title, path):
+    """
+    Draws price with fills and the equity curve of one job into a PNG.
+
+    :return: path
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    dates = pd.to_datetime(curve['index'])
+    fig, (price_ax, value_ax) = plt.subplots(2, 1, sharex=True, figsize=(12, 7), height_ratios=(2, 1))
+    price_ax.plot(dates, curve['close'], linewidth=0.8, color='black')
+    for side, marker, color in ((1, '^', 'green'), (-1, 'v', 'red')):
+        points = [(t, price) for t, size, price in curve['fills'] if np.sign(size) == side]
+        if points:
+            times, prices = zip(*points)
+            price_ax.scatter(pd.to_datetime(times), prices, marker=marker, color=color, zorder=3)
+    price_ax.set_title(title)
+    price_ax.set_ylabel('close')
+    value_ax.plot(dates, curve['value'], linewidth=0.8)
+    value_ax.set_ylabel('portfolio value')
+    fig.tight_layout()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+    return path
+
+
+def _plot_task(curve, title, path):
+    try:
+        return render_plot(curve, title, path)
+    except Exception:
+        logging.exception("Plot %s failed", path)
+        return None
+
+
+def run_batch(manifest, out_dir=OUTPUT_DIR, processes=None, plots=True):
+    """
+    Runs every job of a manifest across worker processes.
+
+    :param manifest: Manifest dict or YAML/JSON path (see the module comment)
+    :param out_dir: Directory for results.csv and plots/; None writes nothing
+    :param processes: Worker processes (default: os.cpu_count())
+    :param plots: Render a PNG per job (needs matplotlib)
+    :return: Results table, one row per job in manifest order
+    """
+    jobs = expand_jobs(manifest)
+    processes = min(processes or os.cpu_count() or 1, max(len(jobs), 1))
+    if plots and out_dir is not None and importlib.util.find_spec('matplotlib') is None:
+        logging.warning("matplotlib is not installed; skipping batch plots")
+        plots = False
+    plots = plots and out_dir is not None
+
+    rows, pending = [], []
+
+    def collect(row, curve, job, submit):
+        if plots and curve is not None:
+            row['plot'] = plot_path(out_dir, job)
+            pending.append(submit(_plot_task, (curve, f"{job['label']} - {job['dataset']} - cash {job['cash']:g}",
+                                               row['plot'])))
+        rows.append(row)
+        logging.info("Batch job %d/%d done: %s on %s", len(rows), len(jobs), job['label'], job['dataset'])
+
+    if processes == 1:
+        try:
+            for job in jobs:
+                collect(*run_job(job), job, lambda task, args: task(*args))
+        finally:
+            _worker.clear()
+    else:
+        with Pool(processes) as pool:
+            for row, curve in pool.imap_unordered(run_job, jobs):
+                collect(row, curve, jobs[row['id']], pool.apply_async)
+            for result in pending:
+                result.wait()
+
+    table = pd.DataFrame(rows)
+    if not table.empty:
+        table = table.sort_values('id', ignore_index=True)
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        table.to_csv(os.path.join(out_dir, 'results.csv'), index=False)
+    return table
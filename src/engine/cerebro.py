@@ -0,0 +1,47 @@
+import contextlib
+import io
+
+import backtrader as bt
+
+# Thin wrapper around bt.Cerebro so engines, sweeps and tests run the
+# backtrader path the same way strategy_test.py does.
+
+
+class PandasData(bt.feeds.PandasData):
+    params = (('datetime', None), ('open', 'open'), ('high', 'high'), ('low', 'low'), ('close', 'close'), ('volume', 'volume'), ('openinterest', None))
+
+
+def run_cerebro(strategy, data_df, cash=10000.0, analyzers=None, quiet=True, **params):
+    """
+    Runs a single backtrader backtest.
+
+    :param strategy: Strategy class
+    :param data_df: OHLCV DataFrame indexed by datetime, with an optional 'sentiment' column
+    :param cash: Starting cash
+    :param analyzers: Mapping of analyzer name to analyzer class
+    :param quiet: Swallow the strategies' per-bar prints
+    :param params: Strategy params
+    :return: (strategy instance, final portfolio value)
+    """
+    cerebro = bt.Cerebro()
+    cerebro.addstrategy(strategy, **params)
+    if 'sentiment' in data_df:
+        # Expose the frame's sentiment as a line, as run_vectorized reads it
+        from src.utils.feature_feed import feature_data
+        cerebro.adddata(feature_data(data_df, ['sentiment']))
+    else:
+        cerebro.adddata(PandasData(dataname=data_df))
+    cerebro.broker.setcash(cash)
+    for name, analyzer in (analyzers or {}).items():
+        cerebro.addanalyzer(analyzer, _name=name)
+
+    output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    with output:
+        results = cerebro.run()
+    return results[0], cerebro.broker.getvalue()
+
+
+def transactions(result):
+    """Flattens a Transactions analyzer into (datetime, size, price) tuples."""
+    analysis = result.analyzers.transactions.get_analysis()
+    return [(dt, amount, price) for dt, txs in analysis.items() for amount, price, *_ in txs]
@@ -0,0 +1,454 @@
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.indicators.online import RSI, SMA
+from src.utils.data_loader import read_ohlcv_csv
+from src.utils.event_recorder import NULL_RECORDER
+
+# Event-driven paper trading for the strategies in src/strategies.
+#
+# A feed is any async iterable of Bar events: ReplayFeed replays an OHLCV
+# frame on an accelerated clock, QueueFeed takes bars pushed by another task
+# (e.g. a websocket handler) and TradeBars rolls a stream of trades up into
+# bars. LiveRunner reads the feed into a queue, hands every bar to a live
+# strategy that keeps its indicators current with src/indicators/online.py,
+# and sends the resulting orders to a PaperBroker.
+#
+# The live strategies and the paper broker follow the backtrader versions
+# bar for bar (market orders filled at the next bar's open, the same Margin
+# rejections as BackBroker), so a replayed CSV gives the same fills as
+# run_cerebro and run_vectorized.
+#
+# Latency is measured with perf_counter_ns: tick-to-signal from the moment the
+# feed delivered a bar to the strategy's decision, signal-to-order from that
+# decision to the broker acknowledging the order.
+#
+# With an EventRecorder, the runner records bar snapshots, the strategies
+# their signals and the broker its orders and fills.
+
+SUB_BUCKET_BITS = 3   # 8 histogram buckets per power of two, i.e. 12.5% resolution
+
+_NAN = float('nan')
+
+
+@dataclass(slots=True)
+class Bar:
+    time: object
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
+    received: int = 0      # perf_counter_ns when the feed delivered the bar
+
+
+def epoch(t):
+    """Bar time (Timestamp, datetime or epoch seconds) as epoch seconds, for the EventRecorder."""
+    return float(t) if isinstance(t, (int, float)) else t.timestamp()
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of latencies in nanoseconds (HdrHistogram style).
+
+    Recording is O(1) and memory only grows with the number of distinct
+    buckets hit; percentiles are accurate to one bucket (12.5%).
+    """
+
+    __slots__ = ('name', 'counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, ns):
+        ns = max(int(ns), 0)
+        shift = max(ns.bit_length() - SUB_BUCKET_BITS - 1, 0)
+        bucket = (shift << SUB_BUCKET_BITS) + (ns >> shift)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if self.max is None or ns > self.max:
+            self.max = ns
+
+    @staticmethod
+    def _upper_bound(bucket):
+        width = 1 << SUB_BUCKET_BITS
+        if bucket < 2 * width:
+            return bucket
+        shift = (bucket - width) >> SUB_BUCKET_BITS
+        return ((bucket - (shift << SUB_BUCKET_BITS) + 1) << shift) - 1
+
+    def percentile(self, q):
+        """
+        :param q: Percentile between 0 and 100
+        :return: Latency in ns at or below which q% of the samples fall, or None if empty
+        """
+        if not self.count:
+            return None
+        rank = max(math.ceil(self.count * q / 100.0), 1)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(max(self._upper_bound(bucket), self.min), self.max)
+        return self.max
+
+    def summary(self):
+        """Count, mean and p50/p90/p99/max in microseconds."""
+        if not self.count:
+            return {'count': 0}
+        us = 1e-3
+        return {
+            'count': self.count,
+            'mean_us': self.total / self.count * us,
+            'p50_us': self.percentile(50) * us,
+            'p90_us': self.percentile(90) * us,
+            'p99_us': self.percentile(99) * us,
+            'max_us': self.max * us,
+        }
+
+    def __str__(self):
+        stats = self.summary()
+        if not stats['count']:
+            return f"{self.name}: no samples"
+        return (f"{self.name}: n={stats['count']} mean={stats['mean_us']:.1f}us p50={stats['p50_us']:.1f}us "
+                f"p90={stats['p90_us']:.1f}us p99={stats['p99_us']:.1f}us max={stats['max_us']:.1f}us")
+
+
+class ReplayFeed:
+    """Replays an OHLCV DataFrame as live bars, ``speed`` times faster than real time."""
+
+    def __init__(self, data_df, speed=None):
+        """
+        :param data_df: OHLCV DataFrame indexed by datetime (see read_ohlcv_csv)
+        :param speed: Clock acceleration (86400 plays a daily bar per second); None replays without waiting
+        """
+        self.data = data_df
+        self.speed = speed
+
+    @classmethod
+    def from_csv(cls, path, speed=None):
+        return cls(read_ohlcv_csv(path), speed)
+
+    async def __aiter__(self):
+        data = self.data
+        columns = [data[col].to_numpy(dtype=np.float64).tolist() for col in ('open', 'high', 'low', 'close', 'volume')]
+        times = list(data.index)
+        offsets = (data.index.asi8 - data.index.asi8[0]) / 1e9 if len(data) else []
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for i, (o, h, l, c, v) in enumerate(zip(*columns)):
+            # Sleep until the bar's scheduled time rather than for the gap since
+            # the last one, so slow consumers do not make the replay drift
+            delay = started + offsets[i] / self.speed - loop.time() if self.speed else 0.0
+            await asyncio.sleep(max(delay, 0.0))
+            yield Bar(times[i], o, h, l, c, v)
+
+
+class QueueFeed:
+    """Feed for bars pushed by another task, e.g. an exchange websocket handler."""
+
+    _CLOSED = object()
+
+    def __init__(self):
+        self._queue = asyncio.Queue()
+
+    def put(self, bar):
+        self._queue.put_nowait(bar)
+
+    def close(self):
+        self._queue.put_nowait(self._CLOSED)
+
+    async def __aiter__(self):
+        while (bar := await self._queue.get()) is not self._CLOSED:
+            yield bar
+
+
+class TradeBars:
+    """Rolls a feed of trades, (epoch seconds, price, size) tuples, up into bars of ``interval`` seconds."""
+
+    def __init__(self, trades, interval=60.0):
+        self.trades = trades
+        self.interval = interval
+
+    async def __aiter__(self):
+        bar = None
+        async for timestamp, price, size in self.trades:
+            start = timestamp - timestamp % self.interval
+            if bar is not None and start != bar.time:
+                # A bar is complete once the first trade of the next interval arrives
+                yield bar
+                bar = None
+            if bar is None:
+                bar = Bar(start, price, price, price, price, size)
+            else:
+                bar.high = max(bar.high, price)
+                bar.low = min(bar.low, price)
+                bar.close = price
+                bar.volume += size
+        if bar is not None:
+            yield bar
+
+
+class PaperBroker:
+    """
+    Simulated broker with backtrader's default BackBroker semantics: market
+    orders fill at the next bar's open, no commission, and a long entry that
+    cannot be paid for at the creation close or at the fill price is rejected.
+    """
+
+    def __init__(self, cash=10000.0, recorder=None):
+        self.cash = float(cash)
+        self.position = 0
+        self.recorder = recorder or NULL_RECORDER
+        self.orders = 0
+        self.pending = []      # (ref, size, creation bar) waiting for the next bar's open
+        self.fills = []        # (time, size, price) for every executed order
+        self.rejected = []     # (time, size) for every rejected order
+        self.last_close = _NAN
+
+    @property
+    def value(self):
+        return self.cash + self.position * self.last_close if self.position else self.cash
+
+    async def submit(self, size, bar):
+        """
+        Places a market order; async like a real exchange client.
+
+        :param size: Signed order size
+        :param bar: Bar on which the strategy issued the order
+        :return: True if the order was accepted
+        """
+        self.orders += 1
+        accepted = not (size > 0 and self.position >= 0 and self.cash - size * bar.close < 0.0)
+        if self.recorder.info:
+            self.recorder.order(epoch(bar.time), self.orders, 'Accepted' if accepted else 'Margin', size, bar.close)
+        if not accepted:
+            self.rejected.append((bar.time, size))
+            return False
+        self.pending.append((self.orders, size, bar))
+        return True
+
+    def on_bar(self, bar):
+        """Fills the pending orders at ``bar``'s open, before the strategy sees it."""
+        pending, self.pending = self.pending, []
+        rec = self.recorder
+        for ref, size, created in pending:
+            price = bar.open
+            if size > 0 and self.position >= 0 and self.cash - size * price < 0.0:
+                self.rejected.append((created.time, size))
+                if rec.info:
+                    rec.order(epoch(bar.time), ref, 'Margin', size, created.close)
+                continue
+            self.cash -= size * price
+            self.position += size
+            self.fills.append((bar.time, size, price))
+            if rec.info:
+                rec.order(epoch(bar.time), ref, 'Completed', size, created.close)
+                rec.fill(epoch(bar.time), ref, size, price, size * price)
+        self.last_close = bar.close
+
+
+# Live counterparts of the backtrader strategies. on_bar() sees one bar and
+# the broker position, and returns the signed size to order (0 for none).
+# ``warmup`` is the first bar backtrader calls next() on (its minperiod - 1).
+
+class _LiveStrategy:
+
+    def _signal(self, bar, size, reason, indicator):
+        if self.recorder.info:
+            self.recorder.signal(epoch(bar.time), size, bar.close, reason, indicator)
+        return size
+
+
+class LiveMeanReversion(_LiveStrategy):
+
+    def __init__(self, period=10, dev_threshold=0.5, stop_loss=0.02, take_profit=0.04, recorder=None, stake=1):
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.stake = stake
+        self.recorder = recorder or NULL_RECORDER
+        self.sma = SMA(period)
+        self.order = False
+        self.buy_price = None
+
+    def on_bar(self, bar, position):
+        close = bar.close
+        avg = self.sma.update(close)
+        if self.order:
+            # MeanReversionStrategy never clears self.order, so only its first order is placed
+            return 0
+        if not position:
+            if close < avg:
+                self.buy_price = close
+                self.order = True
+                return self._signal(bar, self.stake, 'entry', avg)
+        elif close <= self.buy_price * (1 - self.stop_loss):
+            self.order = True
+            return self._signal(bar, -self.stake, 'stop_loss', avg)
+        elif close >= self.buy_price * (1 + self.take_profit):
+            self.order = True
+            return self._signal(bar, -self.stake, 'take_profit', avg)
+        return 0
+
+
+class LiveMomentum(_LiveStrategy):
+
+    def __init__(self, rsi_period=8, rsi_overbought=65, rsi_oversold=35, stop_loss=0.01, take_profit=0.02,
+                 recorder=None, stake=1):
+        self.recorder = recorder or NULL_RECORDER
+        self.rsi_overbought = rsi_overbought
+        self.rsi_oversold = rsi_oversold
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.stake = stake
+        self.rsi = RSI(rsi_period)
+        self.warmup = rsi_period
+        self.bars = 0
+        self.buy_price = None
+
+    def on_bar(self, bar, position):
+        close = bar.close
+        rsi = self.rsi.update(close)
+        self.bars += 1
+        if self.bars <= self.warmup:
+            return 0
+        if position:
+            if self.buy_price is not None:
+                if close <= (1 - self.stop_loss) * self.buy_price:
+                    self.buy_price = None
+                    return self._signal(bar, -self.stake, 'stop_loss', rsi)
+                if close >= (1 + self.take_profit) * self.buy_price:
+                    self.buy_price = None
+                    return self._signal(bar, -self.stake, 'take_profit', rsi)
+        elif rsi < self.rsi_oversold:
+            # Like MomentumStrategy, the buy price is recorded even if the order is rejected
+            self.buy_price = close
+            return self._signal(bar, self.stake, 'entry', rsi)
+        elif rsi > self.rsi_overbought:
+            return self._signal(bar, -self.stake, 'entry', rsi)
+        return 0
+
+
+LIVE_STRATEGIES = {
+    'MeanReversionStrategy': LiveMeanReversion,
+    'MomentumStrategy': LiveMomentum,
+}
+
+
+def live_strategy(strategy, stake=1, **params):
+    """
+    Builds the live counterpart of a backtrader strategy.
+
+    :param strategy: Strategy class (e.g. MomentumStrategy); its params are the defaults
+    :param stake: Order size, as in bt.sizers.FixedSize
+    :param params: Overrides for the strategy params
+    :return: Object with an on_bar(bar, position) method
+    """
+    live = LIVE_STRATEGIES.get(strategy.__name__)
+    if live is None:
+        raise ValueError(f"No live version of {strategy.__name__}")
+
+    p = dict(strategy.params._getitems())
+    unknown = set(params) - set(p)
+    if unknown:
+        raise TypeError(f"Unknown params for {strategy.__name__}: {sorted(unknown)}")
+    p.update(params)
+    return live(stake=stake, **p)
+
+
+class LiveRunner:
+    """Drives a live strategy from a feed and routes its orders to a broker."""
+
+    def __init__(self, strategy, feed, broker=None, recorder=None):
+        """
+        :param strategy: Live strategy (see live_strategy)
+        :param feed: Async iterable of Bar
+        :param broker: Broker with async submit(size, bar) and on_bar(bar); defaults to a PaperBroker
+        :param recorder: EventRecorder for bar snapshots (recorded at debug level)
+        """
+        self.strategy = strategy
+        self.feed = feed
+        self.broker = broker or PaperBroker()
+        self.recorder = recorder or NULL_RECORDER
+        self.bars = 0
+        self.orders = 0
+        self.max_queue = 0
+        self.tick_to_signal = LatencyHistogram('tick-to-signal')
+        self.signal_to_order = LatencyHistogram('signal-to-order')
+
+    async def _pump(self, queue):
+        # Unbounded on purpose: a live feed does not slow down for us, and a
+        # backlog shows up as tick-to-signal latency instead of being hidden
+        try:
+            async for bar in self.feed:
+                bar.received = time.perf_counter_ns()
+                queue.put_nowait(bar)
+        finally:
+            queue.put_nowait(None)
+
+    async def on_bar(self, bar):
+        if self.recorder.debug:
+            self.recorder.bar(epoch(bar.time), bar.open, bar.high, bar.low, bar.close, bar.volume)
+        self.broker.on_bar(bar)
+        size = self.strategy.on_bar(bar, self.broker.position)
+        signal = time.perf_counter_ns()
+        self.tick_to_signal.record(signal - bar.received)
+        self.bars += 1
+        if size:
+            await self.broker.submit(size, bar)
+            self.signal_to_order.record(time.perf_counter_ns() - signal)
+            self.orders += 1
+
+    async def run(self):
+        """
+        Processes bars until the feed ends.
+
+        :return: The broker
+        """
+        queue = asyncio.Queue()
+        pump = asyncio.create_task(self._pump(queue))
+        try:
+            while (bar := await queue.get()) is not None:
+                self.max_queue = max(self.max_queue, queue.qsize() + 1)
+                await self.on_bar(bar)
+        finally:
+            if not pump.done():
+                pump.cancel()
+        await pump  # re-raises a feed error
+        logging.info("Live run done: %d bars, %d orders, %s; %s", self.bars, self.orders,
+                     self.tick_to_signal, self.signal_to_order)
+        return self.broker
+
+
+def run_paper(strategy, path='data/crypto/BTC_USD_data.csv', speed=None, cash=10000.0, stake=1, recorder=None,
+              **params):
+    """
+    Paper trades a strategy against a replay of an OHLCV CSV.
+
+    :param strategy: Strategy class (e.g. MomentumStrategy)
+    :param path: OHLCV CSV to replay
+    :param speed: Clock acceleration for ReplayFeed; None replays as fast as possible
+    :param cash: Starting cash
+    :param stake: Order size
+    :param recorder: EventRecorder for bars, signals, orders and fills
+    :param params: Strategy params
+    :return: The finished LiveRunner (broker, latency histograms)
+    """
+    runner = LiveRunner(live_strategy(strategy, stake, recorder=recorder, **params), ReplayFeed.from_csv(path, speed),
+                        PaperBroker(cash, recorder), recorder)
+    asyncio.run(runner.run())
+    return runner
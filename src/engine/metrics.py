@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+# Performance metrics from plain arrays, for any engine (backtrader through
+# the EquityCurve analyzer and Transactions, run_vectorized, the live paper
+# broker).
+#
+# compute_metrics takes one run (1-D arrays) or a batch of runs stacked into
+# 2-D arrays (one row per run, trades padded with NaN, see pad_trades) and
+# computes everything with array operations along the last axis, so ranking
+# thousands of sweep results costs a handful of NumPy calls rather than a
+# Python loop per run.
+
+METRICS = ('total_return_pct', 'annual_return_pct', 'sharpe', 'sortino', 'calmar', 'max_drawdown',
+           'max_drawdown_len', 'trades', 'win_rate', 'profit_factor', 'exposure', 'turnover')
+
+# Metrics where a smaller value is the better result
+LOWER_IS_BETTER = ('max_drawdown', 'max_drawdown_len')
+
+
+def bars_per_year(index, default=252):
+    """
+    Bars per year of a DatetimeIndex, for annualising: about 252 for daily
+    stock bars, 365 for daily crypto bars, 52 for weekly bars.
+    """
+    if len(index) < 2:
+        return default
+    years = (index[-1] - index[0]).total_seconds() / (365.25 * 86400)
+    return (len(index) - 1) / years if years > 0 else default
+
+
+def trade_pnl(fills):
+    """
+    Profit of every closed trade in a list of fills.
+
+    A trade opens when the position leaves zero and closes when it returns to
+    zero; a fill that flips the position closes the trade at its price and
+    opens the next one, as backtrader's TradeAnalyzer counts them.
+
+    :param fills: (bar or time, signed size, price) tuples in execution order
+    :return: float64 array of gross P&L per closed trade
+    """
+    pnl = []
+    position, flow = 0, 0.0
+    for _, size, price in fills:
+        if position and (position > 0) != (position + size > 0) and position + size != 0:
+            # Flip: close the current trade at this price, open the rest
+            flow -= position * -price
+            pnl.append(flow)
+            size += position
+            position, flow = 0, 0.0
+        position += size
+        flow -= size * price
+        if position == 0:
+            pnl.append(flow)
+            flow = 0.0
+    return np.asarray(pnl, dtype=np.float64)
+
+
+def fill_arrays(fills, n, index=None):
+    """
+    Per-bar position and traded notional from a list of fills.
+
+    :param fills: (bar, size, price) tuples; bar is a bar number, or a timestamp when index is given
+    :param n: Number of bars
+    :param index: DatetimeIndex of the bars, to place timestamped fills (backtrader Transactions)
+    :return: (position held at the close of every bar, absolute traded value per bar)
+    """
+    traded = np.zeros(n)
+    change = np.zeros(n)
+    if fills:
+        bars, sizes, prices = (np.asarray(column) for column in zip(*fills))
+        if index is not None:
+            # Nearest, because backtrader's float dates round sub-millisecond timestamps
+            bars = pd.DatetimeIndex(index).get_indexer(pd.DatetimeIndex(bars), method='nearest')
+        bars = bars.astype(np.int64)
+        sizes = sizes.astype(np.float64)
+        np.add.at(change, bars, sizes)
+        np.add.at(traded, bars, np.abs(sizes * prices.astype(np.float64)))
+    return np.cumsum(change), traded
+
+
+def pad_trades(trades):
+    """Stacks per-run trade P&L arrays of different lengths into a NaN-padded 2-D array."""
+    width = max((len(t) for t in trades), default=0)
+    out = np.full((len(trades), width), np.nan)
+    for row, t in enumerate(trades):
+        out[row, :len(t)] = t
+    return out
+
+
+def compute_metrics(equity, trades=None, position=None, traded=None, periods_per_year=252, risk_free=0.0):
+    """
+    Computes the standard performance metrics of one run or a batch of runs.
+
+    :param equity: Portfolio value at every bar, shape (bars,) or (runs, bars)
+    :param trades: Closed-trade P&L, shape (trades,) or (runs, max trades) padded with NaN
+    :param position: Position held at every bar, same shape as equity (for exposure)
+    :param traded: Absolute traded value at every bar, same shape as equity (for turnover)
+    :param periods_per_year: Bars per year, for annualising (252 for daily stocks, 365 for daily crypto)
+    :param risk_free: Annual risk-free rate as a fraction
+    :return: Dict of metric name to a float (1-D input) or an array with one value per run. Returns
+             and drawdown are percentages; exposure is the percentage of bars in the market and turnover
+             the traded value over the average portfolio value
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    single = equity.ndim == 1
+    equity = np.atleast_2d(equity)
+    runs, bars = equity.shape
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = equity[:, 1:] / equity[:, :-1] - 1.0
+        excess = returns - risk_free / periods_per_year
+        mean = excess.mean(axis=1) if bars > 1 else np.full(runs, np.nan)
+        std = returns.std(axis=1, ddof=1) if bars > 2 else np.full(runs, np.nan)
+        downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2, axis=1)) if bars > 1 else np.full(runs, np.nan)
+        scale = np.sqrt(periods_per_year)
+        sharpe = np.where(std > 0, mean / std * scale, np.nan)
+        sortino = np.where(downside > 0, mean / downside * scale, np.nan)
+
+        growth = equity[:, -1] / equity[:, 0]
+        total_return = (growth - 1.0) * 100
+        years = (bars - 1) / periods_per_year
+        annual_return = (np.power(growth, 1.0 / years) - 1.0) * 100 if years > 0 else np.full(runs, np.nan)
+
+        peak = np.maximum.accumulate(equity, axis=1)
+        drawdown = 1.0 - equity / peak
+        max_drawdown = drawdown.max(axis=1) * 100
+        calmar = np.where(max_drawdown > 0, annual_return / max_drawdown, np.nan)
+
+    # Longest stretch below the running peak: bars since the last bar at a peak
+    steps = np.arange(bars)
+    at_peak = np.where(equity >= peak, steps, 0)
+    max_drawdown_len = (steps - np.maximum.accumulate(at_peak, axis=1)).max(axis=1)
+
+    metrics = {
+        'total_return_pct': total_return,
+        'annual_return_pct': annual_return,
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'calmar': calmar,
+        'max_drawdown': max_drawdown,
+        'max_drawdown_len': max_drawdown_len,
+    }
+
+    if trades is not None:
+        trades = np.asarray(trades, dtype=np.float64).reshape(runs, -1)
+        closed = np.count_nonzero(~np.isnan(trades), axis=1)
+        won = np.count_nonzero(trades > 0, axis=1)
+        profit = np.where(trades > 0, trades, 0.0).sum(axis=1)
+        loss = -np.where(trades < 0, trades, 0.0).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            metrics['trades'] = closed
+            # Without closed trades both are undefined (NaN), so configs that never
+            # trade do not rank first; wins without a losing trade read as an
+            # infinite profit factor, as in run_backtest_with_metrics
+            metrics['win_rate'] = np.where(closed > 0, won / closed * 100, np.nan)
+            metrics['profit_factor'] = np.where(loss > 0, profit / loss, np.where(closed > 0, np.inf, np.nan))
+
+    if position is not None:
+        position = np.asarray(position, dtype=np.float64).reshape(runs, bars)
+        metrics['exposure'] = np.count_nonzero(position, axis=1) / bars * 100
+    if traded is not None:
+        traded = np.asarray(traded, dtype=np.float64).reshape(runs, bars)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            metrics['turnover'] = traded.sum(axis=1) / equity.mean(axis=1)
+
+    if single:
+        return {name: value[0].item() for name, value in metrics.items()}
+    return metrics
+
+
+def vector_metrics(results, periods_per_year=252, risk_free=0.0):
+    """
+    Metrics of one VectorResult (see run_vectorized) or of a list of them in one batch.
+
+    :return: Dict of metric name to a float, or to an array with one value per result
+    """
+    single = not isinstance(results, (list, tuple))
+    results = [results] if single else list(results)
+    equity = np.stack([result.value for result in results])
+    columns = [fill_arrays(result.fills, equity.shape[1]) for result in results]
+    metrics = compute_metrics(equity, pad_trades([trade_pnl(result.fills) for result in results]),
+                              np.stack([position for position, _ in columns]),
+                              np.stack([traded for _, traded in columns]), periods_per_year, risk_free)
+    return {name: value[0].item() for name, value in metrics.items()} if single else metrics
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import logging
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.engine.metrics import bars_per_year, vector_metrics
+from src.engine.sweep import param_grid
+from src.engine.vectorized import Indicators, run_vectorized
+
+# Adaptive param search: a cheaper alternative to sweeping a whole grid.
+#
+# Configurations are sampled from a discrete search space (the same
+# name -> values mapping a sweep takes), first at random and then with a
+# Tree-structured Parzen Estimator (TPE): completed trials are split into the
+# best fraction and the rest, and the sampler proposes the untried config
+# whose values are most frequent among the best relative to the rest.
+#
+# Every trial runs on growing prefixes of the history, the rungs of
+# successive halving: bars/eta**(rungs-1), ..., bars/eta, bars. After each
+# rung the trial reports the objective of its partial equity curve and is
+# pruned unless it ranks in the top 1/eta of the trials that reached that
+# rung, or when its drawdown so far exceeds max_drawdown. Most losing
+# configs therefore cost a fraction of the history. As in Hyperband, some
+# trials start at a later rung (see Study.brackets), and a config pruned at
+# rung r can be sampled again by such a trial, so a slow starter that only
+# pays off over the full history still gets found. The vectorized kernels
+# are causal, so a prefix run is exactly the start of the full run, and all
+# trials share one Indicators object, so each indicator period is computed
+# once for the whole study.
+#
+# A study with a path is stored as JSON lines: a header describing the
+# study and its data (first and last bar, and a hash of the closes), then one
+# line per finished trial. Reopening the file resumes the study, unless it
+# was run on other settings or other bars; trial n draws from a generator
+# seeded with (seed, n), so a resumed study proposes the same trials as one
+# that was never interrupted. A trial line cut short by a crash mid-append is
+# dropped on load, and that trial runs again.
+
+# TPE: fraction of trials counted as good, and the pseudo-count every value
+# starts with, which keeps rarely sampled values in play
+GOOD_FRACTION = 0.25
+PRIOR = 3.0
+
+STUDY_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data/studies'))
+
+
+class Study:
+    """
+    Adaptive search of a strategy's params with successive-halving pruning.
+
+    :param strategy: Strategy class with a vectorized kernel (see run_vectorized)
+    :param data_df: OHLCV DataFrame indexed by datetime
+    :param space: Mapping of param name to a list of candidate values
+    :param path: JSON-lines file holding the study; an existing file is resumed. None keeps it in memory
+    :param objective: compute_metrics name to maximize
+    :param eta: Halving rate: each rung keeps the top 1/eta of its trials and runs eta times more bars
+    :param rungs: Number of history prefixes a trial can run on, the last being the full history
+    :param startup: Random trials before the TPE sampler takes over
+    :param max_drawdown: Prune any trial whose drawdown so far exceeds this percentage
+    :param cash: Starting cash of every run
+    :param seed: Seed of the sampler
+    :param sentiment: Sentiment for EnhancedStrategy, a score or one value per bar
+    """
+
+    def __init__(self, strategy, data_df, space, path=None, objective='sharpe', eta=3, rungs=3, startup=10,
+                 max_drawdown=None, cash=10000.0, seed=0, sentiment=None):
+        self.strategy = strategy
+        self.space = {name: list(values) for name, values in space.items()}
+        self.path = path
+        self.objective = objective
+        self.eta = eta
+        self.startup = startup
+        self.max_drawdown = max_drawdown
+        self.cash = float(cash)
+        self.seed = seed
+
+        self.arrays = {col: data_df[col].to_numpy(dtype=np.float64) for col in ('open', 'high', 'low', 'close')}
+        if sentiment is None:
+            sentiment = data_df['sentiment'].to_numpy(dtype=np.float64) if 'sentiment' in data_df else 0.0
+        self.sentiment = np.broadcast_to(np.asarray(sentiment, dtype=np.float64), self.arrays['close'].shape)
+        self.indicators = Indicators(self.arrays['close'])
+        self.periods = bars_per_year(pd.DatetimeIndex(data_df.index))
+        bars = len(data_df)
+        self.rungs = sorted({max(1, math.ceil(bars / eta ** k)) for k in range(rungs)})
+        # Hyperband brackets: bracket b starts its trials at rung b, with
+        # eta**(rungs-1-b) trials in it per cycle, so most trials start on the
+        # shortest prefix but some skip the rungs a slow starter would fail
+        top = len(self.rungs) - 1
+        self.brackets = [b for b in range(top + 1) for _ in range(eta ** (top - b))]
+
+        self.trials = []
+        self.rung_scores = [[] for _ in self.rungs]
+        self._reached = {}
+        header = {'strategy': strategy.__name__, 'space': self.space, 'objective': objective, 'bars': bars,
+                  'rungs': self.rungs, 'eta': eta, 'max_drawdown': max_drawdown, 'cash': self.cash, 'seed': seed,
+                  'data': data_fingerprint(data_df)}
+        if path is not None:
+            self._load(header)
+
+    def _load(self, header):
+        raw = b''
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        # Every line is written with its newline in one go, so anything after
+        # the last newline is a line a crash cut short
+        complete = raw[:raw.rfind(b'\n') + 1]
+        if len(complete) < len(raw):
+            logging.warning("Dropping a partly written line at the end of %s", self.path)
+            with open(self.path, 'r+b') as f:
+                f.truncate(len(complete))
+        if not complete:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'w') as f:
+                f.write(json.dumps(header) + '\n')
+            return
+        lines = [json.loads(line) for line in complete.decode().splitlines() if line.strip()]
+        # Round-trip the header through JSON so tuples and lists compare equal
+        if not lines or lines[0] != json.loads(json.dumps(header)):
+            raise ValueError(f"{self.path} holds a different study")
+        for trial in lines[1:]:
+            self._add(trial)
+
+    def _add(self, trial):
+        self.trials.append(trial)
+        # Last rung reached; a pruned config may run again in a bracket that starts past it
+        self._reached[self._key(trial['params'])] = len(trial['scores']) - 1
+        for rung, score in enumerate(trial['scores']):
+            if score is not None:
+                self.rung_scores[rung].append(score)
+
+    def _done(self, bracket):
+        """Number of configs no trial in ``bracket`` may run."""
+        return sum(1 for rung in self._reached.values() if rung >= bracket)
+
+    def _open(self, params, bracket):
+        """True if ``params`` has not been run, or was pruned before rung ``bracket``."""
+        return self._reached.get(self._key(params), -1) < bracket
+
+    def _key(self, params):
+        return tuple(params[name] for name in self.space)
+
+    @property
+    def size(self):
+        """Number of configs in the search space."""
+        return math.prod(len(values) for values in self.space.values())
+
+    @property
+    def bar_evaluations(self):
+        """Bars run by all trials so far; a full grid costs size * bars."""
+        return sum(trial['bars'] for trial in self.trials)
+
+    @property
+    def best(self):
+        """The completed trial with the highest objective, or None."""
+        complete = [trial for trial in self.trials if trial['state'] == 'complete' and not _bad(trial['value'])]
+        return max(complete, key=lambda trial: trial['value'], default=None)
+
+    def trials_frame(self):
+        """Trials as a DataFrame, one column per param."""
+        rows = [dict(trial['params'], number=trial['number'], state=trial['state'], value=trial['value'],
+                     rung=len(trial['scores']) - 1, bars=trial['bars']) for trial in self.trials]
+        return pd.DataFrame(rows)
+
+    def _sample(self, rng, bracket):
+        """
+        Next config to run in ``bracket``: random during startup, TPE afterwards.
+
+        :return: (params, bracket), moving to the full-history bracket once every config has had a
+                 chance in ``bracket``; None once every config has run on the full history
+        """
+        top = len(self.rungs) - 1
+        if self._done(bracket) >= self.size:
+            if self._done(top) >= self.size:
+                return None
+            bracket = top
+
+        best, best_score = None, -np.inf
+        if len(self.trials) < self.startup:
+            for _ in range(64):
+                params = {name: values[rng.integers(len(values))] for name, values in self.space.items()}
+                if self._open(params, bracket):
+                    best = params
+                    break
+        else:
+            # Rank by the furthest rung reached, then by the score there
+            ranked = sorted(self.trials, key=lambda trial: (len(trial['scores']), _score(trial['scores'][-1])),
+                            reverse=True)
+            good = ranked[:max(1, math.ceil(GOOD_FRACTION * len(ranked)))]
+            bad = ranked[len(good):]
+            weights = {}
+            for name, values in self.space.items():
+                good_counts = _counts(good, name, values)
+                bad_counts = _counts(bad, name, values)
+                weights[name] = (good_counts / good_counts.sum(), bad_counts / bad_counts.sum())
+
+            for _ in range(64):
+                params, score = {}, 0.0
+                for name, values in self.space.items():
+                    good_p, bad_p = weights[name]
+                    i = rng.choice(len(values), p=good_p)
+                    params[name] = values[i]
+                    score += math.log(good_p[i]) - math.log(bad_p[i])
+                if score > best_score and self._open(params, bracket):
+                    best, best_score = params, score
+        if best is None:
+            # Every draw was taken: fall back to the first open config
+            best = next(params for params in param_grid(self.space) if self._open(params, bracket))
+        return best, bracket
+
+    def _promote(self, rung, score):
+        """True if a trial scoring ``score`` at ``rung`` is in the top 1/eta of that rung, itself included."""
+        scores = self.rung_scores[rung] + [score]
+        if len(scores) < self.eta:
+            return True
+        keep = max(1, len(scores) // self.eta)
+        return _score(score) >= sorted((_score(s) for s in scores), reverse=True)[keep - 1]
+
+    def _run(self, params, bracket):
+        scores, bars, state = [None] * bracket, 0, 'complete'
+        for rung, end in enumerate(self.rungs[bracket:], bracket):
+            arrays = {col: values[:end] for col, values in self.arrays.items()}
+            result = run_vectorized(self.strategy, arrays, self.cash, sentiment=self.sentiment[:end],
+                                    indicators=self.indicators.view(0, end), **params)
+            bars += end
+            metrics = vector_metrics(result, self.periods)
+            score = metrics[self.objective]
+            scores.append(score)
+            if rung == len(self.rungs) - 1:
+                break
+            if (self.max_drawdown is not None and metrics['max_drawdown'] > self.max_drawdown) \
+                    or not self._promote(rung, score):
+                state = 'pruned'
+                break
+        return {'number': len(self.trials), 'params': params, 'bracket': bracket, 'state': state,
+                'value': scores[-1] if state == 'complete' else None, 'scores': scores, 'bars': bars}
+
+    def optimize(self, trials):
+        """
+        Runs up to ``trials`` more trials, stopping early once every config has run on the full history.
+
+        :return: The best completed trial (see best)
+        """
+        for _ in range(trials):
+            number = len(self.trials)
+            sample = self._sample(np.random.default_rng([self.seed, number]),
+                                  self.brackets[number % len(self.brackets)])
+            if sample is None:
+                break
+            trial = self._run(*sample)
+            self._add(trial)
+            if self.path is not None:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(trial) + '\n')
+        return self.best
+
+
+def data_fingerprint(data_df):
+    """First and last bar time and a hash of the closes, identifying the data a study ran on."""
+    index = pd.DatetimeIndex(data_df.index)
+    close = np.ascontiguousarray(data_df['close'].to_numpy(dtype=np.float64))
+    return {'first': str(index[0]) if len(index) else None, 'last': str(index[-1]) if len(index) else None,
+            'close_sha256': hashlib.sha256(close.tobytes()).hexdigest()}
+
+
+def _bad(value):
+    return value is None or not math.isfinite(value)
+
+
+def _score(value):
+    """Sort key of an objective value: NaN (no trades, flat equity) ranks last."""
+    return -math.inf if value is None or math.isnan(value) else value
+
+
+def _counts(trials, name, values):
+    """Smoothed frequency of every value of param ``name`` among ``trials``."""
+    counts = np.full(len(values), PRIOR)
+    index = {value: i for i, value in enumerate(values)}
+    for trial in trials:
+        counts[index[trial['params'][name]]] += 1
+    return counts
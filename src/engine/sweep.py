@@ -0,0 +1,163 @@
+import itertools
+import os
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.engine.metrics import bars_per_year, compute_metrics, fill_arrays, trade_pnl, vector_metrics
+from src.engine.vectorized import run_vectorized
+
+# Parameter sweeps over one OHLCV dataset.
+#
+# The dataset is copied once into a shared-memory block; worker processes map
+# it as NumPy arrays in their initializer, so each task only pickles its own
+# param dict and its result row.
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Per-worker state filled in by _attach
+_worker = {}
+
+
+def param_grid(grid):
+    """
+    Expands a grid into a list of param dicts.
+
+    :param grid: Mapping of param name to a list of values
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+class SharedOHLCV:
+    """OHLCV columns and a datetime index held in a named shared-memory block."""
+
+    def __init__(self, data_df):
+        columns = [np.asarray(data_df[col], dtype=np.float64) if col in data_df else np.zeros(len(data_df)) for col in COLUMNS]
+        index = pd.DatetimeIndex(data_df.index)
+        self.tz = index.tz
+        self.shape = (len(COLUMNS) + 1, len(data_df))
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * self.shape[0] * self.shape[1]))
+        block = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+        block[:-1] = columns
+        block[-1] = index.asi8.view(np.float64)  # int64 nanoseconds, stored bit-for-bit
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def arrays(self):
+        """Column views over the block, plus the rebuilt 'index'."""
+        return _views(self.shm, self.shape, self.tz)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _views(shm, shape, tz):
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    arrays = dict(zip(COLUMNS, block[:-1]))
+    index = pd.DatetimeIndex(block[-1].view(np.int64), tz='UTC' if tz else None)
+    arrays['index'] = index.tz_convert(tz) if tz else index
+    return arrays
+
+
+def attach(name, shape, tz=None):
+    """
+    Maps a SharedOHLCV block created by another process without copying it.
+
+    Pool workers share their parent's resource tracker, so the block is still
+    unlinked exactly once, by SharedOHLCV.close.
+
+    :return: (shm, arrays) where arrays maps column name to a NumPy view plus 'index'
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, _views(shm, shape, tz)
+
+
+def _attach(name, shape, tz, strategy, engine, cash, metrics):
+    _worker['shm'], _worker['arrays'] = attach(name, shape, tz)
+    _worker.update(strategy=strategy, engine=engine, cash=cash, metrics=metrics)
+
+
+def _run(params):
+    strategy = _worker['strategy']
+    arrays = _worker['arrays']
+    metrics = {}
+    if _worker['engine'] == 'backtrader':
+        import backtrader as bt
+        from src.engine.batch import EquityCurve
+        from src.engine.cerebro import run_cerebro, transactions
+        if 'frame' not in _worker:
+            _worker['frame'] = pd.DataFrame({col: arrays[col] for col in COLUMNS}, index=arrays['index'])
+        result, final_value = run_cerebro(strategy, _worker['frame'], _worker['cash'],
+                                          analyzers={'transactions': bt.analyzers.Transactions, 'equity': EquityCurve},
+                                          **params)
+        fills = transactions(result)
+        if _worker['metrics']:
+            position, traded = fill_arrays(fills, len(arrays['close']), arrays['index'])
+            metrics = compute_metrics(result.analyzers.equity.get_analysis(), trade_pnl(fills), position, traded,
+                                      bars_per_year(arrays['index']))
+        fills = len(fills)
+    else:
+        result = run_vectorized(strategy, arrays, _worker['cash'], **params)
+        final_value, fills = result.final_value, len(result.fills)
+        if _worker['metrics']:
+            metrics = vector_metrics(result, bars_per_year(arrays['index']))
+
+    cash = _worker['cash']
+    return dict(params, final_value=final_value, return_pct=(final_value / cash - 1) * 100, fills=fills, **metrics)
+
+
+def iter_sweep(strategy, data_df, grid, processes=None, cash=10000.0, engine='vectorized', chunksize=None,
+               metrics=False):
+    """
+    Runs every combination of ``grid`` and yields result rows as they finish.
+
+    :param strategy: Strategy class
+    :param data_df: OHLCV DataFrame indexed by datetime
+    :param grid: Mapping of param name to a list of values, or a list of param dicts
+    :param processes: Worker processes (default: os.cpu_count())
+    :param cash: Starting cash for every run
+    :param engine: 'vectorized' or 'backtrader'
+    :param chunksize: Param dicts sent to a worker at a time
+    :param metrics: Add Sharpe, drawdown, win rate etc. (see src/engine/metrics.py) to every row
+    """
+    combos = param_grid(grid) if isinstance(grid, dict) else list(grid)
+    processes = processes or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(combos) // (processes * 4))
+
+    with SharedOHLCV(data_df) as shared:
+        initargs = (shared.name, shared.shape, shared.tz, strategy, engine, cash, metrics)
+        if processes == 1:
+            _worker.update(arrays=shared.arrays(), strategy=strategy, engine=engine, cash=cash, metrics=metrics)
+            try:
+                for params in combos:
+                    yield _run(params)
+            finally:
+                _worker.clear()
+            return
+
+        with Pool(processes, initializer=_attach, initargs=initargs) as pool:
+            yield from pool.imap_unordered(_run, combos, chunksize=chunksize)
+
+
+def sweep(strategy, data_df, grid, sort_by='final_value', ascending=False, **kwargs):
+    """
+    Runs a parameter sweep and returns the results as a sorted DataFrame.
+
+    Takes the same arguments as iter_sweep.
+    """
+    table = pd.DataFrame(list(iter_sweep(strategy, data_df, grid, **kwargs)))
+    if table.empty:
+        return table
+    return table.sort_values(sort_by, ascending=ascending, ignore_index=True)
@@ -0,0 +1,250 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.indicators.batch import rsi, sma
+
+# Array-at-a-time execution engine for our backtrader strategies.
+#
+# Indicators are computed over the whole history up front; the strategy state
+# machine then jumps from one signal bar to the next instead of visiting every
+# bar. Order handling mirrors backtrader's default BackBroker for what our
+# strategies use: fixed-stake market orders, no commission, filled at the next
+# bar's open, rejected (Margin) when a long entry cannot be paid for, and
+# shorts credited to cash (``shortcash``).
+#
+# Indicator arrays come from an Indicators object, which memoizes them per
+# (indicator, period) and can hand out views of a sub-range of bars. Runs that
+# share one (a sweep over thresholds, the folds of a walk-forward) compute each
+# indicator once over the full history and slice it.
+
+
+@dataclass
+class VectorResult:
+    fills: list            # (bar, size, price) for every executed order
+    value: np.ndarray      # portfolio value at the close of every bar
+    final_value: float
+    cash: float
+    position: int
+    index: object = None   # index of the source DataFrame, if any
+
+    def transactions(self):
+        """Fills as (timestamp, size, price), comparable to bt.analyzers.Transactions."""
+        if self.index is None:
+            return list(self.fills)
+        return [(self.index[bar], size, price) for bar, size, price in self.fills]
+
+
+class Indicators:
+    """
+    Indicator arrays of one close series, computed on first use and memoized.
+
+    view(lo, hi) gives the same indicators restricted to bars lo:hi without
+    recomputing them. The bars before lo act as warm-up history, so a window
+    starting mid-history has valid indicators from its first bar.
+    """
+
+    __slots__ = ('close', 'lo', 'hi', 'cache')
+
+    def __init__(self, close, lo=0, hi=None, cache=None):
+        self.close = np.asarray(close, dtype=np.float64)
+        self.lo = lo
+        self.hi = len(self.close) if hi is None else hi
+        self.cache = {} if cache is None else cache
+
+    def __len__(self):
+        return self.hi - self.lo
+
+    def view(self, lo, hi):
+        """Indicators of bars lo:hi of this view, sharing the memoized arrays."""
+        return Indicators(self.close, self.lo + lo, self.lo + hi, self.cache)
+
+    def first(self, bar):
+        """Position in this view of the full-history bar ``bar`` (a warm-up length), at least 0."""
+        return max(0, bar - self.lo)
+
+    def _get(self, name, func, period):
+        values = self.cache.get((name, period))
+        if values is None:
+            values = self.cache[name, period] = func(self.close, period)
+        return values[self.lo:self.hi]
+
+    def sma(self, period):
+        return self._get('sma', sma, period)
+
+    def rsi(self, period):
+        return self._get('rsi', rsi, period)
+
+
+class _Book:
+    """Cash and position of a single data feed."""
+
+    __slots__ = ('open', 'close', 'cash', 'position', 'fills')
+
+    def __init__(self, open_, close, cash):
+        self.open = open_
+        self.close = close
+        self.cash = cash
+        self.position = 0
+        self.fills = []
+
+    def submit(self, bar, size):
+        """
+        Places a market order on ``bar``, which fills at the next bar's open.
+
+        :param bar: Bar on which the strategy issued the order
+        :param size: Signed order size
+        :return: True if the order was executed
+        """
+        fill_bar = bar + 1
+        if fill_bar >= len(self.close):
+            return False  # created on the last bar, never executed
+
+        price = self.open[fill_bar]
+        if size > 0 and self.position >= 0:
+            # Opening a long is checked against cash twice: at acceptance with
+            # the creation close and at execution with the fill price
+            if self.cash - size * self.close[bar] < 0.0 or self.cash - size * price < 0.0:
+                return False
+
+        self.cash -= size * price
+        self.position += size
+        self.fills.append((fill_bar, size, price))
+        return True
+
+
+def _next_signal(bars, start):
+    """First bar in the sorted ``bars`` array that is >= start, or None."""
+    i = np.searchsorted(bars, start)
+    return int(bars[i]) if i < len(bars) else None
+
+
+def _scan_exit(close, start, stop_price, target_price):
+    """First bar >= start whose close is at/below stop_price or at/above target_price."""
+    n = len(close)
+    step = 64
+    while start < n:
+        end = min(n, start + step)
+        window = close[start:end]
+        hits = np.flatnonzero((window <= stop_price) | (window >= target_price))
+        if len(hits):
+            return start + int(hits[0])
+        start = end
+        step *= 2
+    return None
+
+
+def _mean_reversion(o, h, l, c, p, book, stake, sentiment, ind):
+    period = p['period']
+    start = ind.first(period - 1)
+    avg = ind.sma(period)
+
+    # MeanReversionStrategy sets self.order and never clears it, so only its
+    # first order is ever placed; the stop-loss/take-profit branch is unreachable
+    entries = np.flatnonzero(c[start:] < avg[start:])
+    if len(entries):
+        book.submit(start + int(entries[0]), stake)
+
+
+def _momentum(o, h, l, c, p, book, stake, sentiment, ind):
+    start = ind.first(p['rsi_period'])
+    r = ind.rsi(p['rsi_period'])
+    with np.errstate(invalid='ignore'):
+        oversold = r < p['rsi_oversold']
+        overbought = r > p['rsi_overbought']
+    signals = np.flatnonzero(oversold | overbought)
+    signals = signals[signals >= start]
+
+    buy_price = None
+    bar = start
+    while bar < len(c):
+        if book.position:
+            if buy_price is None:
+                break  # no exit rule applies any more, nothing else is placed
+            bar = _scan_exit(c, bar, (1 - p['stop_loss']) * buy_price, (1 + p['take_profit']) * buy_price)
+            if bar is None:
+                break
+            book.submit(bar, -stake)
+            buy_price = None
+        else:
+            bar = _next_signal(signals, bar)
+            if bar is None:
+                break
+            if oversold[bar]:
+                # The strategy records the buy price even if the order is rejected
+                book.submit(bar, stake)
+                buy_price = c[bar]
+            else:
+                book.submit(bar, -stake)
+        bar += 1
+
+
+def _enhanced(o, h, l, c, p, book, stake, sentiment, ind):
+    start = ind.first(max(p['rsi_period'], p['atr_period']))
+    r = ind.rsi(p['rsi_period'])
+    sentiment = np.broadcast_to(np.asarray(sentiment, dtype=np.float64), c.shape)
+
+    # Like MeanReversionStrategy, EnhancedStrategy never clears self.order, so
+    # the ATR exits and the reinvestment check are never reached
+    with np.errstate(invalid='ignore'):
+        entries = np.flatnonzero((r[start:] < p['rsi_lower']) & (sentiment[start:] > p['sentiment_threshold']))
+    if len(entries):
+        book.submit(start + int(entries[0]), stake)
+
+
+KERNELS = {
+    'MeanReversionStrategy': _mean_reversion,
+    'MomentumStrategy': _momentum,
+    'EnhancedStrategy': _enhanced,
+}
+
+
+def _value_curve(fills, close, cash):
+    n = len(close)
+    position = np.zeros(n)
+    spent = np.zeros(n)
+    for bar, size, price in fills:
+        position[bar] += size
+        spent[bar] += size * price
+    return cash - np.cumsum(spent) + np.cumsum(position) * close
+
+
+def run_vectorized(strategy, data_df, cash=10000.0, stake=1, sentiment=None, indicators=None, **params):
+    """
+    Runs a strategy over a whole OHLC DataFrame without backtrader.
+
+    :param strategy: Strategy class (e.g. MomentumStrategy); its params are the defaults
+    :param data_df: DataFrame (or dict of arrays) with open, high, low and close columns
+    :param cash: Starting cash, as in cerebro.broker.setcash
+    :param stake: Order size, as in bt.sizers.FixedSize
+    :param sentiment: Sentiment used by EnhancedStrategy, a score or one value per bar;
+                      defaults to the frame's 'sentiment' column (see build_feature_frame), else 0
+    :param indicators: Indicators for the same bars, to reuse indicator arrays across runs
+                       (e.g. a view of a longer history); computed from the close column by default
+    :param params: Overrides for the strategy params
+    :return: VectorResult
+    """
+    kernel = KERNELS.get(strategy.__name__)
+    if kernel is None:
+        raise ValueError(f"No vectorized kernel for {strategy.__name__}")
+
+    p = dict(strategy.params._getitems())
+    unknown = set(params) - set(p)
+    if unknown:
+        raise TypeError(f"Unknown params for {strategy.__name__}: {sorted(unknown)}")
+    p.update(params)
+
+    o, h, l, c = (np.asarray(data_df[col], dtype=np.float64) for col in ('open', 'high', 'low', 'close'))
+    if sentiment is None:
+        columns = data_df.keys()
+        sentiment = np.asarray(data_df['sentiment'], dtype=np.float64) if 'sentiment' in columns else 0.0
+    if indicators is None:
+        indicators = Indicators(c)
+    elif len(indicators) != len(c):
+        raise ValueError(f"Indicators cover {len(indicators)} bars, data has {len(c)}")
+    book = _Book(o, c, float(cash))
+    kernel(o, h, l, c, p, book, stake, sentiment, indicators)
+
+    value = _value_curve(book.fills, c, float(cash))
+    final_value = book.cash + book.position * c[-1] if len(c) else book.cash
+    return VectorResult(book.fills, value, final_value, book.cash, book.position, getattr(data_df, 'index', None))
@@ -0,0 +1,160 @@
+import os
+from dataclasses import dataclass
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from src.engine.metrics import (LOWER_IS_BETTER, METRICS, bars_per_year, compute_metrics, fill_arrays, trade_pnl,
+                                vector_metrics)
+from src.engine.sweep import SharedOHLCV, attach, param_grid
+from src.engine.vectorized import Indicators, run_vectorized
+
+# Walk-forward optimization: tune on a train window, score the best params on
+# the test window that follows it, then move both windows forward by the test
+# length. Test windows tile the history after the first train window, so the
+# out-of-sample (OOS) equity curves of the folds stitch into one curve that no
+# parameter choice has seen in advance.
+#
+# Folds run in worker processes over the dataset held in shared memory (see
+# sweep.py). Each worker keeps one Indicators object for the full history:
+# every RSI/SMA a fold or param combo asks for is computed once and sliced to
+# the fold's bars, so overlapping train windows never recompute indicators.
+# Every run uses the vectorized engine (run_vectorized).
+#
+# Each test window starts from the same cash; the stitched curve chains the
+# folds' returns, scaling every fold to start where the previous one ended.
+
+# Per-worker state filled in by _attach
+_worker = {}
+
+
+@dataclass
+class WalkForwardResult:
+    folds: pd.DataFrame    # one row per fold: windows, best params, train score, OOS metrics
+    equity: pd.Series      # stitched OOS portfolio value, indexed by bar time
+    metrics: dict          # compute_metrics of the stitched OOS run
+
+
+def walk_forward_windows(n, train, test, anchored=False):
+    """
+    Splits n bars into train/test windows.
+
+    :param n: Number of bars
+    :param train: Bars in the (first) train window
+    :param test: Bars in each test window; the last one may be shorter
+    :param anchored: Grow the train window from bar 0 instead of rolling it
+    :return: List of (train_start, train_end, test_start, test_end), ends exclusive
+    """
+    if train < 1 or test < 1:
+        raise ValueError("train and test must be at least one bar")
+    windows = []
+    for test_start in range(train, n, test):
+        windows.append((0 if anchored else test_start - train, test_start, test_start, min(n, test_start + test)))
+    return windows
+
+
+def _attach(name, shape, tz, sentiment, strategy, combos, objective, maximize, cash, periods):
+    _worker['shm'], arrays = attach(name, shape, tz)
+    _setup(arrays, sentiment, strategy, combos, objective, maximize, cash, periods)
+
+
+def _setup(arrays, sentiment, strategy, combos, objective, maximize, cash, periods):
+    _worker.update(arrays=arrays, indicators=Indicators(arrays['close']), strategy=strategy, combos=combos,
+                   objective=objective, maximize=maximize, cash=cash, periods=periods,
+                   sentiment=np.broadcast_to(np.asarray(sentiment, dtype=np.float64), arrays['close'].shape))
+
+
+def _slice(lo, hi):
+    arrays = {col: values[lo:hi] for col, values in _worker['arrays'].items() if col != 'index'}
+    return arrays, _worker['sentiment'][lo:hi], _worker['indicators'].view(lo, hi)
+
+
+def _fold(window):
+    fold, (train_start, train_end, test_start, test_end) = window
+    strategy, cash, periods = _worker['strategy'], _worker['cash'], _worker['periods']
+
+    arrays, sentiment, indicators = _slice(train_start, train_end)
+    results = [run_vectorized(strategy, arrays, cash, sentiment=sentiment, indicators=indicators, **params)
+               for params in _worker['combos']]
+    scores = np.atleast_1d(vector_metrics(results, periods)[_worker['objective']])
+    ranked = scores if _worker['maximize'] else -scores
+    best = int(np.argmax(np.nan_to_num(ranked, nan=-np.inf)))
+    params = _worker['combos'][best]
+
+    arrays, sentiment, indicators = _slice(test_start, test_end)
+    result = run_vectorized(strategy, arrays, cash, sentiment=sentiment, indicators=indicators, **params)
+    index = _worker['arrays']['index']
+    row = {
+        'fold': fold,
+        'train_start': index[train_start], 'train_end': index[train_end - 1],
+        'test_start': index[test_start], 'test_end': index[test_end - 1],
+        'params': params,
+        'train_score': float(scores[best]),
+    }
+    row.update(vector_metrics(result, periods))
+    return row, result.value, result.fills
+
+
+def walk_forward(strategy, data_df, grid, train, test, anchored=False, objective='sharpe', maximize=None,
+                 processes=None, cash=10000.0, sentiment=None):
+    """
+    Runs a walk-forward optimization of a strategy's params.
+
+    :param strategy: Strategy class with a vectorized kernel (see run_vectorized)
+    :param data_df: OHLCV DataFrame indexed by datetime
+    :param grid: Mapping of param name to a list of values, or a list of param dicts
+    :param train: Bars in the (first) train window
+    :param test: Bars in each test window
+    :param anchored: Grow the train window from the first bar instead of rolling it
+    :param objective: compute_metrics name optimized on each train window
+    :param maximize: Pick the params with the highest objective (True) or the lowest (False);
+                     default: lowest for the drawdown metrics in LOWER_IS_BETTER, else highest
+    :param processes: Worker processes (default: os.cpu_count())
+    :param cash: Starting cash of every train and test run
+    :param sentiment: Sentiment for EnhancedStrategy, a score or one value per bar;
+                      defaults to the frame's 'sentiment' column, else 0
+    :return: WalkForwardResult
+    """
+    if objective not in METRICS:
+        raise ValueError(f"Unknown objective {objective!r}, expected one of {', '.join(METRICS)}")
+    if maximize is None:
+        maximize = objective not in LOWER_IS_BETTER
+    combos = param_grid(grid) if isinstance(grid, dict) else list(grid)
+    windows = list(enumerate(walk_forward_windows(len(data_df), train, test, anchored)))
+    if not windows:
+        raise ValueError(f"{len(data_df)} bars leave no test window after {train} train bars")
+    if sentiment is None:
+        sentiment = data_df['sentiment'].to_numpy(dtype=np.float64) if 'sentiment' in data_df else 0.0
+    periods = bars_per_year(pd.DatetimeIndex(data_df.index))
+    processes = min(processes or os.cpu_count() or 1, len(windows))
+
+    with SharedOHLCV(data_df) as shared:
+        setup = (sentiment, strategy, combos, objective, maximize, float(cash), periods)
+        if processes == 1:
+            _setup(shared.arrays(), *setup)
+            try:
+                folds = [_fold(window) for window in windows]
+            finally:
+                _worker.clear()
+        else:
+            with Pool(processes, initializer=_attach, initargs=(shared.name, shared.shape, shared.tz) + setup) as pool:
+                folds = sorted(pool.imap_unordered(_fold, windows), key=lambda fold: fold[0]['fold'])
+
+    # Chain the folds: each OOS curve is scaled to start from the previous fold's final value
+    curves, trades, positions, traded = [], [], [], []
+    value = float(cash)
+    for _, curve, fills in folds:
+        scale = value / cash
+        position, notional = fill_arrays(fills, len(curve))
+        curves.append(curve * scale)
+        trades.append(trade_pnl(fills) * scale)
+        positions.append(position)
+        traded.append(notional * scale)
+        value = curves[-1][-1]
+
+    equity = np.concatenate(curves)
+    index = pd.DatetimeIndex(data_df.index)[windows[0][1][2]:]
+    metrics = compute_metrics(equity, np.concatenate(trades), np.concatenate(positions), np.concatenate(traded),
+                              periods)
+    return WalkForwardResult(pd.DataFrame([row for row, _, _ in folds]), pd.Series(equity, index=index), metrics)
@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Array versions of the backtrader indicators used by our strategies.
+# Every function returns a float64 array aligned with its input; bars that
+# backtrader would not have produced yet (before the indicator's minperiod)
+# are NaN.
+
+
+def _empty(n):
+    return np.full(n, np.nan)
+
+
+def sma(data, period):
+    """
+    Simple moving average, same as bt.indicators.SimpleMovingAverage.
+
+    :param data: 1-D array of prices
+    :param period: Window length
+    """
+    data = np.asarray(data, dtype=np.float64)
+    out = _empty(len(data))
+    if len(data) >= period:
+        out[period - 1:] = sliding_window_view(data, period).sum(axis=1) / period
+    return out
+
+
+def stddev(data, period):
+    """
+    Population standard deviation, same as bt.indicators.StandardDeviation
+    (including its default ``safepow`` handling of tiny negative variances).
+
+    :param data: 1-D array of prices
+    :param period: Window length
+    """
+    data = np.asarray(data, dtype=np.float64)
+    meansq = sma(data * data, period)
+    sqmean = sma(data, period) ** 2
+    return np.abs(meansq - sqmean) ** 0.5
+
+
+def smma(data, period, start=0):
+    """
+    Wilder's smoothed moving average, same as bt.indicators.SmoothedMovingAverage.
+
+    The recursion is inherently sequential, so it runs over a plain list in the
+    exact operation order backtrader uses; that keeps RSI and ATR bit-identical.
+
+    :param data: 1-D array of values
+    :param period: Smoothing period (alpha = 1 / period)
+    :param start: Index of the first valid input value
+    """
+    data = np.asarray(data, dtype=np.float64)
+    out = _empty(len(data))
+    first = start + period - 1
+    if len(data) <= first:
+        return out
+
+    alpha = 1.0 / period
+    alpha1 = 1.0 - alpha
+    values = data[first + 1:].tolist()
+    smoothed = [0.0] * len(values)
+    prev = math.fsum(data[start:first + 1].tolist()) / period
+    out[first] = prev
+    for i, value in enumerate(values):
+        smoothed[i] = prev = prev * alpha1 + value * alpha
+    out[first + 1:] = smoothed
+    return out
+
+
+def rsi(close, period):
+    """
+    Relative strength index, same as bt.indicators.RSI with default settings.
+
+    :param close: 1-D array of closing prices
+    :param period: RSI period
+    """
+    close = np.asarray(close, dtype=np.float64)
+    diff = np.empty(len(close))
+    diff[0] = np.nan
+    diff[1:] = close[1:] - close[:-1]
+    up = np.maximum(diff, 0.0)
+    down = np.maximum(-diff, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = smma(up, period, start=1) / smma(down, period, start=1)
+        return 100.0 - 100.0 / (1.0 + rs)
+
+
+def true_range(high, low, close):
+    """
+    True range, same as bt.indicators.TrueRange.
+
+    :param high: 1-D array of highs
+    :param low: 1-D array of lows
+    :param close: 1-D array of closing prices
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    out = _empty(len(close))
+    prev_close = close[:-1]
+    out[1:] = np.maximum(high[1:], prev_close) - np.minimum(low[1:], prev_close)
+    return out
+
+
+def atr(high, low, close, period):
+    """
+    Average true range, same as bt.indicators.AverageTrueRange.
+
+    :param high: 1-D array of highs
+    :param low: 1-D array of lows
+    :param close: 1-D array of closing prices
+    :param period: ATR period
+    """
+    return smma(true_range(high, low, close), period, start=1)
@@ -0,0 +1,203 @@
+import math
+
+import numpy as np
+
+# Incremental versions of the indicators in batch.py, for loops that see one
+# bar at a time. Each object keeps only its window (or its smoothed state) in
+# __slots__ and update() costs O(1) per value, returning the indicator's
+# current value: NaN until backtrader would have produced one, then the same
+# number as bt.indicators (to floating-point tolerance for SMA and
+# StandardDeviation, exactly for the Wilder-smoothed RSI and ATR).
+#
+# Running window sums drift by a few ulps per update, so every RESYNC
+# updates they are recomputed from the window (O(period), amortised O(1)).
+
+RESYNC = 1024
+
+_NAN = float('nan')
+
+
+class SMA:
+    """Simple moving average, same as bt.indicators.SimpleMovingAverage."""
+
+    __slots__ = ('period', 'value', '_window', '_pos', '_count', '_sum', '_updates')
+
+    def __init__(self, period):
+        self.period = period
+        self.value = _NAN
+        self._window = [0.0] * period
+        self._pos = 0
+        self._count = 0
+        self._sum = 0.0
+        self._updates = 0
+
+    def update(self, x):
+        window, pos = self._window, self._pos
+        self._sum += x - window[pos]
+        window[pos] = x
+        self._pos = pos + 1 if pos + 1 < self.period else 0
+        self._updates += 1
+        if self._updates % RESYNC == 0:
+            self._sum = math.fsum(window)
+        if self._count < self.period:
+            self._count += 1
+            if self._count < self.period:
+                return _NAN
+        self.value = self._sum / self.period
+        return self.value
+
+
+class StdDev:
+    """
+    Population standard deviation over a sliding window (Welford updates),
+    same as bt.indicators.StandardDeviation.
+    """
+
+    __slots__ = ('period', 'value', '_window', '_pos', '_count', '_mean', '_m2', '_updates')
+
+    def __init__(self, period):
+        self.period = period
+        self.value = _NAN
+        self._window = [0.0] * period
+        self._pos = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    def _resync(self):
+        window = self._window
+        self._mean = math.fsum(window) / self.period
+        self._m2 = math.fsum((x - self._mean) ** 2 for x in window)
+
+    def update(self, x):
+        window, pos, period = self._window, self._pos, self.period
+        if self._count < period:
+            self._count += 1
+            delta = x - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (x - self._mean)
+        else:
+            old = window[pos]
+            mean = self._mean + (x - old) / period
+            self._m2 += (x - old) * (x - mean + old - self._mean)
+            self._mean = mean
+        window[pos] = x
+        self._pos = pos + 1 if pos + 1 < period else 0
+        self._updates += 1
+        if self._count < period:
+            return _NAN
+        if self._updates % RESYNC == 0:
+            self._resync()
+        # Like backtrader's safepow, a tiny negative variance from rounding counts as positive
+        self.value = (abs(self._m2) / period) ** 0.5
+        return self.value
+
+
+class SMMA:
+    """Wilder's smoothed moving average, same as bt.indicators.SmoothedMovingAverage."""
+
+    __slots__ = ('period', 'value', '_alpha', '_alpha1', '_seed')
+
+    def __init__(self, period):
+        self.period = period
+        self.value = _NAN
+        self._alpha = 1.0 / period
+        self._alpha1 = 1.0 - self._alpha
+        self._seed = []
+
+    def update(self, x):
+        seed = self._seed
+        if seed is None:
+            self.value = self.value * self._alpha1 + x * self._alpha
+        else:
+            seed.append(x)
+            if len(seed) < self.period:
+                return _NAN
+            # Seeded with the plain average of the first period values, as in batch.smma
+            self.value = math.fsum(seed) / self.period
+            self._seed = None
+        return self.value
+
+
+def _rsi(up, down):
+    if down:
+        return 100.0 - 100.0 / (1.0 + up / down)
+    # Same as the array version's division: no losses at all reads as 100
+    return 100.0 if up else _NAN
+
+
+class RSI:
+    """Relative strength index, same as bt.indicators.RSI with default settings."""
+
+    __slots__ = ('period', 'value', '_prev', '_up', '_down')
+
+    def __init__(self, period):
+        self.period = period
+        self.value = _NAN
+        self._prev = None
+        self._up = SMMA(period)
+        self._down = SMMA(period)
+
+    def update(self, close):
+        prev, self._prev = self._prev, close
+        if prev is None:
+            return _NAN
+        diff = close - prev
+        up = self._up.update(diff if diff > 0.0 else 0.0)
+        down = self._down.update(-diff if diff < 0.0 else 0.0)
+        if up != up:
+            return _NAN
+        self.value = _rsi(up, down)
+        return self.value
+
+
+class TrueRange:
+    """True range, same as bt.indicators.TrueRange."""
+
+    __slots__ = ('value', '_prev_close')
+
+    def __init__(self):
+        self.value = _NAN
+        self._prev_close = None
+
+    def update(self, high, low, close):
+        prev_close, self._prev_close = self._prev_close, close
+        if prev_close is None:
+            return _NAN
+        self.value = max(high, prev_close) - min(low, prev_close)
+        return self.value
+
+
+class ATR:
+    """Average true range, same as bt.indicators.AverageTrueRange."""
+
+    __slots__ = ('period', 'value', '_tr', '_smma')
+
+    def __init__(self, period):
+        self.period = period
+        self.value = _NAN
+        self._tr = TrueRange()
+        self._smma = SMMA(period)
+
+    def update(self, high, low, close):
+        tr = self._tr.update(high, low, close)
+        if tr != tr:
+            return _NAN
+        self.value = self._smma.update(tr)
+        return self.value
+
+
+def replay(indicator, *columns):
+    """
+    Feeds whole arrays through an online indicator, one bar at a time.
+
+    Leaves the indicator warmed up on the history, ready for live updates.
+
+    :param indicator: Online indicator (e.g. RSI(14))
+    :param columns: Input arrays in update() order (close, or high, low, close)
+    :return: float64 array of the indicator value after every bar
+    """
+    update = indicator.update
+    columns = [np.asarray(column, dtype=np.float64).tolist() for column in columns]
+    return np.fromiter((update(*values) for values in zip(*columns)), dtype=np.float64, count=len(columns[0]))
@@ -1,13 +1,17 @@
-import requests
-from textblob import TextBlob
-import yaml
+import os
+import sys
+
+# Add the project root directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-with open('config/config.yaml') as f:
-    config = yaml.safe_load(f)
+import requests
 
-api_key = config['newsapi']['api_key']
+from src.utils.clients import get_config
+from src.utils.score_cache import get_score_cache
+from src.utils.sentiment_scorer import textblob_polarity
 
 def fetch_news_sentiment(keyword, article_limit=10):
+    api_key = get_config()['newsapi']['api_key']
     url = f"https://newsapi.org/v2/everything?q={keyword}&language=en&apiKey={api_key}"
     response = requests.get(url)
 
@@ -22,15 +26,11 @@ def fetch_news_sentiment(keyword, article_limit=10):
         print(f"No articles found for keyword: {keyword}")
         return None
 
-    sentiments = []
-    for article in articles[:article_limit]:
-        title = article.get('title', '')
-        description = article.get('description', '')
-        full_text = f"{title} {description}"
-        analysis = TextBlob(full_text)
-        sentiment = analysis.sentiment.polarity
-        sentiments.append(sentiment)
-        print(f"Article Title: {title}\nSentiment Score: {sentiment}\n")
+    articles = articles[:article_limit]
+    full_texts = [f"{article.get('title', '')} {article.get('description', '')}" for article in articles]
+    sentiments = textblob_polarity(full_texts, get_score_cache())
+    for article, sentiment in zip(articles, sentiments):
+        print(f"Article Title: {article.get('title', '')}\nSentiment Score: {sentiment}\n")
 
     avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0
     print(f"\nAverage Sentiment for '{keyword}' in News: {avg_sentiment}")
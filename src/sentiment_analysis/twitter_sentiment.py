@@ -1,21 +1,19 @@
+import os
+import sys
+
+# Add the project root directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
 import tweepy
-from textblob import TextBlob
-import yaml
 import time
 
-# Load Twitter API credentials from config file
-with open('config/config.yaml') as f:
-    config = yaml.safe_load(f)
-
-api_key = config['twitter']['api_key']
-api_secret = config['twitter']['api_secret']
-access_token = config['twitter']['access_token']
-access_token_secret = config['twitter']['access_token_secret']
+from src.utils.clients import get_client
+from src.utils.score_cache import get_score_cache
+from src.utils.sentiment_scorer import textblob_polarity
 
-# Authenticate with Twitter
-auth = tweepy.OAuthHandler(api_key, api_secret)
-auth.set_access_token(access_token, access_token_secret)
-api = tweepy.API(auth, timeout=120)
+# Twitter client, authenticated from config.yaml on first use (request timeout: twitter.timeout)
+def get_twitter_api():
+    return get_client('twitter')
 
 # Function to fetch and analyze tweets with retries
 def fetch_twitter_sentiment(keyword, tweet_count=100, retries=1):
@@ -23,14 +21,12 @@ def fetch_twitter_sentiment(keyword, tweet_count=100, retries=1):
         try:
             print(f"Attempt {attempt+1}/{retries}...")
             # Fetch tweets with the specified keyword
-            tweets = api.search_tweets(q=keyword, count=tweet_count, lang='en')
+            tweets = get_twitter_api().search_tweets(q=keyword, count=tweet_count, lang='en')
             print(f"Fetched {len(tweets)} tweets.")
-            sentiments = []
+            # Polarity for sentiment score (-1 to 1); tweets seen before come from the cache
+            sentiments = textblob_polarity([tweet.text for tweet in tweets], get_score_cache())
 
-            for tweet in tweets:
-                analysis = TextBlob(tweet.text)
-                sentiment = analysis.sentiment.polarity  # Get polarity for sentiment score (-1 to 1)
-                sentiments.append(sentiment)
+            for tweet, sentiment in zip(tweets, sentiments):
                 print(f"Tweet: {tweet.text}\nSentiment Score: {sentiment}\n")
 
             # Calculate average sentiment
@@ -1,34 +1,26 @@
-import praw
-from textblob import TextBlob
-import yaml
+import os
+import sys
 
-# Load config
-with open("config/config.yaml", 'r') as file:
-    config = yaml.safe_load(file)
+# Add the project root directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-# Initialize Reddit API client
-reddit = praw.Reddit(
-    client_id=config['reddit']['client_id'],
-    client_secret=config['reddit']['client_secret'],
-    user_agent=config['reddit']['user_agent'],
-    redirect_uri=config['reddit']['redirect_uri']
-)
+from src.utils.clients import get_client
+from src.utils.score_cache import get_score_cache
+from src.utils.sentiment_scorer import textblob_polarity
 
 def fetch_reddit_sentiment(subreddit_name, limit=10):
-    subreddit = reddit.subreddit(subreddit_name)
-    sentiments = []
+    # Reddit API client, built from config.yaml on first use
+    subreddit = get_client('reddit').subreddit(subreddit_name)
+    titles = [submission.title for submission in subreddit.hot(limit=limit)]
+    sentiments = textblob_polarity(titles, get_score_cache())
 
-    for submission in subreddit.hot(limit=limit):
-        analysis = TextBlob(submission.title)
-        # analysis.save()
-        sentiment_score = analysis.sentiment.polarity
-        sentiments.append(sentiment_score)
-
-        print(f"Title: {submission.title}\nSentiment Score: {sentiment_score}\n")
+    for title, sentiment_score in zip(titles, sentiments):
+        print(f"Title: {title}\nSentiment Score: {sentiment_score}\n")
 
     avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0
     print(f"\nAverage Sentiment for r/{subreddit_name}: {avg_sentiment}")
     return avg_sentiment
 
-fetch_reddit_sentiment("CryptoCurrency", limit=10)
+if __name__ == "__main__":
+    fetch_reddit_sentiment("CryptoCurrency", limit=10)
 
@@ -2,26 +2,36 @@
 
 import backtrader as bt
 
+from src.utils.event_recorder import NULL_RECORDER, bt_time, record_bt_order
+
 class MeanReversionStrategy(bt.Strategy):
     params = dict(
         period=10,               # Shorter moving average period to capture shorter-term trends
         dev_threshold=0.5,       # Reduced threshold to trigger trades more easily
         stop_loss=0.02,          # Stop loss percentage (2%)
-        take_profit=0.04         # Take profit percentage (4%)
+        take_profit=0.04,        # Take profit percentage (4%)
+        recorder=None            # EventRecorder for bar snapshots, signals, orders and fills
     )
 
     def __init__(self):
         self.dataclose = self.datas[0].close
         self.order = None
         self.buy_price = None
+        self.recorder = self.params.recorder or NULL_RECORDER
 
         # Calculate moving average and standard deviation
         self.sma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.period)
         self.stdev = bt.indicators.StandardDeviation(self.data.close, period=self.params.period)
 
+    def notify_order(self, order):
+        record_bt_order(self.recorder, order, bt_time(self.data.datetime[0]))
+
     def next(self):
-        # Print statements for debugging each step's values
-        print(f"Close: {self.dataclose[0]}, SMA: {self.sma[0]}, StdDev: {self.stdev[0]}")
+        rec = self.recorder
+        # Bar snapshot (close and SMA) at debug level only
+        if rec.debug:
+            d = self.data
+            rec.bar(bt_time(d.datetime[0]), d.open[0], d.high[0], d.low[0], d.close[0], d.volume[0], self.sma[0])
 
         if self.order:
             return  # Skip if an order is pending
@@ -31,7 +41,8 @@ class MeanReversionStrategy(bt.Strategy):
             if self.dataclose[0] < self.sma[0]:
                 self.buy_price = self.dataclose[0]
                 self.order = self.buy()
-                print(f"Buying at {self.dataclose[0]} (Mean: {self.sma[0]})")
+                if rec.info:
+                    rec.signal(bt_time(self.data.datetime[0]), 1, self.dataclose[0], 'entry', self.sma[0])
 
         else:
             # Simple exit conditions based on stop loss and take profit
@@ -41,10 +52,11 @@ class MeanReversionStrategy(bt.Strategy):
             # Stop Loss
             if self.dataclose[0] <= stop_loss_price:
                 self.order = self.sell()
-                print(f"Stop Loss hit. Selling at {self.dataclose[0]}")
+                if rec.info:
+                    rec.signal(bt_time(self.data.datetime[0]), -1, self.dataclose[0], 'stop_loss', self.sma[0])
 
             # Take Profit
             elif self.dataclose[0] >= take_profit_price:
                 self.order = self.sell()
-                print(f"Take Profit hit. Selling at {self.dataclose[0]}")
-
+                if rec.info:
+                    rec.signal(bt_time(self.data.datetime[0]), -1, self.dataclose[0], 'take_profit', self.sma[0])
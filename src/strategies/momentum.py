@@ -1,21 +1,31 @@
 import backtrader as bt
 
+from src.utils.event_recorder import NULL_RECORDER, bt_time, record_bt_order
+
 class MomentumStrategy(bt.Strategy):
     params = dict(
         rsi_period=8,                  # Shorter period for more sensitivity
         rsi_overbought=65,             # Lowered to trigger more sell signals
         rsi_oversold=35,               # Raised to trigger more buy signals
         stop_loss=0.01,                # Stop-loss tightened to 1%
-        take_profit=0.02               # Take-profit set at 2%
+        take_profit=0.02,              # Take-profit set at 2%
+        recorder=None                  # EventRecorder for bar snapshots, signals, orders and fills
     )
 
     def __init__(self):
         self.rsi = bt.indicators.RSI(self.data.close, period=self.params.rsi_period)
         self.buy_price = None
+        self.recorder = self.params.recorder or NULL_RECORDER
+
+    def notify_order(self, order):
+        record_bt_order(self.recorder, order, bt_time(self.data.datetime[0]))
 
     def next(self):
-        # Print for debugging to ensure conditions are being checked
-        print(f"Close: {self.data.close[0]}, RSI: {self.rsi[0]}")
+        rec = self.recorder
+        # Bar snapshot (close and RSI) at debug level only
+        if rec.debug:
+            d = self.data
+            rec.bar(bt_time(d.datetime[0]), d.open[0], d.high[0], d.low[0], d.close[0], d.volume[0], self.rsi[0])
 
         if self.position:
             # Stop-loss and take-profit conditions if in position
@@ -24,12 +34,14 @@ class MomentumStrategy(bt.Strategy):
                 take_profit_price = (1 + self.params.take_profit) * self.buy_price
 
                 if self.data.close[0] <= stop_loss_price:
-                    print(f"Stop-loss triggered. Selling at {self.data.close[0]}")
+                    if rec.info:
+                        rec.signal(bt_time(self.data.datetime[0]), -1, self.data.close[0], 'stop_loss', self.rsi[0])
                     self.sell()
                     self.buy_price = None
 
                 elif self.data.close[0] >= take_profit_price:
-                    print(f"Take-profit reached. Selling at {self.data.close[0]}")
+                    if rec.info:
+                        rec.signal(bt_time(self.data.datetime[0]), -1, self.data.close[0], 'take_profit', self.rsi[0])
                     self.sell()
                     self.buy_price = None
 
@@ -38,9 +50,11 @@ class MomentumStrategy(bt.Strategy):
             if self.rsi[0] < self.params.rsi_oversold:
                 self.buy()
                 self.buy_price = self.data.close[0]
-                print(f"Buying at {self.data.close[0]} (RSI oversold)")
+                if rec.info:
+                    rec.signal(bt_time(self.data.datetime[0]), 1, self.data.close[0], 'entry', self.rsi[0])
 
             # Sell signal if RSI is above the overbought threshold
             elif self.rsi[0] > self.params.rsi_overbought:
                 self.sell()
-                print(f"Selling at {self.data.close[0]} (RSI overbought)")
+                if rec.info:
+                    rec.signal(bt_time(self.data.datetime[0]), -1, self.data.close[0], 'entry', self.rsi[0])
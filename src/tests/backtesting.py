@@ -11,8 +11,14 @@ logging.getLogger('matplotlib').setLevel(logging.WARNING)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 # Import utility functions
-from src.utils.sentiment_analysis import get_overall_sentiment
+from src.defi.yield_oracle import ReplayYieldOracle
+from src.engine.batch import EquityCurve
+from src.engine.cerebro import transactions
+from src.engine.metrics import bars_per_year, compute_metrics, fill_arrays, trade_pnl
 from src.utils.defi_integration import check_yield_and_reinvest
+from src.utils.event_recorder import NULL_RECORDER, bt_time, record_bt_order
+from src.utils.data_loader import load_ohlcv
+from src.utils.feature_feed import build_feature_frame, feature_columns, feature_data
 
 # Custom data feed class for Backtrader using Pandas data
 class CustomPandasData(bt.feeds.PandasData):
@@ -34,7 +40,9 @@ class EnhancedStrategy(bt.Strategy):
         atr_period=14,
         atr_multiplier=1.0,
         sentiment_threshold=-0.2,
-        reinvest_threshold=100
+        reinvest_threshold=100,
+        yield_oracle=None,      # ReplayYieldOracle to replay historical lending rates; None uses FALLBACK_YIELDS
+        recorder=None           # EventRecorder for bar snapshots, signals, orders and fills
     )
 
     def __init__(self):
@@ -44,19 +52,29 @@ class EnhancedStrategy(bt.Strategy):
         self.rsi = bt.indicators.RelativeStrengthIndex(self.data.close, period=self.params.rsi_period)
         self.atr = bt.indicators.AverageTrueRange(self.data, period=self.params.atr_period)
         self.trade_log = []
-        self.overall_sentiment = get_overall_sentiment()
+        # Point-in-time sentiment from the feed (see build_feature_frame); neutral if the feed has none
+        self.sentiment = self.data.sentiment if 'sentiment' in self.data.lines.getlinealiases() else None
+        self.overall_sentiment = 0.0
         self.cumulative_profit = 0
+        self.recorder = self.params.recorder or NULL_RECORDER
         logging.debug("Strategy initialized with parameters: %s", self.params)
 
     def log(self, text):
         logging.info(f'{self.data.datetime.date(0)}: {text}')
 
+    def notify_order(self, order):
+        record_bt_order(self.recorder, order, bt_time(self.data.datetime[0]))
+
     def next(self):
-        self.log(f'RSI: {self.rsi[0]}, Close: {self.dataclose[0]}, Sentiment: {self.overall_sentiment}')
-        logging.debug("Next step - Close: %.2f, RSI: %.2f, Sentiment: %.2f", self.dataclose[0], self.rsi[0], self.overall_sentiment)
+        if self.sentiment is not None:
+            self.overall_sentiment = self.sentiment[0]
+        rec = self.recorder
+        # Bar snapshot (close and RSI) at debug level only, instead of formatting log lines every bar
+        if rec.debug:
+            d = self.data
+            rec.bar(bt_time(d.datetime[0]), d.open[0], d.high[0], d.low[0], d.close[0], d.volume[0], self.rsi[0])
 
         if self.order:
-            logging.debug("Order already placed, skipping iteration.")
             return
 
         # Check if there is an open position
@@ -64,8 +82,8 @@ class EnhancedStrategy(bt.Strategy):
             if self.rsi[0] < self.params.rsi_lower and self.overall_sentiment > self.params.sentiment_threshold:
                 self.buy_price = self.dataclose[0]
                 self.order = self.buy()
-                self.log(f"BUY at {self.dataclose[0]} with RSI {self.rsi[0]}")
-                logging.debug("BUY order placed at %.2f", self.dataclose[0])
+                if rec.info:
+                    rec.signal(bt_time(self.data.datetime[0]), 1, self.dataclose[0], 'entry', self.rsi[0])
         else:
             # Calculate stop loss and take profit
             stop_loss_price = self.buy_price - (self.params.atr_multiplier * self.atr[0])
@@ -76,20 +94,20 @@ class EnhancedStrategy(bt.Strategy):
             # Check if we should sell
             if self.dataclose[0] <= stop_loss_price:
                 self.order = self.sell()
-                self.log(f"SELL (Stop Loss) at {self.dataclose[0]} with RSI {self.rsi[0]}")
-                logging.debug("Stop loss triggered, SELL order placed at %.2f", self.dataclose[0])
+                if rec.info:
+                    rec.signal(bt_time(self.data.datetime[0]), -1, self.dataclose[0], 'stop_loss', self.rsi[0])
                 self.cumulative_profit += self.dataclose[0] - self.buy_price
                 self.buy_price = None
             elif self.dataclose[0] >= take_profit_price or self.rsi[0] > self.params.rsi_upper:
                 self.order = self.sell()
-                self.log(f"SELL (Take Profit or RSI Overbought) at {self.dataclose[0]} with RSI {self.rsi[0]}")
-                logging.debug("Take profit or RSI overbought, SELL order placed at %.2f", self.dataclose[0])
+                if rec.info:
+                    rec.signal(bt_time(self.data.datetime[0]), -1, self.dataclose[0], 'take_profit', self.rsi[0])
                 self.cumulative_profit += self.dataclose[0] - self.buy_price
                 self.buy_price = None
 
             # Check for reinvestment
             if self.cumulative_profit >= self.params.reinvest_threshold:
-                check_yield_and_reinvest()
+                check_yield_and_reinvest(self.params.yield_oracle, now=self.data.datetime.datetime(0))
                 self.log(f"Profit Reinvestment triggered (Cumulative Profit: {self.cumulative_profit:.2f})")
                 logging.debug("Reinvesting profits, cumulative profit reset.")
                 self.cumulative_profit = 0
@@ -101,75 +119,74 @@ class EnhancedStrategy(bt.Strategy):
             logging.debug("Forced SELL at %.2f due to end of backtest", self.dataclose[0])
 
 # Function to load CSV data
-def load_data(filepath, date_column='timestamp'):
+def load_data(filepath):
     try:
         logging.debug("Loading data from %s", filepath)
-        data = pd.read_csv(filepath, sep=';', engine='python')
-        data.columns = data.columns.str.strip()
-        date_column = next((col for col in data.columns if 'timestamp' in col.lower()), date_column)
-        data[date_column] = pd.to_datetime(data[date_column], errors='coerce')
-        data.dropna(subset=[date_column], inplace=True)
-        data.set_index(date_column, inplace=True)
-        column_mapping = {'open': 'open', 'high': 'high', 'low': 'low', 'close': 'close', 'volume': 'volume'}
-        data.rename(columns=column_mapping, inplace=True)
+        data = load_ohlcv(filepath)
         logging.debug("Data loaded successfully with columns: %s", data.columns)
-        return data[['open', 'high', 'low', 'close', 'volume']]
+        return data
     except Exception as e:
         logging.error("Error loading data: %s", e)
         print(f"Error: {e}")
         return None
 
 # Function to run backtests with detailed metrics
-def run_backtest_with_metrics(data, condition_name):
+def run_backtest_with_metrics(data, condition_name, signals=None, yield_history=None, plot=False):
     cerebro = bt.Cerebro()
-    cerebro.addstrategy(EnhancedStrategy)
-    data_feed = CustomPandasData(dataname=data)
+    # Reinvestment decisions replay recorded lending rates (see src/defi/yield_oracle.py) when given
+    yield_oracle = ReplayYieldOracle.from_csv(yield_history) if yield_history else None
+    cerebro.addstrategy(EnhancedStrategy, yield_oracle=yield_oracle)
+    if signals:
+        # Signals (e.g. {'sentiment': 'data/sentiment/BTC_sentiment.csv'}) become extra feed lines
+        data = build_feature_frame(data, signals)
+        data_feed = feature_data(data, feature_columns(data))
+    else:
+        data_feed = CustomPandasData(dataname=data)
     cerebro.adddata(data_feed, name=condition_name)
     cerebro.broker.setcash(10000.0)
-    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
-    cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
-    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trades')
+    cerebro.addanalyzer(EquityCurve, _name='equity')
+    cerebro.addanalyzer(bt.analyzers.Transactions, _name='transactions')
 
     logging.info(f"Running backtest for {condition_name} market condition.")
     results = cerebro.run()
     final_value = cerebro.broker.getvalue()
     logging.info(f"Ending Portfolio Value for {condition_name}: {final_value:.2f}")
 
-    # Extract metrics
-    sharpe_ratio = results[0].analyzers.sharpe.get_analysis().get('sharperatio', 'N/A')
-    drawdown = results[0].analyzers.drawdown.get_analysis().get('max', {}).get('drawdown', 'N/A')
-    trade_analysis = results[0].analyzers.trades.get_analysis()
-
-    total_closed = trade_analysis.total.closed if 'total' in trade_analysis and 'closed' in trade_analysis.total else 0
-    won_trades = trade_analysis.won.total if 'won' in trade_analysis and 'total' in trade_analysis.won else 0
-    pnl_won = trade_analysis.won.pnl.total if 'won' in trade_analysis and 'pnl' in trade_analysis.won else 0
-    pnl_lost = trade_analysis.lost.pnl.total if 'lost' in trade_analysis and 'pnl' in trade_analysis.lost else 0
-
-    # Calculate win rate and profit factor
-    win_rate = (won_trades / total_closed) * 100 if total_closed > 0 else 0
-    profit_factor = (pnl_won / abs(pnl_lost)) if pnl_lost != 0 else float('inf')
+    # Metrics from the equity curve and fills in one pass (see src/engine/metrics.py)
+    fills = transactions(results[0])
+    position, traded = fill_arrays(fills, len(data), data.index)
+    metrics = compute_metrics(results[0].analyzers.equity.get_analysis(), trade_pnl(fills), position, traded,
+                              bars_per_year(data.index))
 
     # Output metrics
     logging.info(f"Metrics Summary for {condition_name}:")
-    logging.info("Sharpe Ratio: %s", sharpe_ratio)
-    logging.info("Max Drawdown: %s", drawdown)
-    logging.info("Win Rate: %.2f%%", win_rate)
-    logging.info("Profit Factor: %s", profit_factor)
+    logging.info("Sharpe Ratio: %s", metrics['sharpe'])
+    logging.info("Max Drawdown: %s", metrics['max_drawdown'])
+    logging.info("Win Rate: %.2f%%", metrics['win_rate'])
+    logging.info("Profit Factor: %s", metrics['profit_factor'])
 
-    # Plot backtest results
-    cerebro.plot()
+    # Interactive plot; blocks until the window is closed (run_batch writes plots to files instead)
+    if plot:
+        cerebro.plot()
 
-# Main execution
+# Main execution: every market condition in parallel, plots written to data/batch/plots
 if __name__ == "__main__":
+    from src.engine.batch import run_batch
+
     market_conditions = {
         'Bull Market': 'data/bull_market.csv',
         'Bear Market': 'data/bear_market.csv',
         'Sideways Market': 'data/sideways_market.csv'
     }
 
-    for condition_name, file_path in market_conditions.items():
-        market_data = load_data(file_path)
-        if market_data is not None:
-            run_backtest_with_metrics(market_data, condition_name)
-        else:
-            logging.error(f"Failed to load data for {condition_name}.")
+    results = run_batch({'strategies': ['EnhancedStrategy'], 'datasets': market_conditions})
+    for row in results.itertuples():
+        if row.error:
+            logging.error(f"Failed to run {row.dataset}: {row.error}")
+            continue
+        logging.info(f"Metrics Summary for {row.dataset}:")
+        logging.info("Ending Portfolio Value: %.2f", row.final_value)
+        logging.info("Sharpe Ratio: %s", row.sharpe)
+        logging.info("Max Drawdown: %s", row.max_drawdown)
+        logging.info("Win Rate: %.2f%%", row.win_rate)
+        logging.info("Profit Factor: %s", row.profit_factor)
@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.utils.abi_registry import ABI_DIR, AbiRegistry, keccak256, signature
+
+NAMES = ('aave', 'compound', 'erc20')
+
+
+def word(value):
+    return format(value, '064x')
+
+
+# What each module did before: parse the file and hash every signature it needs
+def parse_and_hash(name):
+    with open(os.path.join(ABI_DIR, f"{name}_abi.json")) as f:
+        abi = json.load(f)
+    return {signature(e): keccak256(signature(e).encode()).hex() for e in abi if e.get('type') in ('function', 'event')}
+
+
+# Per-log ABI scan, hashing each event signature until one matches the topic
+def naive_decode(abi, log):
+    for entry in abi:
+        if entry.get('type') == 'event' and '0x' + keccak256(signature(entry).encode()).hex() == log['topics'][0]:
+            return entry['name']
+    return None
+
+
+# Startup (parse + selectors/topics) without and with the cache, then log decoding
+if __name__ == '__main__':
+    print(f"keccak: {keccak256.__module__}")
+    start = time.perf_counter()
+    for name in NAMES:
+        parse_and_hash(name)
+    print(f"parse + hash every run:  {(time.perf_counter() - start) * 1000:7.1f} ms")
+
+    with tempfile.TemporaryDirectory() as cache:
+        start = time.perf_counter()
+        for name in NAMES:
+            AbiRegistry(cache_dir=cache).get(name)
+        print(f"registry, cold cache:    {(time.perf_counter() - start) * 1000:7.1f} ms")
+        start = time.perf_counter()
+        registry = AbiRegistry(cache_dir=cache)
+        for name in NAMES:
+            registry.get(name)
+        print(f"registry, warm cache:    {(time.perf_counter() - start) * 1000:7.1f} ms")
+        start = time.perf_counter()
+        for _ in range(1000):
+            registry.get('aave')
+        print(f"registry, in memory:     {(time.perf_counter() - start) * 1000:7.3f} ms per 1000 lookups")
+
+    aave = registry.get('aave')
+    events = list(aave.event_by_topic)
+    logs = [{'topics': [events[i % len(events)]] + ['0x' + word(i)] * (aave._decoders[events[i % len(events)]][1] - 1),
+             'data': '0x' + word(i) * 8} for i in range(2000)]
+    start = time.perf_counter()
+    for log in logs[:200]:
+        naive_decode(aave.abi, log)
+    naive = (time.perf_counter() - start) / 200
+    start = time.perf_counter()
+    for log in logs:
+        aave.decode_log(log)
+    decoded = (time.perf_counter() - start) / len(logs)
+    print(f"decode Aave log: ABI scan {naive * 1e6:.0f} us, topic table {decoded * 1e6:.1f} us")
@@ -0,0 +1,31 @@
+import os
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.tests.eth_stub import EthStub
+from src.utils.eth_rpc import EthRPC
+from src.utils.whale_movement import balance_snapshot
+
+# Balance snapshot of N wallets against a local node with 20 ms per request:
+# one eth_getBalance per address versus JSON-RPC batches and Multicall3
+if __name__ == '__main__':
+    addresses = [f"0x{i:040x}" for i in range(1, 1001)]
+    with EthStub(latency=0.02) as stub:
+        rpc = EthRPC(stub.url)
+        block = rpc.block_number()
+
+        start = time.perf_counter()
+        for address in addresses:
+            rpc.call('eth_getBalance', (address, hex(block)))
+        per_address = time.perf_counter() - start
+        print(f"per address: {per_address:7.2f}s  ({len(addresses)} requests)")
+
+        for method in ('batch', 'multicall'):
+            rpc = EthRPC(stub.url)
+            start = time.perf_counter()
+            balance_snapshot(addresses, block, method=method, rpc=rpc)
+            elapsed = time.perf_counter() - start
+            print(f"{method:>11}: {elapsed:7.2f}s  ({rpc.requests_sent} requests, {per_address / elapsed:.0f}x faster)")
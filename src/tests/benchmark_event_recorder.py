@@ -0,0 +1,65 @@
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import numpy as np
+import pandas as pd
+
+from src.engine.live import LiveMomentum, LiveRunner, PaperBroker, ReplayFeed
+from src.utils.event_recorder import EventRecorder
+
+
+# What every strategy did before: an f-string print on every bar
+class PrintingLiveMomentum(LiveMomentum):
+
+    def on_bar(self, bar, position):
+        size = super().on_bar(bar, position)
+        print(f"Close: {bar.close}, RSI: {self.rsi.value}")
+        return size
+
+
+def synthetic_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 30_000 + np.cumsum(rng.normal(0, 300, n))
+    return pd.DataFrame({'open': close + rng.normal(0, 50, n), 'high': close + 200, 'low': close - 200,
+                         'close': close, 'volume': rng.uniform(1, 100, n)},
+                        index=pd.date_range('2000-01-01', periods=n, freq='h', name='timestamp'))
+
+
+def live_per_bar(strategy, data_df, recorder=None, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        runner = LiveRunner(strategy(recorder=recorder), ReplayFeed(data_df), PaperBroker(1e9, recorder), recorder)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(runner.run())
+        best = min(best, (time.perf_counter() - start) / len(data_df))
+    return best
+
+
+# Per-bar cost with recording off, on at info (signals, orders, fills) and at
+# debug (plus a snapshot of every bar), against printing every bar, in the
+# live loop (in a backtest the difference is lost in backtrader's own cost)
+if __name__ == '__main__':
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    data_df = synthetic_bars(bars)
+    print(f"{bars} bars, momentum strategy")
+    with tempfile.TemporaryDirectory() as path:
+        baseline = None
+        for name, strategy, level in (('off', LiveMomentum, None), ('print every bar', PrintingLiveMomentum, None),
+                                      ('recorder at INFO', LiveMomentum, logging.INFO),
+                                      ('recorder at DEBUG', LiveMomentum, logging.DEBUG)):
+            recorder = EventRecorder(os.path.join(path, name), level=level) if level else None
+            with recorder or contextlib.nullcontext():
+                cost = live_per_bar(strategy, data_df, recorder)
+            baseline = baseline or cost
+            counts = ', '.join(f"{n} {kind}" for kind, n in recorder.counts.items() if n) if recorder else ''
+            print(f"{name:18} {cost * 1e6:6.2f} us/bar ({(cost - baseline) * 1e6:+.2f}) {counts}")
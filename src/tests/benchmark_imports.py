@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+
+MODULES = [
+    'src.utils.defi_integration',
+    'src.utils.sentiment_analysis',
+    'src.utils.whale_movement',
+    'src.data_ingestion.crypto_kraken',
+    'src.data_ingestion.stocks_alpaca',
+    'src.tests.backtesting',
+]
+
+# Imports each module in a fresh interpreter and checks that no client was built
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+from src.utils import clients
+print(elapsed, len(clients._clients), clients._config is not None)
+"""
+
+
+def cold_import(module, repeat=3):
+    """Best-of-``repeat`` cold import time of ``module`` and whether it built clients or read config."""
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', PROBE.format(module=module)], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            return None, out.stderr.strip().splitlines()[-1]
+        elapsed, built, config = out.stdout.split()[-3:]
+        best = min(best or float('inf'), float(elapsed))
+    return best, f"clients built: {built}, config read: {config}"
+
+
+# Cold-start import time of the modules that used to connect, load models or read config at import
+if __name__ == '__main__':
+    interpreter_start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'])
+    baseline = time.perf_counter() - interpreter_start
+    print(f"{'interpreter startup':<36} {baseline * 1000:8.1f} ms")
+    for module in MODULES:
+        elapsed, detail = cold_import(module)
+        shown = f"{elapsed * 1000:8.1f} ms" if elapsed is not None else "  failed"
+        print(f"{module:<36} {shown}  ({detail})")
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import numpy as np
+from src.indicators import batch, online
+
+
+# Per-bar cost of keeping RSI, ATR, SMA and StdDev current in a live loop:
+# recomputing the arrays over a trailing window every bar vs. online updates
+if __name__ == '__main__':
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    period, lookback = 14, 500
+    rng = np.random.default_rng(0)
+    close = 30_000 + np.cumsum(rng.normal(0, 50, bars + lookback))
+    high, low = close + rng.uniform(0, 40, len(close)), close - rng.uniform(0, 40, len(close))
+
+    start = time.perf_counter()
+    for i in range(lookback, len(close)):
+        h, l, c = high[i - lookback:i + 1], low[i - lookback:i + 1], close[i - lookback:i + 1]
+        batch.rsi(c, period)[-1], batch.atr(h, l, c, period)[-1], batch.sma(c, period)[-1], batch.stddev(c, period)[-1]
+    recompute = (time.perf_counter() - start) / bars
+
+    indicators = online.RSI(period), online.ATR(period), online.SMA(period), online.StdDev(period)
+    rsi, atr, sma, stddev = indicators
+    online.replay(rsi, close[:lookback])
+    online.replay(atr, high[:lookback], low[:lookback], close[:lookback])
+    online.replay(sma, close[:lookback])
+    online.replay(stddev, close[:lookback])
+    ticks = list(zip(high[lookback:].tolist(), low[lookback:].tolist(), close[lookback:].tolist()))
+    start = time.perf_counter()
+    for h, l, c in ticks:
+        rsi.update(c), atr.update(h, l, c), sma.update(c), stddev.update(c)
+    incremental = (time.perf_counter() - start) / bars
+
+    size = sum(sys.getsizeof(indicator) for indicator in indicators)
+    print(f"{bars} bars, period {period}, {lookback}-bar window")
+    print(f"recompute arrays per bar: {recompute * 1e6:8.1f} us/bar")
+    print(f"online updates:           {incremental * 1e6:8.1f} us/bar ({recompute / incremental:.0f}x), "
+          f"{size} bytes of indicator objects")
@@ -0,0 +1,25 @@
+import os
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.engine.live import run_paper
+from src.strategies.mean_reversion import MeanReversionStrategy
+from src.strategies.momentum import MomentumStrategy
+
+
+# Paper trades the BTC replay as fast as possible and on an accelerated clock
+# (two years of daily bars in a second), printing the latency histograms
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else 'data/crypto/BTC_USD_data.csv'
+    for speed in (None, 730 * 86400):
+        for strategy in (MomentumStrategy, MeanReversionStrategy):
+            start = time.perf_counter()
+            runner = run_paper(strategy, path, speed=speed, cash=1000000.0)
+            elapsed = time.perf_counter() - start
+            print(f"{strategy.__name__}, speed {speed or 'max'}: {runner.bars} bars, {len(runner.broker.fills)} fills, "
+                  f"value {runner.broker.value:.2f} in {elapsed:.2f}s (max queue {runner.max_queue})")
+            print(f"  {runner.tick_to_signal}")
+            print(f"  {runner.signal_to_order}")
@@ -0,0 +1,68 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import requests
+from src.defi.llama_scanner import ProtocolHistory, ProtocolScanner, filter_protocols
+from src.tests.llama_stub import LlamaStub, fake_protocols
+from src.defi.yield_farming_zerion import MIN_APY, MIN_TVL
+
+
+# The old fetch_defi_data without its printing: whole body, json(), dict filter and sort
+def old_fetch(url):
+    data = requests.get(url).json()
+    selected = []
+    for protocol in data:
+        tvl = protocol.get('tvl') if protocol.get('tvl') is not None else 0
+        apy = protocol.get('apy') if protocol.get('apy') is not None else 0
+        if tvl >= MIN_TVL and apy >= MIN_APY:
+            selected.append({'name': protocol.get('name', 'Unknown'), 'tvl': tvl, 'apy': apy,
+                             'chain': protocol.get('chain', 'Unknown')})
+    return sorted(selected, key=lambda x: x['apy'], reverse=True)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+# Full download, unchanged (304) and changed scans against a local /protocols stub
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    protocols = fake_protocols(n)
+    with LlamaStub(protocols) as stub, tempfile.TemporaryDirectory() as tmp:
+        print(f"{n} protocols, {len(json.dumps(protocols)) / 2 ** 20:.1f} MiB payload")
+        old, elapsed = timed(lambda: old_fetch(stub.url))
+        print(f"old fetch_defi_data   {elapsed * 1000:7.1f} ms, {len(old)} selected")
+
+        scanner = ProtocolScanner(stub.url, cache_dir=tmp, history=ProtocolHistory(os.path.join(tmp, 'history.sqlite')))
+        for label in ('first scan', 'unchanged (304)'):
+            table, elapsed = timed(lambda: filter_protocols(scanner.scan(), MIN_TVL, MIN_APY))
+            print(f"{label:<20}  {elapsed * 1000:7.1f} ms, {len(table)} selected")
+
+        stub.set_protocols(fake_protocols(n, seed=1))
+        table, elapsed = timed(lambda: filter_protocols(scanner.scan(), MIN_TVL, MIN_APY))
+        print(f"{'changed payload':<20}  {elapsed * 1000:7.1f} ms, {len(table)} selected")
+
+        restarted = ProtocolScanner(stub.url, cache_dir=tmp)
+        table, elapsed = timed(lambda: filter_protocols(restarted.scan(), MIN_TVL, MIN_APY))
+        print(f"{'restart, unchanged':<20}  {elapsed * 1000:7.1f} ms, {len(table)} selected")
+
+        with tempfile.TemporaryDirectory() as fresh:
+            print(f"peak memory: old {peak_memory(lambda: old_fetch(stub.url)):.1f} MiB, "
+                  f"scanner {peak_memory(ProtocolScanner(stub.url, cache_dir=fresh).scan):.1f} MiB")
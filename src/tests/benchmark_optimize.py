@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.engine.optimize import STUDY_DIR, Study
+from src.engine.sweep import sweep
+from src.strategies.momentum import MomentumStrategy
+from src.utils.data_loader import read_ohlcv_csv
+
+SPACE = {
+    'rsi_period': list(range(4, 22, 2)),
+    'rsi_oversold': [20, 25, 30, 35, 40],
+    'rsi_overbought': [60, 65, 70, 75, 80],
+    'stop_loss': [0.01, 0.02, 0.05],
+    'take_profit': [0.02, 0.05, 0.1],
+}
+
+# Bars run and wall time for an adaptive study to reach the best Sharpe of a
+# full Momentum grid, for a few sampler seeds. Studies are kept under
+# data/studies, so re-running the script resumes them
+if __name__ == '__main__':
+    for name, path in (('BTC/USD', 'data/crypto/BTC_USD_data.csv'), ('AAPL', 'data/stocks/AAPL_data.csv')):
+        data_df = read_ohlcv_csv(path)
+        start = time.perf_counter()
+        grid = sweep(MomentumStrategy, data_df, SPACE, processes=1, cash=1000000.0, metrics=True, sort_by='sharpe')
+        grid_seconds = time.perf_counter() - start
+        grid_bars = len(grid) * len(data_df)
+        print(f"{name}: grid of {len(grid)} configs, best sharpe {grid['sharpe'][0]:.4f}, "
+              f"{grid_bars} bars in {grid_seconds:.2f}s")
+
+        for seed in range(4):
+            slug = f"momentum_{name.replace('/', '_')}_{seed}.jsonl"
+            study = Study(MomentumStrategy, data_df, SPACE, path=os.path.join(STUDY_DIR, slug), cash=1000000.0,
+                          seed=seed)
+            start = time.perf_counter()
+            best = study.best
+            while study.bar_evaluations < grid_bars and (best is None or best['value'] < grid['sharpe'][0]):
+                best = study.optimize(10)
+            print(f"  seed {seed}: sharpe {best['value']:.4f} after {len(study.trials)} trials, "
+                  f"{study.bar_evaluations} bars ({study.bar_evaluations / grid_bars:.1%} of the grid) "
+                  f"in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,34 @@
+import os
+import random
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.utils.sentiment_scorer import SentimentScorer
+
+WORDS = ("bitcoin ethereum rally crash surges plunges record high low market traders fear greed "
+         "regulators approve reject etf whales sell buy breakout support resistance").split()
+
+# Random headline-like titles of varying length
+def make_titles(count, seed=1):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 30))) for _ in range(count)]
+
+if __name__ == '__main__':
+    titles = make_titles(512)
+    scorer = SentimentScorer(device=-1)
+    scorer.classify(titles[:8])  # load the model and warm up
+
+    start = time.perf_counter()
+    for title in titles:
+        scorer.pipeline(title)
+    per_item = len(titles) / (time.perf_counter() - start)
+    print(f"per-item: {per_item:8.1f} titles/sec")
+
+    for batch_size in (8, 32, 64):
+        start = time.perf_counter()
+        scorer.classify(titles, batch_size=batch_size)
+        batched = len(titles) / (time.perf_counter() - start)
+        print(f"batch {batch_size:>3}: {batched:8.1f} titles/sec ({batched / per_item:.1f}x)")
@@ -0,0 +1,31 @@
+import os
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import numpy as np
+from src.engine.sweep import sweep
+from src.strategies.momentum import MomentumStrategy
+from src.tests.benchmark_vectorized import synthetic_history
+
+# Runs/sec of a Momentum sweep for 1, 2, 4, ... worker processes
+if __name__ == '__main__':
+    data_df = synthetic_history(200000)
+    grid = {
+        'rsi_period': list(range(4, 30, 2)),
+        'rsi_oversold': [25, 30, 35],
+        'rsi_overbought': [65, 70, 75],
+        'stop_loss': [0.01, 0.02, 0.05],
+    }
+    runs = int(np.prod([len(values) for values in grid.values()]))
+    baseline = None
+    processes = 1
+    while processes <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        sweep(MomentumStrategy, data_df, grid, processes=processes)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{processes:>3} processes: {runs / elapsed:8.1f} runs/s, speedup {baseline / elapsed:.2f}x")
+        processes *= 2
@@ -0,0 +1,53 @@
+import contextlib
+import io
+import os
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+from src.engine.vectorized import run_vectorized
+from src.strategies.mean_reversion import MeanReversionStrategy
+from src.strategies.momentum import MomentumStrategy
+
+class PandasData(bt.feeds.PandasData):
+    params = (('datetime', None), ('open', 'open'), ('high', 'high'), ('low', 'low'), ('close', 'close'), ('volume', 'volume'), ('openinterest', None))
+
+# Build a long random-walk history shaped like the BTC/USD file
+def synthetic_history(bars, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 20000 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.005, bars)) * close
+    index = pd.date_range('2020-01-01', periods=bars, freq='min')
+    return pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) + spread,
+                         'low': np.minimum(open_, close) - spread, 'close': close,
+                         'volume': rng.uniform(1, 10, bars)}, index=index)
+
+def time_backtrader(strategy, data_df):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.addstrategy(strategy)
+    cerebro.adddata(PandasData(dataname=data_df))
+    cerebro.broker.setcash(10000.0)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cerebro.run()
+    return time.perf_counter() - start
+
+def time_vectorized(strategy, data_df, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run_vectorized(strategy, data_df)
+    return (time.perf_counter() - start) / repeat
+
+if __name__ == '__main__':
+    data_df = synthetic_history(50000)
+    for strategy in (MeanReversionStrategy, MomentumStrategy):
+        bt_time = time_backtrader(strategy, data_df)
+        vec_time = time_vectorized(strategy, data_df)
+        print(f"{strategy.__name__} on {len(data_df)} bars: backtrader {bt_time:.3f}s, "
+              f"vectorized {vec_time * 1000:.2f}ms, speedup {bt_time / vec_time:.0f}x")
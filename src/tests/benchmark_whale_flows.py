@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import numpy as np
+from src.utils.tx_indexer import TransactionStore
+from src.utils.whale_flows import WhaleFlows
+
+
+def fill_store(store, wallets, per_wallet, seed=0):
+    rng = np.random.default_rng(seed)
+    for w, wallet in enumerate(wallets):
+        for start in range(0, per_wallet, 100_000):
+            n = min(100_000, per_wallet - start)
+            blocks = np.sort(rng.integers(0, 2_000_000, n))
+            incoming = rng.random(n) < 0.5
+            store.add(wallet, [
+                {'hash': f"0x{w:04x}{start + i:012x}", 'blockNumber': int(block), 'timeStamp': 1_600_000_000 + int(block) * 12,
+                 'from': '0x' + '11' * 20 if inflow else wallet, 'to': wallet if inflow else '0x' + '11' * 20,
+                 'value': str(int(value) * 10 ** 15), 'isError': 0}
+                for i, (block, inflow, value) in enumerate(zip(blocks, incoming, rng.integers(1, 10 ** 7, n)))
+            ])
+        store.add(wallet, [], last_block=2_000_000)
+
+
+# Rows/s and peak Python memory of a full aggregation, then of an incremental refresh
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    wallets = [f"0x{i:040x}" for i in range(1, 21)]
+    tracked = {'exchanges': wallets[:10], 'funds': wallets[10:]}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TransactionStore(os.path.join(tmp, 'transactions.sqlite'))
+        fill_store(store, wallets, rows // len(wallets))
+
+        for chunk_size in (50_000, 200_000):
+            flows = WhaleFlows(tracked, interval='1h')
+            tracemalloc.start()
+            start = time.perf_counter()
+            added = flows.update(store, chunk_size=chunk_size)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"chunk {chunk_size:>7}: {added} rows in {elapsed:.1f}s ({added / elapsed:,.0f} rows/s), "
+                  f"peak {peak / 2 ** 20:.0f} MiB, {len(flows.frame())} intervals")
+
+        start = time.perf_counter()
+        added = flows.update(store)
+        print(f"refresh with nothing new: {added} rows in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,36 @@
+import os
+import random
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.tests.eth_stub import EthStub, SimulatedChain
+from src.utils.eth_rpc import EthRPC
+from src.utils.whale_stream import WhaleDetector, WhaleStream
+
+
+def address(i):
+    return f"0x{i:040x}"
+
+
+# Blocks/s scanned from a local node for 10 up to 100k tracked wallets: the
+# cost follows the number of transactions per block, not the wallet count
+if __name__ == '__main__':
+    rng = random.Random(0)
+    chain = SimulatedChain(start=1)
+    for _ in range(500):
+        transfers = [(address(rng.randrange(10 ** 6)), address(rng.randrange(10 ** 6)), 1) for _ in range(150)]
+        transfers += [(address(rng.randrange(10 ** 6)), address(rng.randrange(10 ** 6)), 1, address(10 ** 7)) for _ in range(50)]
+        chain.mine(transfers)
+
+    with EthStub(chain=chain) as stub:
+        for wallets in (10, 1000, 100000):
+            detector = WhaleDetector({'whales': [address(i) for i in range(wallets)]})
+            stream = WhaleStream(EthRPC(stub.url), detector, start_block=2, batch_blocks=50)
+            start = time.perf_counter()
+            events = stream.poll()
+            elapsed = time.perf_counter() - start
+            print(f"{wallets:>7} wallets: {(chain.head - 1) / elapsed:8.1f} blocks/s, "
+                  f"{len(events)} events, {stub.requests} requests so far")
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for an Ethereum JSON-RPC node (like an anvil instance with a
+# deterministic state), used by tests and benchmarks. It answers
+# eth_blockNumber, eth_getBalance and Multicall3 aggregate(getEthBalance)
+# eth_calls, single or batched, after an optional per-request latency. Given
+# a SimulatedChain it also serves blocks and Transfer logs, and can reorg;
+# given mock contracts (MockAavePool, MockComptroller, MockCToken) it answers
+# their eth_calls.
+
+MULTICALL3_ADDRESS = '0xca11bde05977b3631167028862be2a173976ca11'
+TRANSFER_TOPIC = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+
+
+def stub_balance(address, block):
+    """Deterministic balance of ``address`` at ``block``, in wei."""
+    return int(address, 16) % 10 ** 21 + block * 10 ** 9
+
+
+def _word(raw, offset):
+    return int.from_bytes(raw[offset:offset + 32], 'big')
+
+
+def _aggregate_balances(data, block):
+    raw = bytes.fromhex(data[2:])
+    assert raw[:4].hex() == '252dba42', 'only aggregate() is supported'
+    args = raw[4:]
+    array = _word(args, 0)
+    count = _word(args, array)
+    outputs = []
+    for i in range(count):
+        item = array + 32 + _word(args, array + 32 + 32 * i)
+        calldata_start = item + _word(args, item + 32)
+        length = _word(args, calldata_start)
+        calldata = args[calldata_start + 32:calldata_start + 32 + length]
+        assert calldata[:4].hex() == '4d2301cc', 'only getEthBalance() is supported'
+        address = '0x' + calldata[4 + 12:36].hex()
+        outputs.append(stub_balance(address, block).to_bytes(32, 'big'))
+
+    # (uint256 blockNumber, bytes[] returnData)
+    head = block.to_bytes(32, 'big') + (64).to_bytes(32, 'big') + count.to_bytes(32, 'big')
+    offsets, body = b'', b''
+    for output in outputs:
+        offsets += (32 * count + len(body)).to_bytes(32, 'big')
+        body += (32).to_bytes(32, 'big') + output
+    return '0x' + (head + offsets + body).hex()
+
+
+def _hash(*parts):
+    return '0x' + hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def _topic(address):
+    return '0x' + '0' * 24 + address[2:].lower()
+
+
+class SimulatedChain:
+    """
+    In-memory chain of blocks holding native transfers and ERC-20 Transfer logs.
+
+    Transfers are (from, to, value) for native ETH or (from, to, amount, token) for tokens.
+    """
+
+    def __init__(self, start=1000):
+        self.blocks = {}
+        self.logs = {}
+        self.forks = 0
+        self._lock = threading.Lock()
+        self.head = start - 1
+        self.mine([])
+
+    def mine(self, transfers):
+        with self._lock:
+            number = self.head + 1
+            parent = self.blocks[number - 1]['hash'] if number - 1 in self.blocks else '0x' + '0' * 64
+            block_hash = _hash(number, self.forks, parent)
+            txs, logs = [], []
+            for i, transfer in enumerate(transfers):
+                tx_hash = _hash(block_hash, i)
+                if len(transfer) == 3:
+                    sender, recipient, value = transfer
+                    txs.append({'hash': tx_hash, 'from': sender, 'to': recipient, 'value': hex(value)})
+                else:
+                    sender, recipient, amount, token = transfer
+                    txs.append({'hash': tx_hash, 'from': sender, 'to': token, 'value': '0x0'})
+                    logs.append({'address': token, 'topics': [TRANSFER_TOPIC, _topic(sender), _topic(recipient)],
+                                 'data': '0x' + format(amount, '064x'), 'blockHash': block_hash,
+                                 'blockNumber': hex(number), 'transactionHash': tx_hash, 'logIndex': hex(len(logs))})
+            self.blocks[number] = {'number': hex(number), 'hash': block_hash, 'parentHash': parent, 'transactions': txs}
+            self.logs[block_hash] = logs
+            self.head = number
+            return block_hash
+
+    def reorg(self, depth, replacements):
+        """Replaces the last ``depth`` blocks with new ones holding ``replacements`` (one list per block)."""
+        with self._lock:
+            for number in range(self.head - depth + 1, self.head + 1):
+                del self.blocks[number]
+            self.head -= depth
+            self.forks += 1
+        for transfers in replacements:
+            self.mine(transfers)
+
+    def block(self, tag, full):
+        with self._lock:
+            number = self.head if tag in ('latest', 'pending') else int(tag, 16)
+            block = self.blocks.get(number)
+        if block is None or full:
+            return block
+        return dict(block, transactions=[tx['hash'] for tx in block['transactions']])
+
+
+def _encode_words(*values):
+    return '0x' + ''.join(format(value, '064x') for value in values)
+
+
+def _encode_addresses(addresses):
+    return _encode_words(32, len(addresses), *(int(address, 16) for address in addresses))
+
+
+class MockAavePool:
+    """Aave v1 LendingPool answering getReserves() and getReserveData(address); rates in ray."""
+
+    def __init__(self, address, reserves):
+        self.address = address.lower()
+        self.rates = {reserve.lower(): (0, 0) for reserve in reserves}
+
+    def set_rates(self, reserve, liquidity_rate, variable_borrow_rate):
+        self.rates[reserve.lower()] = (liquidity_rate, variable_borrow_rate)
+
+    def call(self, data, block):
+        selector = data[2:10]
+        if selector == '0902f1ac':
+            return _encode_addresses(list(self.rates))
+        if selector == '35ea6a75':
+            liquidity, variable = self.rates['0x' + data[-40:]]
+            return _encode_words(10 ** 24, 10 ** 23, 0, 0, liquidity, variable, 0, 0, 0, 10 ** 27, 10 ** 27, 0, 0)
+        raise ValueError('execution reverted')
+
+
+class MockCToken:
+    """Compound cToken answering supplyRatePerBlock() and borrowRatePerBlock()."""
+
+    def __init__(self, address, supply_rate=0, borrow_rate=0):
+        self.address = address.lower()
+        self.supply_rate = supply_rate
+        self.borrow_rate = borrow_rate
+
+    def call(self, data, block):
+        selector = data[2:10]
+        if selector == 'ae9d70b0':
+            return _encode_words(self.supply_rate)
+        if selector == 'f8f9da28':
+            return _encode_words(self.borrow_rate)
+        raise ValueError('execution reverted')
+
+
+class MockComptroller:
+    """Compound Comptroller answering getAllMarkets()."""
+
+    def __init__(self, address, markets):
+        self.address = address.lower()
+        self.markets = markets
+
+    def call(self, data, block):
+        if data[2:10] == 'b0772d0b':
+            return _encode_addresses([market.address for market in self.markets])
+        raise ValueError('execution reverted')
+
+
+class EthStub:
+
+    def __init__(self, block=19_000_000, latency=0.0, chain=None, contracts=()):
+        """
+        :param block: Latest block number reported by the node (without a chain)
+        :param latency: Seconds added to every HTTP request, to mimic a remote node
+        :param chain: SimulatedChain serving blocks and logs
+        :param contracts: Mock contracts (objects with an address and call(data, block))
+        """
+        self.chain = chain
+        self.contracts = {contract.address: contract for contract in contracts}
+        self.block = block
+        self.latency = latency
+        self.requests = 0
+        self.calls = []
+        self.fail_requests = 0  # the next this many HTTP requests get a 503
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with stub._lock:
+                    stub.requests += 1
+                    failing = stub.fail_requests > 0
+                    if failing:
+                        stub.fail_requests -= 1
+                if failing:
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if isinstance(payload, list):
+                    reply = [stub.handle(request) for request in reversed(payload)]
+                else:
+                    reply = stub.handle(payload)
+                body = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _block(self, tag):
+        return self.block if tag in ('latest', 'pending') else int(tag, 16)
+
+    def handle(self, request):
+        method, params = request['method'], request.get('params', [])
+        with self._lock:
+            self.calls.append((method, params))
+        try:
+            if method == 'eth_blockNumber':
+                result = hex(self.chain.head if self.chain else self.block)
+            elif method == 'eth_getBlockByNumber':
+                result = self.chain.block(params[0], params[1])
+            elif method == 'eth_getLogs':
+                logs = self.chain.logs.get(params[0]['blockHash'], [])
+                result = [log for log in logs if log['topics'][0] in params[0].get('topics', [log['topics'][0]])]
+            elif method == 'eth_getBalance':
+                result = hex(stub_balance(params[0], self._block(params[1])))
+            elif method == 'eth_call' and params[0]['to'].lower() in self.contracts:
+                result = self.contracts[params[0]['to'].lower()].call(params[0]['data'], self._block(params[1]))
+            elif method == 'eth_call' and params[0]['to'].lower() == MULTICALL3_ADDRESS:
+                result = _aggregate_balances(params[0]['data'], self._block(params[1]))
+            else:
+                return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32601, 'message': 'method not found'}}
+        except Exception as e:
+            return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32602, 'message': str(e)}}
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': result}
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
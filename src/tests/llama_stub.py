@@ -0,0 +1,86 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for DeFi Llama's /protocols endpoint, used by tests and
+# benchmarks. It serves the current payload with an ETag and Last-Modified,
+# and answers 304 when the client already has it.
+
+
+def fake_protocols(n, seed=0):
+    """``n`` protocol dicts shaped like DeFi Llama's, with a few fields left null."""
+    chains = ['Ethereum', 'Arbitrum', 'Solana', 'BSC', 'Multi-Chain']
+    protocols = []
+    for i in range(n):
+        protocols.append({
+            'id': str(i),
+            'name': f"Protocol {i}",
+            'slug': f"protocol-{i}",
+            'chain': chains[i % len(chains)],
+            'chains': [chains[i % len(chains)]],
+            'category': 'Dexes' if i % 2 else 'Lending',
+            'tvl': None if i % 17 == 0 else float((i * 7919 + seed * 13) % 5_000_000),
+            'apy': None if i % 11 == 0 else round(((i * 31 + seed) % 400) / 10, 2),
+            'change_1d': (i % 9) - 4.5,
+            'change_7d': None,
+            'description': 'Lorem ipsum ' * 20,
+            'chainTvls': {chains[i % len(chains)]: float(i)},
+        })
+    return protocols
+
+
+class LlamaStub:
+
+    def __init__(self, protocols=()):
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self.set_protocols(protocols)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    body, etag, modified = stub.body, stub.etag, stub.last_modified
+                    if self.headers.get('If-None-Match') == etag:
+                        stub.not_modified += 1
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.end_headers()
+                        return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/protocols"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def set_protocols(self, protocols):
+        """Replaces the payload; the next request gets a 200 with a new ETag."""
+        body = json.dumps(list(protocols)).encode()
+        with self._lock:
+            self.body = body
+            self.etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            self.last_modified = 'Sat, 01 Jun 2024 00:00:00 GMT'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
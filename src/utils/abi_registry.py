@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import threading
+
+# Shared contract ABI registry.
+#
+# Each ABI under abi/ is parsed once per process. Function selectors and
+# event topic hashes are computed once per ABI file content and kept in a
+# JSON cache under data/.cache/abi, so later runs skip the hashing. Logs are
+# decoded with a per-topic table built when the ABI is loaded, and Web3
+# contract handles are built once per (ABI, address) and shared.
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+ABI_DIR = os.path.join(PROJECT_ROOT, 'abi')
+CACHE_DIR = os.path.join(PROJECT_ROOT, 'data/.cache/abi')
+
+# Bumped when the cache layout changes
+CACHE_VERSION = 1
+
+_ROUND_CONSTANTS = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+_ROTATIONS = [[0, 36, 3, 41, 18], [1, 44, 10, 45, 2], [62, 6, 43, 15, 61], [28, 55, 25, 21, 56], [27, 20, 39, 8, 14]]
+_MASK = (1 << 64) - 1
+
+
+def _keccak_f(state):
+    for constant in _ROUND_CONSTANTS:
+        c = [state[x][0] ^ state[x][1] ^ state[x][2] ^ state[x][3] ^ state[x][4] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ (((c[(x + 1) % 5] << 1) | (c[(x + 1) % 5] >> 63)) & _MASK) for x in range(5)]
+        b = [[0] * 5 for _ in range(5)]
+        for x in range(5):
+            for y in range(5):
+                value, shift = state[x][y] ^ d[x], _ROTATIONS[x][y]
+                b[y][(2 * x + 3 * y) % 5] = ((value << shift) | (value >> (64 - shift))) & _MASK if shift else value
+        state = [[b[x][y] ^ (~b[(x + 1) % 5][y] & b[(x + 2) % 5][y]) for y in range(5)] for x in range(5)]
+        state[0][0] ^= constant
+    return state
+
+
+def _keccak256(data):
+    """Keccak-256 as used by Ethereum (original padding, not SHA3-256)."""
+    rate = 136
+    padded = bytearray(data) + b'\x01' + b'\x00' * (-(len(data) + 1) % rate)
+    padded[-1] |= 0x80
+    state = [[0] * 5 for _ in range(5)]
+    for offset in range(0, len(padded), rate):
+        for i in range(rate // 8):
+            state[i % 5][i // 5] ^= int.from_bytes(padded[offset + 8 * i:offset + 8 * i + 8], 'little')
+        state = _keccak_f(state)
+    return b''.join(state[i % 5][i // 5].to_bytes(8, 'little') for i in range(4))
+
+
+try:
+    # Installed with web3; much faster than the pure-Python fallback
+    from eth_hash.auto import keccak as keccak256
+except ImportError:
+    keccak256 = _keccak256
+
+
+def canonical_type(param):
+    """ABI type as written in signatures, with tuples expanded (e.g. '(address,bytes)[]')."""
+    kind = param['type']
+    if kind.startswith('tuple'):
+        return '(' + ','.join(canonical_type(component) for component in param['components']) + ')' + kind[5:]
+    return kind
+
+
+def signature(entry):
+    """Canonical signature of a function or event ABI entry, e.g. 'Transfer(address,address,uint256)'."""
+    return f"{entry['name']}({','.join(canonical_type(param) for param in entry.get('inputs', []))})"
+
+
+def _is_dynamic(kind):
+    return kind in ('string', 'bytes') or kind.endswith(']') or kind.startswith('(')
+
+
+def _decode_word(kind, word):
+    if kind == 'address':
+        return '0x' + word[-20:].hex()
+    if kind == 'bool':
+        return word[-1] == 1
+    if kind.startswith('uint'):
+        return int.from_bytes(word, 'big')
+    if kind.startswith('int'):
+        return int.from_bytes(word, 'big', signed=True)
+    if kind.startswith('bytes'):
+        return '0x' + word[:int(kind[5:])].hex()
+    return '0x' + word.hex()
+
+
+def _decode_dynamic(kind, data, offset):
+    start = int.from_bytes(data[offset:offset + 32], 'big')
+    length = int.from_bytes(data[start:start + 32], 'big')
+    raw = data[start + 32:start + 32 + length]
+    if kind == 'string':
+        return raw.decode('utf-8', errors='replace')
+    if kind == 'bytes':
+        return '0x' + raw.hex()
+    # Dynamic arrays and tuples are left encoded
+    return None
+
+
+class ContractABI:
+
+    def __init__(self, name, abi, selectors=None, topics=None):
+        """
+        :param name: Registry name (e.g. 'aave')
+        :param abi: Parsed ABI list
+        :param selectors: Precomputed {signature: '0x' + 4-byte selector} (computed if None)
+        :param topics: Precomputed {signature: '0x' + 32-byte topic hash} (computed if None)
+        """
+        self.name = name
+        self.abi = abi
+        functions = [entry for entry in abi if entry.get('type') == 'function']
+        events = [entry for entry in abi if entry.get('type') == 'event' and not entry.get('anonymous')]
+        if selectors is None:
+            selectors = {signature(e): '0x' + keccak256(signature(e).encode()).hex()[:8] for e in functions}
+        if topics is None:
+            topics = {signature(e): '0x' + keccak256(signature(e).encode()).hex() for e in events}
+        self.selectors = selectors
+        self.topics = topics
+
+        self._names = {}
+        for table in (selectors, topics):
+            for sig in table:
+                self._names.setdefault(sig.split('(', 1)[0], []).append(sig)
+        self.function_by_selector = {selectors[signature(e)]: e for e in functions}
+        self.event_by_topic = {topics[signature(e)]: e for e in events}
+
+        # topic -> (event name, topic count, [(arg name, type, indexed, topic or data slot)])
+        self._decoders = {}
+        for topic, event in self.event_by_topic.items():
+            fields, topic_slot, data_slot = [], 1, 0
+            for param in event['inputs']:
+                kind = canonical_type(param)
+                if param.get('indexed'):
+                    fields.append((param['name'], kind, True, topic_slot))
+                    topic_slot += 1
+                else:
+                    fields.append((param['name'], kind, False, data_slot))
+                    data_slot += 1
+            self._decoders[topic] = (event['name'], topic_slot, fields)
+
+    def _lookup(self, table, name, what):
+        if name in table:
+            return table[name]
+        candidates = [sig for sig in self._names.get(name, ()) if sig in table]
+        if len(candidates) != 1:
+            raise KeyError(f"{self.name}: {what} {name!r} is " + ('overloaded, use its signature: ' + ', '.join(candidates)
+                                                                   if candidates else 'not in the ABI'))
+        return table[candidates[0]]
+
+    def selector(self, name):
+        """Function selector by name (if not overloaded) or signature."""
+        return self._lookup(self.selectors, name, 'function')
+
+    def topic(self, name):
+        """Event topic hash by name (if not overloaded) or signature."""
+        return self._lookup(self.topics, name, 'event')
+
+    def decode_log(self, log):
+        """
+        Decodes a log emitted by this contract.
+
+        Indexed dynamic values come back as their topic hash; dynamic arrays and
+        tuples in the data are left as None.
+
+        :param log: Log dict with 'topics' and 'data' (hex strings)
+        :return: (event name, dict of arguments), or None if the log is not one of this ABI's events
+        """
+        topics = log['topics']
+        decoder = self._decoders.get(topics[0].lower()) if topics else None
+        # Same signature, other indexing (e.g. ERC-721 Transfer vs ERC-20 Transfer)
+        if decoder is None or len(topics) != decoder[1]:
+            return None
+        name, _, fields = decoder
+        data = bytes.fromhex(log['data'][2:])
+        args = {}
+        for arg, kind, indexed, slot in fields:
+            if indexed:
+                word = bytes.fromhex(topics[slot][2:])
+                args[arg] = '0x' + word.hex() if _is_dynamic(kind) else _decode_word(kind, word)
+            elif _is_dynamic(kind):
+                args[arg] = _decode_dynamic(kind, data, 32 * slot)
+            else:
+                args[arg] = _decode_word(kind, data[32 * slot:32 * slot + 32])
+        return name, args
+
+
+class AbiRegistry:
+
+    def __init__(self, abi_dir=ABI_DIR, cache_dir=CACHE_DIR):
+        """
+        :param abi_dir: Directory of <name>_abi.json files
+        :param cache_dir: Where precomputed selectors and topics are kept (None to disable)
+        """
+        self.abi_dir = abi_dir
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._abis = {}
+        self._contracts = {}
+
+    def path(self, name):
+        """ABI file for a registry name ('aave') or a path (e.g. config.yaml's abi_path)."""
+        if name.endswith('.json'):
+            return name if os.path.isabs(name) else os.path.join(PROJECT_ROOT, name)
+        return os.path.join(self.abi_dir, f"{name}_abi.json")
+
+    def _load(self, name, path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        abi = json.loads(raw)
+        key = f"{CACHE_VERSION}:{hashlib.sha1(raw).hexdigest()}"
+        cache_path = os.path.join(self.cache_dir, os.path.basename(path)) if self.cache_dir else None
+        if cache_path:
+            try:
+                with open(cache_path) as f:
+                    cached = json.load(f)
+                if cached['key'] == key:
+                    return ContractABI(name, abi, cached['selectors'], cached['topics'])
+            except (OSError, ValueError, KeyError):
+                pass
+
+        contract_abi = ContractABI(name, abi)
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_path + '.tmp', 'w') as f:
+                json.dump({'key': key, 'selectors': contract_abi.selectors, 'topics': contract_abi.topics}, f)
+            os.replace(cache_path + '.tmp', cache_path)
+        return contract_abi
+
+    def get(self, name):
+        """
+        The parsed ABI ``name`` ('aave', 'compound', 'erc20' or a path to an ABI file).
+
+        :return: ContractABI, shared by every caller
+        """
+        path = self.path(name)
+        contract_abi = self._abis.get(path)
+        if contract_abi is None:
+            with self._lock:
+                contract_abi = self._abis.get(path)
+                if contract_abi is None:
+                    label = os.path.basename(path)[:-len('_abi.json')] if path.endswith('_abi.json') else name
+                    contract_abi = self._abis[path] = self._load(label, path)
+        return contract_abi
+
+    def contract(self, name, address, web3=None):
+        """
+        Shared Web3 contract handle for ABI ``name`` at ``address``.
+
+        :param web3: Web3 instance (default: the shared client from src/utils/clients.py)
+        """
+        from web3 import Web3
+        address = Web3.to_checksum_address(address)
+        key = (self.path(name), address)
+        contract = self._contracts.get(key)
+        if contract is None:
+            abi = self.get(name).abi
+            if web3 is None:
+                from src.utils.clients import get_client
+                web3 = get_client('web3')
+            with self._lock:
+                contract = self._contracts.get(key)
+                if contract is None:
+                    contract = self._contracts[key] = web3.eth.contract(address=address, abi=abi)
+        return contract
+
+
+_registry = AbiRegistry()
+
+
+def get_abi(name):
+    """Parsed ABI from the shared registry (see AbiRegistry.get)."""
+    return _registry.get(name)
+
+
+def get_contract(name, address, web3=None):
+    """Web3 contract handle from the shared registry (see AbiRegistry.contract)."""
+    return _registry.contract(name, address, web3)
@@ -0,0 +1,181 @@
+import os
+import threading
+
+import yaml
+
+# Lazy registry for config and API clients.
+#
+# Nothing here touches the network, the disk or a model at import time. The
+# config is read once, on first use, from config/config.yaml at the project
+# root (or $TRADING_BOT_CONFIG) regardless of the working directory. Each
+# client is built by its factory the first time get_client(name) is called
+# and the same instance is handed out afterwards, so modules can import
+# freely and scripts that never touch Web3 never pay for it.
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, 'config/config.yaml')
+
+_lock = threading.RLock()
+_config = None
+_clients = {}
+_factories = {}
+
+
+def config_path():
+    return os.environ.get('TRADING_BOT_CONFIG', CONFIG_PATH)
+
+
+def get_config():
+    """Returns the parsed config.yaml, reading it on the first call only."""
+    global _config
+    if _config is None:
+        with _lock:
+            if _config is None:
+                with open(config_path(), 'r') as f:
+                    _config = yaml.safe_load(f) or {}
+    return _config
+
+
+def project_path(path):
+    """Resolves a path from config.yaml (e.g. an ABI path) against the project root."""
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+def register(name):
+    """
+    Decorator registering a client factory.
+
+    :param name: Client name passed to get_client
+    """
+    def decorator(factory):
+        _factories[name] = factory
+        return factory
+    return decorator
+
+
+def get_client(name, **kwargs):
+    """
+    Returns the shared client ``name``, building it on first use.
+
+    :param name: Registered client name (e.g. 'web3', 'kraken', 'reddit')
+    :param kwargs: Passed to the factory on the first call only; later calls get the client
+                   already built whatever their kwargs, so settings every caller relies on
+                   belong in the factory or config.yaml
+    """
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                if name not in _factories:
+                    raise KeyError(f"No client registered as {name!r}")
+                client = _clients[name] = _factories[name](**kwargs)
+    return client
+
+
+def is_loaded(name):
+    return name in _clients
+
+
+def reset(*names):
+    """Drops built clients (all of them, and the config, if no names are given)."""
+    global _config
+    with _lock:
+        if names:
+            for name in names:
+                _clients.pop(name, None)
+        else:
+            _clients.clear()
+            _config = None
+
+
+def load_abi(path):
+    """Parsed ABI list, shared through the ABI registry (see src/utils/abi_registry.py)."""
+    from src.utils.abi_registry import get_abi
+    return get_abi(project_path(path)).abi
+
+
+@register('web3')
+def _web3():
+    from web3 import Web3
+    return Web3(Web3.HTTPProvider(get_config()['web3']['infura_url']))
+
+
+@register('eth_rpc')
+def _eth_rpc(pool_size=10):
+    from src.utils.eth_rpc import EthRPC
+    return EthRPC(get_config()['web3']['infura_url'], pool_size=pool_size)
+
+
+@register('etherscan')
+def _etherscan(pool_size=8):
+    from src.utils.tx_indexer import EtherscanFetcher
+    return EtherscanFetcher(get_config()['etherscan']['api_key'], pool_size=pool_size)
+
+
+def _contract(protocol):
+    from src.utils.abi_registry import get_contract
+    settings = get_config()[protocol]
+    return get_contract(project_path(settings['abi_path']), settings['contract_address'], get_client('web3'))
+
+
+@register('aave')
+def _aave():
+    return _contract('aave')
+
+
+@register('compound')
+def _compound():
+    return _contract('compound')
+
+
+@register('kraken')
+def _kraken():
+    import ccxt
+    return ccxt.kraken({
+        'apiKey': get_config()['kraken']['api_key'],
+        'secret': get_config()['kraken']['secret_key'],
+    })
+
+
+@register('alpaca')
+def _alpaca(pool_size=10):
+    from alpaca_trade_api.rest import REST
+    from requests.adapters import HTTPAdapter
+    settings = get_config()['alpaca']
+    api = REST(settings['api_key'], settings['secret_key'], base_url='https://paper-api.alpaca.markets')
+    # One keep-alive pool shared by all threads using the client
+    api._session.mount('https://', HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+    return api
+
+
+@register('reddit')
+def _reddit():
+    import praw
+    settings = get_config()['reddit']
+    kwargs = {'redirect_uri': settings['redirect_uri']} if 'redirect_uri' in settings else {}
+    return praw.Reddit(
+        client_id=settings['client_id'],
+        client_secret=settings['client_secret'],
+        user_agent=settings.get('user_agent', 'trading_bot'),
+        **kwargs
+    )
+
+
+@register('twitter')
+def _twitter():
+    import tweepy
+    settings = get_config()['twitter']
+    auth = tweepy.OAuthHandler(settings['api_key'], settings['api_secret'])
+    auth.set_access_token(settings['access_token'], settings['access_token_secret'])
+    # The request timeout comes from config.yaml so every caller shares the same client.
+    # Rate limits are handled by callers (see sentiment_aggregator), never by sleeping in tweepy
+    return tweepy.API(auth, timeout=settings.get('timeout', 30), wait_on_rate_limit=False)
+
+
+@register('sentiment_model')
+def _sentiment_model():
+    # The scorer itself loads the transformer on its first classify call
+    from src.utils.score_cache import get_score_cache
+    from src.utils.sentiment_scorer import SentimentScorer
+    return SentimentScorer(cache=get_score_cache)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# One loader for every OHLCV CSV we keep under data/:
+#   - Kraken exports (data/crypto): comma separated, whitespace-padded headers
+#   - Alpaca exports (data/stocks): same padding, tz-aware timestamps, extra columns
+#   - CoinMarketCap weekly exports (data/*_market.csv): BOM, semicolons, quoted
+#     ISO timestamps, newest row first
+# Everything comes back as open/high/low/close/volume indexed by a naive UTC
+# 'timestamp', oldest row first. Parsed files are cached as .npy arrays that
+# are memory-mapped on the next load.
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+TIMESTAMP_COLUMNS = ('timestamp', 'date')
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '../../data/.cache/ohlcv')
+CACHE_VERSION = 1
+
+
+def _sniff_separator(path):
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        header = f.readline()
+    return ';' if header.count(';') > header.count(',') else ','
+
+
+def read_ohlcv_csv(path, float32=False):
+    """
+    Parses an OHLCV CSV in any of our dialects, without touching the cache.
+
+    :param path: Path to the CSV file
+    :param float32: Store prices and volume as float32 instead of float64
+    :return: DataFrame with OHLCV columns indexed by 'timestamp'
+    """
+    data = pd.read_csv(path, sep=_sniff_separator(path), encoding='utf-8-sig', skipinitialspace=True)
+    data.columns = data.columns.str.strip()
+
+    lowered = {col.lower(): col for col in data.columns}
+    date_column = next((lowered[name] for name in TIMESTAMP_COLUMNS if name in lowered), None)
+    if date_column is None:
+        raise ValueError(f"No timestamp column in {path}: {list(data.columns)}")
+    missing = [col for col in OHLCV_COLUMNS if col not in lowered]
+    if missing:
+        raise ValueError(f"Missing OHLCV columns in {path}: {missing}")
+
+    timestamps = pd.to_datetime(data[date_column].astype(str).str.strip(), utc=True, format='ISO8601', errors='coerce')
+    dtype = np.float32 if float32 else np.float64
+    frame = pd.DataFrame(
+        {col: pd.to_numeric(data[lowered[col]], errors='coerce').to_numpy(dtype=dtype) for col in OHLCV_COLUMNS},
+        index=pd.DatetimeIndex(timestamps.dt.tz_convert(None), name='timestamp'),
+    )
+    frame = frame[frame.index.notna()]
+    if not frame.index.is_monotonic_increasing:
+        frame = frame.sort_index(kind='stable')
+    return frame
+
+
+def _cache_key(path, float32):
+    stat = os.stat(path)
+    source = f"{os.path.realpath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{int(float32)}|{CACHE_VERSION}"
+    return hashlib.sha1(source.encode()).hexdigest()
+
+
+def _write_cache(frame, entry):
+    parent = os.path.dirname(entry)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent)
+    try:
+        # One (columns, rows) matrix so the DataFrame can wrap it without a copy
+        np.save(os.path.join(staging, 'values.npy'), np.ascontiguousarray(frame.to_numpy().T))
+        np.save(os.path.join(staging, 'timestamp.npy'), frame.index.asi8)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump({'columns': list(frame.columns), 'version': CACHE_VERSION}, f)
+        os.replace(staging, entry)
+    except OSError:
+        # Another process won the race, or the cache dir is read-only
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _read_cache(entry):
+    with open(os.path.join(entry, 'meta.json')) as f:
+        meta = json.load(f)
+    # mmap_mode='c' pages data in lazily; writes stay private to this process
+    values = np.load(os.path.join(entry, 'values.npy'), mmap_mode='c')
+    timestamps = np.load(os.path.join(entry, 'timestamp.npy'), mmap_mode='c')
+    index = pd.DatetimeIndex(timestamps.view('datetime64[ns]'), name='timestamp')
+    return pd.DataFrame(values.T, index=index, columns=meta['columns'], copy=False)
+
+
+def load_ohlcv(path, float32=False, cache=True, cache_dir=None):
+    """
+    Loads an OHLCV CSV, using the on-disk cache when the file has not changed.
+
+    The cache entry is keyed by the resolved source path, its mtime and size,
+    so editing or re-downloading a CSV invalidates it automatically.
+
+    :param path: Path to the CSV file
+    :param float32: Store prices and volume as float32 (half the memory)
+    :param cache: Read and write the binary cache
+    :param cache_dir: Cache location (default: data/.cache/ohlcv)
+    :return: DataFrame with OHLCV columns indexed by 'timestamp'
+    """
+    if not cache:
+        return read_ohlcv_csv(path, float32)
+
+    entry = os.path.join(cache_dir or CACHE_DIR, _cache_key(path, float32))
+    if os.path.isdir(entry):
+        try:
+            return _read_cache(entry)
+        except (OSError, ValueError, KeyError):
+            shutil.rmtree(entry, ignore_errors=True)
+
+    frame = read_ohlcv_csv(path, float32)
+    _write_cache(frame, entry)
+    return frame
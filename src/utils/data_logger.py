@@ -1,15 +1,65 @@
+import atexit
 import logging
 import os
+import threading
+import time
 
-# Set up the logging configuration
+from src.utils.event_recorder import EventRecorder
+
+# log_trade writes the same 'Signal: ..., Decision: ..., Execution Price: ...'
+# lines to trade_log.txt as always, and also appends a signal record to a
+# shared EventRecorder, whose writer thread keeps the columnar copy under
+# data/trade_events (see read_events). The recorder is safe to share between
+# threads and writes every trade within FLUSH_INTERVAL seconds, not only when
+# a chunk fills.
 log_file_path = os.path.join(os.path.dirname(__file__), '../../data/trade_log.txt')
-logging.basicConfig(
-    filename=log_file_path,
-    filemode='w',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
-
-def log_trade(signal, decision, execution_price):
-    """Logs trade signal, decision, and execution details."""
-    logging.info(f"Signal: {signal}, Decision: {decision}, Execution Price: {execution_price}")
+EVENTS_DIR = os.path.join(os.path.dirname(__file__), '../../data/trade_events')
+
+FLUSH_INTERVAL = 1.0
+
+logger = logging.getLogger('trades')
+
+_default_recorder = None
+_init_lock = threading.Lock()
+
+
+def get_trade_recorder():
+    global _default_recorder
+    if _default_recorder is not None:
+        return _default_recorder
+    with _init_lock:
+        if _default_recorder is not None:
+            return _default_recorder
+        handler = logging.FileHandler(log_file_path, mode='w')
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        # No logger on the recorder: log_trade writes the text lines itself, signal text included
+        recorder = EventRecorder(EVENTS_DIR, flush_interval=FLUSH_INTERVAL)
+        atexit.register(recorder.close)
+        _default_recorder = recorder
+    return _default_recorder
+
+
+def log_trade(signal, decision, execution_price, timestamp=None):
+    """
+    Logs trade signal, decision, and execution details.
+
+    :param signal: Signal behind the decision; a numeric one is also stored as the record's indicator
+    :param decision: 'buy' or 'sell' (any other decision, e.g. 'hold', is recorded with side 0)
+    :param execution_price: Execution price
+    :param timestamp: Epoch seconds of the record; defaults to now
+    """
+    recorder = get_trade_recorder()
+    logger.info("Signal: %s, Decision: %s, Execution Price: %s", signal, decision, execution_price)
+    side = {'buy': 1, 'sell': -1}.get(str(decision).lower(), 0)
+    recorder.signal(time.time() if timestamp is None else timestamp, side, _number(execution_price),
+                    indicator=_number(signal))
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
@@ -1,46 +1,30 @@
-from web3 import Web3
-import json
+import logging
 import os
-import yaml
-
-# Load configuration from config.yaml
-config_path = os.path.join(os.path.dirname(__file__), '../../config/config.yaml')
-with open(config_path, 'r') as file:
-    config = yaml.safe_load(file)
-
-# Connect to Ethereum using Infura
-infura_url = config['web3']['infura_url']
-web3 = Web3(Web3.HTTPProvider(infura_url))
-
-# Check if connected to the Ethereum network
-if not web3.is_connected():  # Updated method name
-    print("Failed to connect to the Ethereum network. Check your Infura URL.")
-else:
-    print("Successfully connected to the Ethereum network.")
-
-# Convert contract addresses to checksummed addresses
-aave_address = Web3.to_checksum_address(config['aave']['contract_address'])  # Corrected method name
-compound_address = Web3.to_checksum_address(config['compound']['contract_address'])  # Corrected method name
-
-# Load ABIs
-with open(config['aave']['abi_path'], 'r') as abi_file:
-    aave_abi = json.load(abi_file)
-
-with open(config['compound']['abi_path'], 'r') as abi_file:
-    compound_abi = json.load(abi_file)
-
-# Create contract instances
-try:
-    aave_contract = web3.eth.contract(address=aave_address, abi=aave_abi)
-    print(f"Connected to Aave contract at {aave_address}")
-except Exception as e:
-    print(f"Error connecting to Aave contract: {e}")
-
-try:
-    compound_contract = web3.eth.contract(address=compound_address, abi=compound_abi)
-    print(f"Connected to Compound contract at {compound_address}")
-except Exception as e:
-    print(f"Error connecting to Compound contract: {e}")
+import sys
+
+# Add the project root directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.defi.yield_oracle import running_yield_oracle
+from src.utils.clients import get_client
+
+# Web3 and the Aave/Compound contracts are built on first use (see src/utils/clients.py),
+# so importing this module does no network or disk work
+
+
+def get_web3():
+    web3 = get_client('web3')
+    if not web3.is_connected():
+        logging.error("Failed to connect to the Ethereum network. Check your Infura URL.")
+    return web3
+
+
+def get_aave_contract():
+    return get_client('aave')
+
+
+def get_compound_contract():
+    return get_client('compound')
 
 # Function to invest in Aave
 def invest_in_aave(amount):
@@ -58,17 +42,45 @@ def invest_in_compound(amount):
     except Exception as e:
         print(f"Error investing in Compound: {e}")
 
+# Example yields (percent) used until an oracle has fresh rates
+FALLBACK_YIELDS = {'aave': 3.0, 'compound': 4.0}
+
+# Pass as the oracle to use the shared live oracle when one is running. Live
+# code only: the live oracle ignores ``now`` and serves today's rates
+LIVE_ORACLE = 'live'
+
+
 # Function to check yield rates and make reinvestment decisions
-def check_yield_and_reinvest():
+def check_yield_and_reinvest(oracle=None, amount=100, now=None):
+    """
+    Reinvests ``amount`` in whichever of Aave and Compound pays the higher supply APY.
+
+    Rates come from memory only, and nothing here waits on RPC. Without an
+    oracle the decision uses FALLBACK_YIELDS, so a backtest without recorded
+    rates stays reproducible even if a live oracle runs in the same process.
+    The shared live oracle (see src/defi/yield_oracle.py) is only consulted
+    when asked for with LIVE_ORACLE; it ignores ``now``, so it must not be
+    used for past bars.
+
+    :param oracle: ReplayYieldOracle (backtests), LIVE_ORACLE (live trading), or None for FALLBACK_YIELDS
+    :param now: Bar time, for replayed rates
+    :return: The protocol invested in
+    """
     try:
-        # Compare yield rates between Aave and Compound
-        # For now, we simulate this decision-making process
-        aave_yield = 0.03  # Example yield rate
-        compound_yield = 0.04  # Example yield rate
+        if oracle == LIVE_ORACLE:
+            oracle = running_yield_oracle()
+        yields = FALLBACK_YIELDS
+        if oracle is not None:
+            rates = {protocol: oracle.supply_apy(protocol, now=now) for protocol in FALLBACK_YIELDS}
+            # Compare like with like: both protocols' rates, or only the examples
+            if None not in rates.values():
+                yields = rates
+        aave_yield, compound_yield = yields['aave'], yields['compound']
 
         if compound_yield > aave_yield:
-            invest_in_compound(100)  # Example amount
-        else:
-            invest_in_aave(100)  # Example amount
+            invest_in_compound(amount)
+            return 'compound'
+        invest_in_aave(amount)
+        return 'aave'
     except Exception as e:
         print(f"Error checking yield rates: {e}")
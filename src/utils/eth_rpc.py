@@ -0,0 +1,162 @@
+import itertools
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Minimal Ethereum JSON-RPC client for bulk reads.
+#
+# web3.py sends one HTTP request per call; here many calls share one request
+# (a JSON-RPC batch) and every request reuses a keep-alive connection pool,
+# so reading thousands of balances costs a handful of round trips. Multicall3
+# is supported as an alternative for providers that cap batch sizes.
+
+# Multicall3, deployed at the same address on mainnet and most EVM chains
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+
+# aggregate((address,bytes)[]) and getEthBalance(address) selectors
+AGGREGATE_SELECTOR = '252dba42'
+GET_ETH_BALANCE_SELECTOR = '4d2301cc'
+
+WEI_PER_ETH = 10 ** 18
+
+
+class RPCError(Exception):
+
+    def __init__(self, error, method=None):
+        self.code = error.get('code') if isinstance(error, dict) else None
+        message = error.get('message') if isinstance(error, dict) else str(error)
+        super().__init__(f"{method}: {message}" if method else message)
+
+
+def block_tag(block):
+    """'latest'/'pending' pass through; block numbers become hex quantities."""
+    return block if isinstance(block, str) else hex(block)
+
+
+class EthRPC:
+
+    def __init__(self, url, pool_size=10, timeout=30, session=None):
+        """
+        :param url: HTTP JSON-RPC endpoint (e.g. the Infura URL from config.yaml)
+        :param pool_size: Keep-alive connections kept open to the endpoint
+        :param timeout: Seconds per HTTP request
+        :param session: requests.Session to use instead of a new pooled one
+        """
+        self.url = url
+        self.timeout = timeout
+        self.requests_sent = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+
+    def _post(self, payload):
+        with self._lock:
+            self.requests_sent += 1
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def call(self, method, params=()):
+        """Sends a single JSON-RPC request and returns its result."""
+        reply = self._post({'jsonrpc': '2.0', 'id': next(self._ids), 'method': method, 'params': list(params)})
+        if reply.get('error'):
+            raise RPCError(reply['error'], method)
+        return reply['result']
+
+    def batch(self, calls):
+        """
+        Sends many calls in one JSON-RPC batch request.
+
+        :param calls: List of (method, params)
+        :return: Results in the order of ``calls``
+        """
+        if not calls:
+            return []
+        ids = [next(self._ids) for _ in calls]
+        replies = self._post([{'jsonrpc': '2.0', 'id': i, 'method': method, 'params': list(params)}
+                              for i, (method, params) in zip(ids, calls)])
+        if isinstance(replies, dict):
+            raise RPCError(replies.get('error', replies), 'batch')
+        # Servers may answer a batch in any order
+        by_id = {reply.get('id'): reply for reply in replies}
+        results = []
+        for i, (method, _) in zip(ids, calls):
+            reply = by_id.get(i)
+            if reply is None:
+                raise RPCError({'message': f"no reply for request {i}"}, method)
+            if reply.get('error'):
+                raise RPCError(reply['error'], method)
+            results.append(reply['result'])
+        return results
+
+    def block_number(self):
+        return int(self.call('eth_blockNumber'), 16)
+
+    def get_balances(self, addresses, block='latest'):
+        """Balances in wei for ``addresses`` at ``block``, in one batch request."""
+        results = self.batch([('eth_getBalance', (address, block_tag(block))) for address in addresses])
+        return [int(result, 16) for result in results]
+
+    def multicall_balances(self, addresses, block='latest', multicall=MULTICALL3_ADDRESS):
+        """Balances in wei for ``addresses`` at ``block``, in one Multicall3 eth_call."""
+        data = encode_aggregate([(multicall, GET_ETH_BALANCE_SELECTOR + _word(int(address, 16)))
+                                 for address in addresses])
+        result = self.call('eth_call', ({'to': multicall, 'data': data}, block_tag(block)))
+        _, return_data = decode_aggregate(result)
+        return [int(item.hex() or '0', 16) for item in return_data]
+
+
+def _word(value):
+    return format(value, '064x')
+
+
+def _padded(hex_data):
+    return hex_data + '0' * (-len(hex_data) % 64)
+
+
+def encode_aggregate(calls):
+    """
+    ABI-encodes Multicall3 aggregate((address target, bytes callData)[]).
+
+    :param calls: List of (target address, calldata hex without 0x)
+    :return: Calldata hex string with 0x prefix
+    """
+    tuples = []
+    for target, calldata in calls:
+        calldata = calldata[2:] if calldata.startswith('0x') else calldata
+        # (address, offset of bytes = 2 words, bytes length, bytes padded to words)
+        tuples.append(_word(int(target, 16)) + _word(64) + _word(len(calldata) // 2) + _padded(calldata))
+
+    offsets, position = [], 32 * len(tuples)
+    for encoded in tuples:
+        offsets.append(_word(position))
+        position += len(encoded) // 2
+    return '0x' + AGGREGATE_SELECTOR + _word(32) + _word(len(tuples)) + ''.join(offsets) + ''.join(tuples)
+
+
+def decode_aggregate(result):
+    """
+    Decodes the (uint256 blockNumber, bytes[] returnData) returned by aggregate.
+
+    :return: (block number, list of bytes)
+    """
+    raw = bytes.fromhex(result[2:] if result.startswith('0x') else result)
+
+    def word(offset):
+        return int.from_bytes(raw[offset:offset + 32], 'big')
+
+    block = word(0)
+    array = word(32)
+    count = word(array)
+    items = []
+    for i in range(count):
+        start = array + 32 + word(array + 32 + 32 * i)
+        length = word(start)
+        items.append(raw[start + 32:start + 32 + length])
+    return block, items
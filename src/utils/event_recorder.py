@@ -0,0 +1,314 @@
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from time import monotonic
+
+import numpy as np
+import pandas as pd
+
+# Structured trade/event recording for strategies and the live runner.
+#
+# Records are typed rows (bar snapshots, signals, orders, fills) stored as
+# plain tuples in preallocated chunks, which is all the hot path pays for. A
+# full chunk is handed to a background thread, which packs it into a numpy
+# structured array, appends every column to its own raw file
+# (<path>/<kind>/<field>.bin, described by <path>/schema.json) in one write,
+# and returns the chunk to the pool. The chunks of a kind form a ring: if the
+# writer thread falls behind and every chunk is waiting, the recording side
+# blocks instead of dropping trades. So that a quiet stream (a few trades an
+# hour) still reaches disk, the writer thread also takes over any partly
+# filled chunk every ``flush_interval`` seconds.
+#
+# Appends and hand-offs happen under one lock, uncontended in the usual case
+# of a single producer (a strategy or the live loop), so several threads may
+# also share a recorder, as log_trade does.
+#
+# Nothing is formatted on the hot path. Like logging, every kind has a level
+# (bars are DEBUG, the rest INFO): below the recorder's level a record is
+# never built, and callers check the cheap ``recorder.debug`` / ``recorder.info``
+# flags before touching indicator values. Human-readable lines are only
+# produced on the writer thread, and only if the attached logger wants them.
+
+RECORD_TYPES = {
+    'bar': [('seq', 'i8'), ('time', 'f8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'),
+            ('volume', 'f8'), ('indicator', 'f8')],
+    'signal': [('seq', 'i8'), ('time', 'f8'), ('side', 'i1'), ('reason', 'u1'), ('price', 'f8'), ('indicator', 'f8')],
+    'order': [('seq', 'i8'), ('time', 'f8'), ('ref', 'i8'), ('status', 'u1'), ('size', 'f8'), ('price', 'f8')],
+    'fill': [('seq', 'i8'), ('time', 'f8'), ('ref', 'i8'), ('size', 'f8'), ('price', 'f8'), ('value', 'f8'),
+             ('commission', 'f8')],
+}
+
+LEVELS = {'bar': logging.DEBUG, 'signal': logging.INFO, 'order': logging.INFO, 'fill': logging.INFO}
+
+# Codes stored in the signal.side (buy, sell, or neither, e.g. a 'hold'
+# passed to log_trade), signal.reason and order.status columns
+SIDES = {1: 'BUY', -1: 'SELL', 0: 'NONE'}
+REASONS = ('entry', 'exit', 'stop_loss', 'take_profit')
+ORDER_STATUS = ('Created', 'Submitted', 'Accepted', 'Partial', 'Completed', 'Canceled', 'Expired', 'Margin', 'Rejected')
+
+FORMATS = {
+    'bar': "{time} bar open={open:.2f} high={high:.2f} low={low:.2f} close={close:.2f} volume={volume:.4f} "
+           "indicator={indicator:.4f}",
+    'signal': "{time} signal {side} ({reason}) at {price:.2f}, indicator {indicator:.4f}",
+    'order': "{time} order {ref} {status}: {size:+g} at {price:.2f}",
+    'fill': "{time} fill {ref}: {size:+g} at {price:.2f} (value {value:.2f}, commission {commission:.2f})",
+}
+
+# backtrader stores datetimes as days since 0001-01-01 (plus one)
+BT_EPOCH = 719163.0   # bt.date2num(datetime(1970, 1, 1))
+
+_DTYPES = {kind: np.dtype(fields) for kind, fields in RECORD_TYPES.items()}
+
+_NAN = float('nan')
+
+
+def bt_time(num):
+    """backtrader date number (e.g. self.data.datetime[0]) to epoch seconds."""
+    return (num - BT_EPOCH) * 86400.0
+
+
+def format_record(kind, row):
+    """Human-readable line for one record (a row of a chunk or of read_events)."""
+    fields = {name: row[name] for name in _DTYPES[kind].names}
+    fields['time'] = datetime.fromtimestamp(float(fields['time']), timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    if kind == 'signal':
+        fields['side'] = SIDES[int(fields['side'])]
+        fields['reason'] = REASONS[fields['reason']]
+    elif kind == 'order':
+        fields['status'] = ORDER_STATUS[fields['status']]
+    return FORMATS[kind].format(**fields)
+
+
+class _Chunk:
+    __slots__ = ('kind', 'rows', 'n')
+
+    def __init__(self, kind, size):
+        self.kind = kind
+        self.rows = [None] * size
+        self.n = 0
+
+
+class EventRecorder:
+    """Buffers typed trading records and writes them out in bulk from a background thread."""
+
+    def __init__(self, path=None, level=logging.INFO, logger=None, chunk_size=4096, chunks=4, flush_interval=1.0):
+        """
+        :param path: Directory for the columnar files; None keeps the records in memory (see frame())
+        :param level: Lowest level recorded; logging.DEBUG also records a snapshot of every bar
+        :param logger: Logger that gets a formatted line per record it is enabled for, written off the hot path
+        :param chunk_size: Records per chunk
+        :param chunks: Chunks per record kind; the recording side blocks when all are waiting to be written
+        :param flush_interval: Seconds after which records in a partly filled chunk are written; None waits
+                               for full chunks, flush() or close()
+        """
+        self.path = path
+        self.level = level
+        self.logger = logger
+        self.debug = level <= logging.DEBUG
+        self.info = level <= logging.INFO
+        self.counts = dict.fromkeys(RECORD_TYPES, 0)
+        self._seq = 0
+        self._free = {kind: queue.Queue() for kind in RECORD_TYPES}
+        for kind in RECORD_TYPES:
+            for _ in range(chunks - 1):
+                self._free[kind].put(_Chunk(kind, chunk_size))
+        self._active = {kind: _Chunk(kind, chunk_size) for kind in RECORD_TYPES}
+        self._memory = {kind: [] for kind in RECORD_TYPES}
+        self._files = {}
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+        self.flush_interval = flush_interval
+        self.closed = False
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, 'schema.json'), 'w') as f:
+                json.dump({kind: [[name, dtype.str] for name, (dtype, _) in _DTYPES[kind].fields.items()]
+                           for kind in RECORD_TYPES}, f, indent=2)
+            for kind, dtype in _DTYPES.items():
+                os.makedirs(os.path.join(path, kind), exist_ok=True)
+                for name in dtype.names:
+                    self._files[kind, name] = open(os.path.join(path, kind, f"{name}.bin"), 'wb')
+        self._thread = threading.Thread(target=self._write_loop, name='event-recorder', daemon=True)
+        self._thread.start()
+
+    def _append(self, kind, row):
+        # Called with self._lock held
+        chunk = self._active[kind]
+        chunk.rows[chunk.n] = row
+        chunk.n += 1
+        if chunk.n == len(chunk.rows):
+            self._hand_off(kind)
+
+    def _next_seq(self):
+        self._seq += 1
+        return self._seq
+
+    def _hand_off(self, kind):
+        chunk = self._active[kind]
+        self._pending.put(chunk)
+        self._active[kind] = self._free[kind].get()
+
+    # Recording, one method per record type. They do no gating themselves:
+    # check recorder.debug (bars) or recorder.info (the rest) first.
+
+    def bar(self, time, open_, high, low, close, volume=0.0, indicator=_NAN):
+        with self._lock:
+            self._append('bar', (self._next_seq(), time, open_, high, low, close, volume, indicator))
+
+    def signal(self, time, side, price, reason='entry', indicator=_NAN):
+        side, reason = (side > 0) - (side < 0), REASONS.index(reason)
+        with self._lock:
+            self._append('signal', (self._next_seq(), time, side, reason, price, indicator))
+
+    def order(self, time, ref, status, size, price=_NAN):
+        status = ORDER_STATUS.index(status)
+        with self._lock:
+            self._append('order', (self._next_seq(), time, ref, status, size, price))
+
+    def fill(self, time, ref, size, price, value=_NAN, commission=0.0):
+        with self._lock:
+            self._append('fill', (self._next_seq(), time, ref, size, price, value, commission))
+
+    def _hand_off_partial(self):
+        """Writer side of flush_interval: queues every partly filled chunk that has a spare to replace it."""
+        # A producer blocked on a free chunk holds the lock until this thread
+        # frees one, so never wait for it indefinitely
+        if not self._lock.acquire(timeout=0.1):
+            return
+        try:
+            for kind, chunk in self._active.items():
+                if not chunk.n:
+                    continue
+                try:
+                    spare = self._free[kind].get_nowait()
+                except queue.Empty:
+                    continue  # every other chunk is queued and written first; retried next interval
+                self._pending.put(chunk)
+                self._active[kind] = spare
+        finally:
+            self._lock.release()
+
+    def _write_loop(self):
+        interval = self.flush_interval
+        deadline = None if interval is None else monotonic() + interval
+        while True:
+            if deadline is not None and monotonic() >= deadline:
+                self._hand_off_partial()
+                deadline = monotonic() + interval
+            try:
+                chunk = self._pending.get(timeout=None if deadline is None else max(0.0, deadline - monotonic()))
+            except queue.Empty:
+                continue
+            if chunk is None:
+                self._pending.task_done()
+                return
+            try:
+                self._write(chunk)
+            except Exception:
+                logging.exception("Failed to write %d %s records", chunk.n, chunk.kind)
+            finally:
+                chunk.n = 0
+                chunk.rows[:] = [None] * len(chunk.rows)
+                self._free[chunk.kind].put(chunk)
+                self._pending.task_done()
+
+    def _write(self, chunk):
+        kind = chunk.kind
+        rows = np.array(chunk.rows[:chunk.n], dtype=_DTYPES[kind])
+        self.counts[kind] += len(rows)
+        if self.path is None:
+            self._memory[kind].append(rows)
+        else:
+            for name in rows.dtype.names:
+                f = self._files[kind, name]
+                f.write(np.ascontiguousarray(rows[name]).tobytes())
+                f.flush()
+        if self.logger is not None and self.logger.isEnabledFor(LEVELS[kind]):
+            for row in rows:
+                self.logger.log(LEVELS[kind], format_record(kind, row))
+
+    def flush(self):
+        """Hands over the partly filled chunks and waits until everything recorded so far is written."""
+        with self._lock:
+            for kind, chunk in self._active.items():
+                if chunk.n:
+                    self._hand_off(kind)
+        self._pending.join()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        self._pending.put(None)
+        self._thread.join()
+        for f in self._files.values():
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def frame(self, kind):
+        """Records of one kind written so far, as a DataFrame (see read_events)."""
+        if self.path is not None:
+            return read_events(self.path, kind)
+        self.flush()
+        rows = self._memory[kind]
+        return _to_frame(np.concatenate(rows) if rows else np.zeros(0, dtype=_DTYPES[kind]))
+
+
+def _to_frame(rows):
+    frame = pd.DataFrame({name: rows[name] for name in rows.dtype.names})
+    frame['time'] = pd.to_datetime(frame['time'], unit='s')
+    return frame
+
+
+def read_events(path, kind):
+    """
+    Loads one record kind from a recorder directory.
+
+    :param path: Directory an EventRecorder wrote to
+    :param kind: 'bar', 'signal', 'order' or 'fill'
+    :return: DataFrame with one column per field, 'time' as datetime
+    """
+    with open(os.path.join(path, 'schema.json')) as f:
+        fields = json.load(f)[kind]
+    columns = {name: np.fromfile(os.path.join(path, kind, f"{name}.bin"), dtype=np.dtype(dtype)) for name, dtype in fields}
+    n = min(len(column) for column in columns.values())   # a crash mid-write can leave columns uneven
+    rows = np.zeros(n, dtype=np.dtype([(name, np.dtype(dtype)) for name, dtype in fields]))
+    for name, column in columns.items():
+        rows[name] = column[:n]
+    return _to_frame(rows)
+
+
+def record_bt_order(recorder, order, time):
+    """
+    Records a backtrader order notification, and its fill once completed.
+
+    :param recorder: EventRecorder (checked for the info level here)
+    :param order: bt.Order passed to notify_order
+    :param time: Epoch seconds of the current bar (see bt_time)
+    """
+    if not recorder.info:
+        return
+    size = order.size if order.isbuy() else -abs(order.size)
+    recorder.order(time, order.ref, order.getstatusname(), size, order.created.price)
+    if order.status == order.Completed:
+        executed = order.executed
+        recorder.fill(time, order.ref, executed.size, executed.price, executed.value, executed.comm)
+
+
+class _Disabled:
+    """Stand-in when nothing is recorded; every level flag is off."""
+    debug = False
+    info = False
+
+
+NULL_RECORDER = _Disabled()
@@ -0,0 +1,163 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.engine.cerebro import PandasData
+from src.utils.data_loader import TIMESTAMP_COLUMNS
+
+# Point-in-time feature frames for backtests.
+#
+# Each signal (sentiment per source, whale flows, DeFi yields, ...) is a
+# timestamped history where the timestamp is when the value became known.
+# Signals are as-of joined onto the OHLCV bars: every bar gets the latest
+# value known at or before its own timestamp, never a later one. The frame
+# is built once from files on disk, so starting a backtest does no network
+# or model work; feature_data then exposes the signal columns as extra lines.
+
+_feed_classes = {}
+
+
+def line_name(name):
+    """Turns a signal name like 'reddit/cryptocurrency' into a valid line name."""
+    name = re.sub(r'\W+', '_', str(name).strip()).strip('_').lower()
+    return f"f_{name}" if not name or name[0].isdigit() else name
+
+
+def _naive_utc(timestamps):
+    timestamps = pd.DatetimeIndex(timestamps)
+    return timestamps.tz_convert(None) if timestamps.tz is not None else timestamps
+
+
+def read_signal_csv(path):
+    """
+    Reads a timestamped signal CSV (e.g. data/sentiment/BTC_sentiment.csv).
+
+    :param path: CSV with a 'timestamp' or 'date' column and one or more value columns
+    :return: DataFrame of numeric columns indexed by naive UTC timestamp, oldest first
+    """
+    data = pd.read_csv(path, encoding='utf-8-sig', skipinitialspace=True)
+    data.columns = data.columns.str.strip()
+    lowered = {col.lower(): col for col in data.columns}
+    date_column = next((lowered[name] for name in TIMESTAMP_COLUMNS if name in lowered), None)
+    if date_column is None:
+        raise ValueError(f"No timestamp column in {path}: {list(data.columns)}")
+
+    timestamps = pd.to_datetime(data.pop(date_column).astype(str).str.strip(), utc=True, format='ISO8601', errors='coerce')
+    frame = data.apply(pd.to_numeric, errors='coerce')
+    frame.index = pd.DatetimeIndex(timestamps.dt.tz_convert(None), name='timestamp')
+    frame = frame[frame.index.notna()]
+    return frame.sort_index(kind='stable')
+
+
+def asof_indexer(bar_times, signal_times, delay=None, max_age=None):
+    """
+    For every bar, the position of the latest signal row known at that bar.
+
+    :param bar_times: Sorted bar timestamps
+    :param signal_times: Sorted timestamps at which the signal values were published
+    :param delay: Extra time before a value may be used (e.g. publication lag)
+    :param max_age: Values older than this are treated as missing
+    :return: int64 array of row positions, -1 where nothing is known yet (or it is stale)
+    """
+    bars = _naive_utc(bar_times).asi8
+    known = _naive_utc(signal_times)
+    if delay is not None:
+        known = known + pd.Timedelta(delay)
+    known = known.asi8
+
+    positions = np.searchsorted(known, bars, side='right') - 1
+    if max_age is not None and len(known):
+        age = bars - known[np.maximum(positions, 0)]
+        positions[age > pd.Timedelta(max_age).value] = -1
+    return positions
+
+
+def asof_join(bar_times, signal, delay=None, max_age=None, fill=np.nan):
+    """
+    Aligns one signal onto bar timestamps without lookahead.
+
+    :param bar_times: Sorted bar timestamps
+    :param signal: Series or DataFrame indexed by publication time
+    :param delay: See asof_indexer
+    :param max_age: See asof_indexer
+    :param fill: Value used before the first known value and for stale ones
+    :return: Series or DataFrame indexed like ``bar_times``
+    """
+    if not signal.index.is_monotonic_increasing:
+        signal = signal.sort_index(kind='stable')
+    positions = asof_indexer(bar_times, signal.index, delay, max_age)
+    missing = positions < 0
+
+    values = signal.to_numpy(dtype=np.float64)
+    if len(values):
+        aligned = values[np.maximum(positions, 0)]
+        aligned[missing] = fill
+    else:
+        aligned = np.full((len(positions),) + values.shape[1:], fill, dtype=np.float64)
+
+    if isinstance(signal, pd.DataFrame):
+        return pd.DataFrame(aligned, index=bar_times, columns=signal.columns)
+    return pd.Series(aligned, index=bar_times, name=signal.name)
+
+
+def build_feature_frame(ohlcv, signals, delay=None, max_age=None, fill=0.0):
+    """
+    Joins any number of signals onto an OHLCV frame.
+
+    :param ohlcv: OHLCV DataFrame indexed by timestamp, oldest first (see load_ohlcv)
+    :param signals: Mapping of name to a Series, a DataFrame or the path of a signal CSV.
+                    A single-column signal becomes column ``name``; wider ones become
+                    ``name_column``
+    :param delay: Publication lag applied to every signal, or a mapping of name to lag
+    :param max_age: Staleness limit for every signal, or a mapping of name to limit
+    :param fill: Value for bars with no known (or only stale) signal value
+    :return: Copy of ``ohlcv`` with one extra column per signal value
+    """
+    frame = ohlcv.copy()
+    for name, signal in signals.items():
+        if isinstance(signal, str):
+            signal = read_signal_csv(signal)
+        signal_delay = delay.get(name) if isinstance(delay, dict) else delay
+        signal_max_age = max_age.get(name) if isinstance(max_age, dict) else max_age
+        aligned = asof_join(frame.index, signal, signal_delay, signal_max_age, fill)
+
+        if isinstance(aligned, pd.Series):
+            frame[line_name(name)] = aligned.to_numpy()
+        elif aligned.shape[1] == 1:
+            frame[line_name(name)] = aligned.iloc[:, 0].to_numpy()
+        else:
+            for column in aligned.columns:
+                frame[line_name(f"{name}_{column}")] = aligned[column].to_numpy()
+    return frame
+
+
+def feature_columns(frame):
+    """Columns of a feature frame beyond open/high/low/close/volume."""
+    base = {'open', 'high', 'low', 'close', 'volume', 'openinterest'}
+    return [col for col in frame.columns if col not in base]
+
+
+def feature_data_class(columns):
+    """
+    PandasData subclass with one extra line per feature column, like
+    PandasDataWithSentiment but for any set of signals.
+    """
+    columns = tuple(columns)
+    if columns not in _feed_classes:
+        namespace = {'lines': columns, 'params': tuple((col, col) for col in columns)}
+        # Build through backtrader's metaclass so lines and params are registered
+        _feed_classes[columns] = type(PandasData)('FeatureData', (PandasData,), namespace)
+    return _feed_classes[columns]
+
+
+def feature_data(dataname, columns=None, **kwargs):
+    """
+    Backtrader feed over a feature frame; signals are available as
+    ``self.data.<column>`` in the strategy.
+
+    :param dataname: Frame returned by build_feature_frame
+    :param columns: Feature columns to expose (default: all of them)
+    """
+    columns = feature_columns(dataname) if columns is None else columns
+    return feature_data_class(columns)(dataname=dataname, **kwargs)
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket shared by concurrent asyncio tasks.
+
+    Up to ``burst`` requests go out immediately, after which callers are held
+    back to ``rate`` requests per second. Waiting happens with asyncio.sleep,
+    so a throttled task never blocks the event loop.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # Created lazily so the bucket can be built outside a running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1.0:
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1.0
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
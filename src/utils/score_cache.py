@@ -0,0 +1,137 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# On-disk cache of sentiment scores, shared by every scorer we run.
+#
+# Entries are keyed by sha256(scorer, revision, text), so the same headline is
+# scored once per model version no matter which module sees it first. Values
+# are either a float (TextBlob polarity) or a {'label', 'score'} dict
+# (transformer pipelines). The least recently used entries are evicted once
+# the cache grows past ``max_entries``.
+
+CACHE_PATH = os.path.join(os.path.dirname(__file__), '../../data/.cache/sentiment.sqlite')
+
+# SQLite limits the number of bound parameters per statement
+_BATCH = 500
+
+_default_cache = None
+_init_lock = threading.Lock()
+
+
+def text_key(scorer, revision, text):
+    return hashlib.sha256(f"{scorer}\x00{revision}\x00{text}".encode()).digest()
+
+
+class ScoreCache:
+
+    def __init__(self, path=CACHE_PATH, max_entries=1_000_000):
+        """
+        :param path: SQLite file (':memory:' for a throwaway cache)
+        :param max_entries: Entries kept before LRU eviction
+        """
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " key BLOB PRIMARY KEY, label TEXT, score REAL NOT NULL, last_used REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+        self._count = self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def __len__(self):
+        return self._count
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'entries': self._count,
+                'hit_rate': self.hits / total if total else 0.0}
+
+    def get_many(self, scorer, revision, texts):
+        """
+        Looks up many texts at once.
+
+        :return: Dict of text to cached value, for the texts that were found
+        """
+        keys = {text_key(scorer, revision, text): text for text in set(texts)}
+        found = {}
+        now = time.time()
+        with self._lock:
+            key_list = list(keys)
+            for i in range(0, len(key_list), _BATCH):
+                batch = key_list[i:i + _BATCH]
+                marks = ','.join('?' * len(batch))
+                rows = self._db.execute(f"SELECT key, label, score FROM scores WHERE key IN ({marks})", batch).fetchall()
+                for key, label, score in rows:
+                    found[keys[key]] = score if label is None else {'label': label, 'score': score}
+                self._db.execute(f"UPDATE scores SET last_used = ? WHERE key IN ({marks})", [now, *batch])
+            self._db.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, scorer, revision, values):
+        """
+        Stores scores, then evicts least recently used entries beyond max_entries.
+
+        :param values: Dict of text to a float or a {'label', 'score'} dict
+        """
+        now = time.time()
+        rows = []
+        for text, value in values.items():
+            label, score = (value['label'], value['score']) if isinstance(value, dict) else (None, value)
+            rows.append((text_key(scorer, revision, text), label, float(score), now))
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO scores VALUES (?, ?, ?, ?)", rows)
+            self._count += self._db.total_changes - before
+            excess = self._count - self.max_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)", (excess,))
+                self._count -= excess
+            self._db.commit()
+
+    def cached(self, scorer, revision, texts, compute):
+        """
+        Returns scores for ``texts``, calling ``compute`` only for unseen ones.
+
+        :param scorer: Scorer name (e.g. 'textblob' or a model id)
+        :param revision: Scorer/model version; a new revision gets fresh entries
+        :param texts: List of strings
+        :param compute: Callable taking a list of texts and returning their values
+        :return: List of values in the order of ``texts``
+        """
+        texts = list(texts)
+        found = self.get_many(scorer, revision, texts)
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        if missing:
+            computed = dict(zip(missing, compute(missing)))
+            self.put_many(scorer, revision, computed)
+            found.update(computed)
+        return [found[text] for text in texts]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# Shared cache under data/.cache, opened on first use; threads scoring at once share one connection
+def get_score_cache():
+    global _default_cache
+    if _default_cache is not None:
+        return _default_cache
+    with _init_lock:
+        if _default_cache is None:
+            _default_cache = ScoreCache()
+    return _default_cache
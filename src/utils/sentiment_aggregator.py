@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Concurrent fan-out over sentiment sources.
+#
+# Every source is a blocking fetch (praw, requests, tweepy) that returns a
+# list of texts. Fetches run side by side on a private thread pool while the
+# event loop only awaits them, so total latency is that of the slowest source
+# rather than the sum. Retry backoff uses asyncio.sleep and never blocks the
+# loop; a source that fails or overruns its timeout is reported in 'errors'
+# and the rest are still scored, in one batch.
+
+
+class SentimentSource:
+
+    def __init__(self, name, fetch, timeout=10.0, retries=0, backoff=1.0, retry_on=(Exception,)):
+        """
+        :param name: Label used in the results (e.g. 'reddit/cryptocurrency')
+        :param fetch: Blocking zero-argument callable returning a list of texts
+        :param timeout: Seconds allowed for this source, retries included
+        :param retries: Extra attempts after a failure listed in ``retry_on``
+        :param backoff: Delay before the first retry, doubled on each attempt
+        :param retry_on: Exception types worth retrying (e.g. rate limits)
+        """
+        self.name = name
+        self.fetch = fetch
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_on = retry_on
+
+    async def run(self, executor):
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            try:
+                return list(await loop.run_in_executor(executor, self.fetch))
+            except self.retry_on as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logging.debug("%s failed (%s), retrying in %.1fs", self.name, e, delay)
+                await asyncio.sleep(delay)
+
+
+async def _timed(source, executor):
+    return await asyncio.wait_for(source.run(executor), source.timeout)
+
+
+async def aggregate_sentiment(sources, score):
+    """
+    Fetches every source concurrently and scores all texts in one batch.
+
+    :param sources: List of SentimentSource
+    :param score: Callable taking a list of texts and returning signed scores
+    :return: Dict with 'overall' (mean over all texts), 'by_source' means,
+             'counts' per source, 'errors' per failed source and 'elapsed' seconds
+    """
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max(1, len(sources)), thread_name_prefix='sentiment')
+    try:
+        results = await asyncio.gather(*(_timed(source, executor) for source in sources), return_exceptions=True)
+    finally:
+        # Don't wait for fetches that timed out; their threads finish on their own
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    texts, errors = {}, {}
+    for source, result in zip(sources, results):
+        if isinstance(result, BaseException):
+            errors[source.name] = 'timeout' if isinstance(result, asyncio.TimeoutError) else repr(result)
+            logging.error("Sentiment source %s failed: %s", source.name, errors[source.name])
+        else:
+            texts[source.name] = result
+
+    flat = [text for batch in texts.values() for text in batch]
+    scores = await asyncio.to_thread(score, flat) if flat else []
+
+    by_source, counts, position = {}, {}, 0
+    for name, batch in texts.items():
+        chunk = scores[position:position + len(batch)]
+        position += len(batch)
+        counts[name] = len(chunk)
+        by_source[name] = sum(chunk) / len(chunk) if chunk else None
+
+    return {
+        'overall': sum(scores) / len(scores) if scores else 0,
+        'by_source': by_source,
+        'counts': counts,
+        'errors': errors,
+        'elapsed': time.perf_counter() - started,
+    }
@@ -1,100 +1,115 @@
-import praw
-from transformers import pipeline
+import asyncio
+import functools
 import requests
-import yaml
 import os
+import sys
 import logging
 
+# Add the project root directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.utils.clients import get_client, get_config
+from src.utils.sentiment_aggregator import SentimentSource, aggregate_sentiment
+
 # Configure logging for debugging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Load configuration from config.yaml
-config_path = os.path.join(os.path.dirname(__file__), '../../config/config.yaml')
-with open(config_path, 'r') as file:
-    config = yaml.safe_load(file)
+# Config, API clients and the sentiment model are built on first use (see src/utils/clients.py)
 
 # Setup Reddit API
 def setup_reddit_api():
     try:
-        reddit = praw.Reddit(
-            client_id=config['reddit']['client_id'],
-            client_secret=config['reddit']['client_secret'],
-            user_agent=config['reddit']['user_agent']
-        )
+        reddit = get_client('reddit')
         logging.debug("Reddit API setup successful.")
         return reddit
     except Exception as e:
         logging.error(f"Error setting up Reddit API: {e}")
         return None
 
+# Setup Twitter API (optional: only used when config.yaml has a twitter section)
+def setup_twitter_api():
+    try:
+        if 'twitter' not in get_config():
+            return None
+        return get_client('twitter')
+    except Exception as e:
+        logging.error(f"Error setting up Twitter API: {e}")
+        return None
+
+# News API titles (raises on failure so the aggregator can report it)
+def fetch_news_titles(query="cryptocurrency"):
+    url = f"https://newsapi.org/v2/everything?q={query}&apiKey={get_config()['newsapi']['api_key']}"
+    response = requests.get(url, timeout=10)
+    response.raise_for_status()
+    articles = response.json().get("articles", [])
+    logging.debug(f"Fetched {len(articles)} articles from News API.")
+    return [article["title"] for article in articles if article.get("title")]
+
+# Reddit titles from the hot listing of a subreddit
+def fetch_reddit_titles(reddit, subreddit_name, limit=100):
+    subreddit = reddit.subreddit(subreddit_name)
+    return [submission.title for submission in subreddit.hot(limit=limit) if submission.title]
+
+# Tweet texts for a keyword
+def fetch_tweet_texts(twitter, keyword, count=100):
+    return [tweet.text for tweet in twitter.search_tweets(q=keyword, count=count, lang='en')]
+
 # News API Setup
 def fetch_news_sentiment():
     try:
-        url = f"https://newsapi.org/v2/everything?q=cryptocurrency&apiKey={config['newsapi']['api_key']}"
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            articles = response.json().get("articles", [])
-            logging.debug(f"Fetched {len(articles)} articles from News API.")
-            sentiments = [
-                sentiment_pipeline(article["title"])[0] for article in articles if article.get("title")
-            ]
-            return sentiments
-        else:
-            logging.error(f"Error fetching news data: {response.status_code}")
-            return []
+        return get_client('sentiment_model').classify(fetch_news_titles())
     except requests.exceptions.RequestException as e:
         logging.error(f"Error fetching news data: {e}")
         return []
 
-# Hugging Face Sentiment Analysis
-# Use device=0 for GPU (if available), otherwise device=-1 for CPU
-sentiment_pipeline = pipeline(
-    "sentiment-analysis",
-    model="distilbert-base-uncased-finetuned-sst-2-english",
-    revision="714eb0f",
-    device=0  # Change to 0 to use the GPU
-)
-
 # Analyze Reddit Sentiment
 def analyze_reddit_sentiment(reddit, subreddit_name, limit=100):
     try:
-        subreddit = reddit.subreddit(subreddit_name)
-        sentiments = [
-            sentiment_pipeline(submission.title)[0] for submission in subreddit.hot(limit=limit)
-            if submission.title
-        ]
+        sentiments = get_client('sentiment_model').classify(fetch_reddit_titles(reddit, subreddit_name, limit))
         logging.debug(f"Fetched {len(sentiments)} sentiments from Reddit.")
         return sentiments
     except Exception as e:
         logging.error(f"Error fetching Reddit data: {e}")
         return []
 
-# Main Function to Aggregate Sentiment
-def get_overall_sentiment():
+# Build the list of sources queried by get_overall_sentiment
+def sentiment_sources(subreddits=("cryptocurrency",), twitter_keyword=None, limit=100, timeout=10.0):
+    sources = []
     reddit_api = setup_reddit_api()
-    if not reddit_api:
+    if reddit_api:
+        for name in subreddits:
+            fetch = functools.partial(fetch_reddit_titles, reddit_api, name, limit)
+            sources.append(SentimentSource(f"reddit/{name}", fetch, timeout))
+    else:
         logging.error("Reddit API not available.")
-        return 0
 
-    reddit_sentiment = analyze_reddit_sentiment(reddit_api, "cryptocurrency")
-    news_sentiment = fetch_news_sentiment()
+    sources.append(SentimentSource("newsapi", fetch_news_titles, timeout))
 
-    all_sentiments = reddit_sentiment + news_sentiment
-    if not all_sentiments:
+    twitter_api = setup_twitter_api() if twitter_keyword else None
+    if twitter_api:
+        import tweepy
+        fetch = functools.partial(fetch_tweet_texts, twitter_api, twitter_keyword, limit)
+        # One quick retry that fits inside the timeout; a rate limit that outlasts it
+        # is reported in 'errors' and the other sources still make up the score
+        sources.append(SentimentSource("twitter", fetch, timeout, retries=1, backoff=min(1.0, timeout / 4),
+                                       retry_on=(tweepy.errors.TooManyRequests,)))
+    return sources
+
+# Query every source at once and score all texts in one batch
+async def get_overall_sentiment_async(subreddits=("cryptocurrency",), twitter_keyword=None, limit=100, timeout=10.0):
+    sources = sentiment_sources(subreddits, twitter_keyword, limit, timeout)
+    # Hugging Face model, loaded on first use on the GPU if there is one; titles scored
+    # on an earlier run come from the on-disk score cache
+    result = await aggregate_sentiment(sources, get_client('sentiment_model').score)
+    if not result['counts']:
         logging.warning("No sentiment data collected.")
-        return 0
-
-    # Fine-tuned sentiment score calculation
-    sentiment_scores = []
-    for sentiment in all_sentiments:
-        if sentiment['label'] == 'POSITIVE':
-            sentiment_scores.append(1 * sentiment['score'])  # Weigh positive sentiments by their score
-        elif sentiment['label'] == 'NEGATIVE':
-            sentiment_scores.append(-1 * sentiment['score'])  # Weigh negative sentiments by their score
-
-    overall_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
-    logging.debug(f"Overall sentiment score: {overall_sentiment}")
-    return overall_sentiment
+    logging.debug(f"Overall sentiment score: {result['overall']} from {result['counts']} in {result['elapsed']:.2f}s")
+    return result
+
+# Main Function to Aggregate Sentiment
+def get_overall_sentiment(subreddits=("cryptocurrency",), twitter_keyword=None, limit=100, timeout=10.0):
+    result = asyncio.run(get_overall_sentiment_async(subreddits, twitter_keyword, limit, timeout))
+    return result['overall']
 
 if __name__ == "__main__":
     overall_sentiment_score = get_overall_sentiment()
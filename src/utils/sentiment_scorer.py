@@ -0,0 +1,123 @@
+import logging
+import threading
+
+# Hugging Face sentiment model shared by the sentiment modules
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+MODEL_REVISION = "714eb0f"
+
+
+def pick_device():
+    """Returns 0 (first GPU) when CUDA is available, otherwise -1 (CPU)."""
+    try:
+        import torch
+    except ImportError:
+        return -1
+    return 0 if torch.cuda.is_available() else -1
+
+
+def _hf_pipeline(model, revision, device):
+    from transformers import pipeline
+    return pipeline("sentiment-analysis", model=model, revision=revision, device=device)
+
+
+class SentimentScorer:
+    """
+    Batched transformer sentiment scoring.
+
+    The model is loaded on the first call, on the GPU if there is one and on
+    the CPU otherwise. Texts are scored in batches; each batch is padded only
+    to its own longest text, and texts are grouped by length first so that
+    padding stays small.
+    """
+
+    def __init__(self, model=MODEL_NAME, revision=MODEL_REVISION, device=None, batch_size=32, pipeline_factory=None,
+                 cache=None):
+        """
+        :param model: Hugging Face model id
+        :param revision: Model revision (commit) to load
+        :param device: Pipeline device; None picks GPU 0 or CPU automatically
+        :param batch_size: Default number of texts per forward pass
+        :param pipeline_factory: Callable (model, revision, device) -> pipeline, for tests
+        :param cache: ScoreCache, or a callable returning one on first use; None disables caching
+        """
+        self.model = model
+        self.revision = revision
+        self.device = device
+        self.batch_size = batch_size
+        self.pipeline_factory = pipeline_factory or _hf_pipeline
+        self.cache = cache
+        self._pipeline = None
+        self._lock = threading.Lock()
+
+    @property
+    def pipeline(self):
+        if self._pipeline is None:
+            with self._lock:
+                if self._pipeline is None:
+                    device = pick_device() if self.device is None else self.device
+                    logging.debug("Loading sentiment model %s@%s on device %s", self.model, self.revision, device)
+                    self._pipeline = self.pipeline_factory(self.model, self.revision, device)
+        return self._pipeline
+
+    def classify(self, texts, batch_size=None):
+        """
+        Classifies texts in batches.
+
+        :param texts: List of strings
+        :param batch_size: Overrides the scorer's batch size
+        :return: List of {'label', 'score'} dicts in the order of ``texts``
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        if self.cache is not None:
+            cache = self.cache() if callable(self.cache) else self.cache
+            return cache.cached(self.model, self.revision, texts, lambda missing: self._classify(missing, batch_size))
+        return self._classify(texts, batch_size)
+
+    def _classify(self, texts, batch_size):
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        results = self.pipeline([texts[i] for i in order], batch_size=batch_size or self.batch_size, truncation=True)
+        ordered = [None] * len(texts)
+        for position, i in enumerate(order):
+            ordered[i] = results[position]
+        return ordered
+
+    def score(self, texts, batch_size=None):
+        """
+        Scores texts as signed confidences: +score for POSITIVE, -score for NEGATIVE.
+
+        :param texts: List of strings
+        :param batch_size: Overrides the scorer's batch size
+        :return: List of floats in [-1, 1]
+        """
+        return [signed_score(result) for result in self.classify(texts, batch_size)]
+
+
+def signed_score(result):
+    """Maps a pipeline result to +score / -score (0 for any other label)."""
+    if result['label'] == 'POSITIVE':
+        return result['score']
+    if result['label'] == 'NEGATIVE':
+        return -result['score']
+    return 0.0
+
+
+def textblob_polarity(texts, cache=None):
+    """
+    TextBlob polarity for each text, looked up in ``cache`` before computing.
+
+    :param texts: List of strings
+    :param cache: ScoreCache or None
+    :return: List of floats in [-1, 1]
+    """
+    import textblob
+    from textblob import TextBlob
+
+    def compute(batch):
+        return [TextBlob(text).sentiment.polarity for text in batch]
+
+    texts = list(texts)
+    if cache is None:
+        return compute(texts)
+    return cache.cached('textblob', textblob.__version__, texts, compute)
@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils.rate_limit import AsyncTokenBucket
+
+# Incremental Etherscan transaction indexer.
+#
+# Each address keeps a cursor: the last block whose transactions are fully
+# stored. A sync asks Etherscan only for blocks after the cursor, in
+# ascending pages, and writes them to a local SQLite store indexed by
+# (address, block). Many addresses are synced concurrently while one token
+# bucket keeps the whole run under Etherscan's per-second limit. The fetch
+# layer is any object with an async txlist(); tests use a local fake.
+
+STORE_PATH = os.path.join(os.path.dirname(__file__), '../../data/chain/transactions.sqlite')
+ETHERSCAN_URL = 'https://api.etherscan.io/api'
+
+# Etherscan free tier: 5 calls/s; one page holds at most 10000 results
+ETHERSCAN_RATE = 5
+PAGE_SIZE = 1000
+
+# Stored per transaction, named as in Etherscan's txlist results
+TX_FIELDS = ['hash', 'blockNumber', 'timeStamp', 'transactionIndex', 'from', 'to', 'value',
+             'gas', 'gasPrice', 'gasUsed', 'isError', 'contractAddress', 'functionName']
+_COLUMNS = ['hash', 'block_number', 'time_stamp', 'tx_index', 'from_address', 'to_address', 'value',
+            'gas', 'gas_price', 'gas_used', 'is_error', 'contract_address', 'function_name']
+_INTEGER = {'blockNumber', 'timeStamp', 'transactionIndex', 'gas', 'gasPrice', 'gasUsed', 'isError'}
+
+
+class EtherscanError(Exception):
+    pass
+
+
+class RateLimited(EtherscanError):
+    pass
+
+
+class EtherscanFetcher:
+    """Etherscan account/txlist over a pooled HTTP session."""
+
+    def __init__(self, api_key, url=ETHERSCAN_URL, pool_size=8, timeout=30):
+        self.api_key = api_key
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+
+    def _get(self, params):
+        response = self.session.get(self.url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def txlist(self, address, start_block, end_block=99999999, page=1, offset=PAGE_SIZE):
+        """
+        One ascending page of normal transactions for ``address``.
+
+        :return: List of transaction dicts (empty when there are none)
+        """
+        reply = await asyncio.to_thread(self._get, {
+            'module': 'account', 'action': 'txlist', 'address': address,
+            'startblock': start_block, 'endblock': end_block,
+            'page': page, 'offset': offset, 'sort': 'asc', 'apikey': self.api_key,
+        })
+        if reply.get('status') == '1':
+            return reply['result']
+        message, result = reply.get('message', ''), reply.get('result')
+        if message.startswith('No transactions found'):
+            return []
+        if isinstance(result, str) and 'rate limit' in result.lower():
+            raise RateLimited(result)
+        raise EtherscanError(f"{message}: {result}")
+
+
+class TransactionStore:
+
+    def __init__(self, path=STORE_PATH):
+        """
+        :param path: SQLite file (':memory:' for a throwaway store)
+        """
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS transactions ("
+            " address TEXT NOT NULL, hash TEXT NOT NULL, block_number INTEGER NOT NULL, time_stamp INTEGER,"
+            " tx_index INTEGER, from_address TEXT, to_address TEXT, value TEXT, gas INTEGER, gas_price INTEGER,"
+            " gas_used INTEGER, is_error INTEGER, contract_address TEXT, function_name TEXT,"
+            " PRIMARY KEY (address, hash)"
+            ") WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS transactions_block ON transactions (address, block_number)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS cursors (address TEXT PRIMARY KEY, last_block INTEGER NOT NULL)")
+
+    def last_block(self, address):
+        """Last block fully indexed for ``address``, or None if it was never synced."""
+        with self._lock:
+            row = self._db.execute("SELECT last_block FROM cursors WHERE address = ?", (address.lower(),)).fetchone()
+        return row[0] if row else None
+
+    def add(self, address, transactions, last_block=None):
+        """
+        Stores transactions and, if given, moves the address cursor, in one commit.
+
+        :return: Number of transactions that were not stored before
+        """
+        address = address.lower()
+        rows = []
+        for tx in transactions:
+            values = [int(tx[field]) if field in _INTEGER and tx.get(field) not in (None, '') else tx.get(field)
+                      for field in TX_FIELDS]
+            rows.append((address, *values))
+        marks = ','.join('?' * (len(_COLUMNS) + 1))
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(f"INSERT OR IGNORE INTO transactions (address, {', '.join(_COLUMNS)}) VALUES ({marks})",
+                                 rows)
+            added = self._db.total_changes - before
+            if last_block is not None:
+                self._db.execute("INSERT INTO cursors VALUES (?, ?) ON CONFLICT (address) DO UPDATE SET last_block = "
+                                 "MAX(last_block, excluded.last_block)", (address, last_block))
+            self._db.commit()
+        return added
+
+    def transactions(self, address, start_block=0, end_block=None, newest_first=True):
+        """
+        Stored transactions of ``address`` as Etherscan-style dicts.
+
+        :param start_block: First block to include
+        :param end_block: Last block to include (default: all)
+        :param newest_first: Order by descending block, like the old sort='desc' query
+        """
+        order = 'DESC' if newest_first else 'ASC'
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM transactions WHERE address = ? AND block_number BETWEEN ? AND ? "
+                f"ORDER BY block_number {order}, tx_index {order}",
+                (address.lower(), start_block, end_block if end_block is not None else 2 ** 62)).fetchall()
+        return [dict(zip(TX_FIELDS, row)) for row in rows]
+
+    def read_after(self, address, after_block, after_hash, through_block, limit):
+        """
+        Successful transactions of ``address`` after (after_block, after_hash), in (block, hash)
+        order, up to ``through_block``; used to page through large histories.
+
+        :return: List of (block_number, hash, time_stamp, from, to, value) tuples
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT block_number, hash, time_stamp, from_address, to_address, value FROM transactions "
+                "WHERE address = ? AND COALESCE(is_error, 0) = 0 "
+                "AND block_number BETWEEN ? AND ? AND (block_number > ? OR hash > ?) "
+                "ORDER BY block_number, hash LIMIT ?",
+                (address.lower(), after_block, through_block, after_block, after_hash, limit)).fetchall()
+
+    def count(self, address=None):
+        with self._lock:
+            if address is None:
+                return self._db.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+            return self._db.execute("SELECT COUNT(*) FROM transactions WHERE address = ?",
+                                    (address.lower(),)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+async def _fetch_page(fetcher, limiter, address, start_block, page_size, retries, backoff):
+    for attempt in range(retries + 1):
+        async with limiter:
+            try:
+                return await fetcher.txlist(address, start_block, offset=page_size)
+            except (RateLimited, requests.exceptions.RequestException) as e:
+                if attempt == retries:
+                    raise
+                delay = backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+                logging.debug("txlist %s from %s failed (%s), retrying in %.1fs", address, start_block, e, delay)
+        await asyncio.sleep(delay)
+
+
+async def index_address(fetcher, store, address, limiter, page_size=PAGE_SIZE, retries=5, backoff=1.0):
+    """
+    Brings one address up to date, paging forward from its cursor.
+
+    A full page may end in the middle of a block, so the next page starts at
+    that block again and duplicates are ignored by the store; the cursor only
+    advances past blocks that are known to be complete.
+
+    :return: Number of new transactions stored
+    """
+    last = store.last_block(address)
+    start_block = 0 if last is None else last + 1
+    added = 0
+
+    while True:
+        page = await _fetch_page(fetcher, limiter, address, start_block, page_size, retries, backoff)
+        if not page:
+            break
+        last_in_page = max(int(tx['blockNumber']) for tx in page)
+        if len(page) < page_size:
+            added += store.add(address, page, last_in_page)
+            break
+        complete = last_in_page - 1
+        added += store.add(address, page, complete if complete >= start_block else None)
+        if last_in_page == start_block:
+            raise EtherscanError(f"More than {page_size} transactions of {address} in block {start_block}")
+        start_block = last_in_page
+
+    return added
+
+
+async def index_addresses(addresses, fetcher, store, rate=ETHERSCAN_RATE, burst=None, concurrency=8, **kwargs):
+    """
+    Syncs many addresses concurrently under one Etherscan rate limit.
+
+    :param addresses: Wallet addresses
+    :param fetcher: Object with an async txlist() (EtherscanFetcher or a fake)
+    :param store: TransactionStore
+    :param rate: Requests per second across all addresses
+    :param burst: Requests allowed back to back (default: ``rate``)
+    :param concurrency: Addresses synced at once
+    :return: Dict of address to new transactions stored, or the exception raised
+    """
+    limiter = AsyncTokenBucket(rate, burst or rate)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(address):
+        async with semaphore:
+            return await index_address(fetcher, store, address, limiter, **kwargs)
+
+    addresses = list(dict.fromkeys(addresses))
+    results = await asyncio.gather(*(run(address) for address in addresses), return_exceptions=True)
+    return dict(zip(addresses, results))
+
+
+async def sync_transactions_async(addresses, fetcher=None, store=None, **kwargs):
+    """
+    index_addresses using the configured Etherscan key and the default store, for callers already in an event loop.
+    """
+    if fetcher is None:
+        from src.utils.clients import get_client
+        fetcher = get_client('etherscan')
+    store = store or get_transaction_store()
+    results = await index_addresses(addresses, fetcher, store, **kwargs)
+    for address, result in results.items():
+        if isinstance(result, Exception):
+            logging.error(f"Error indexing transactions for {address}: {result}")
+    return results
+
+
+def sync_transactions(addresses, fetcher=None, store=None, **kwargs):
+    """
+    Blocking wrapper around sync_transactions_async.
+
+    :raises RuntimeError: When called from a running event loop, which asyncio.run cannot nest in;
+                          await sync_transactions_async there instead
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(sync_transactions_async(addresses, fetcher, store, **kwargs))
+    raise RuntimeError("sync_transactions() called from a running event loop; "
+                       "await sync_transactions_async() instead")
+
+
+_default_store = None
+
+
+# Shared store under data/chain, opened on first use
+def get_transaction_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = TransactionStore()
+    return _default_store
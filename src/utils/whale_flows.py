@@ -0,0 +1,158 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.utils.eth_rpc import WEI_PER_ETH
+
+# Whale-flow time series built from the transaction index (see tx_indexer.py).
+#
+# For every wallet category (exchanges, funds, ...) and time interval we keep
+# inflow, outflow and net flow in ETH, the number of transfers and the number
+# of large transfers. Transactions are read per wallet in fixed-size chunks
+# and reduced with numpy, so memory is bounded by the chunk size and the
+# number of intervals, not by the number of transactions. Each wallet has a
+# watermark (last block aggregated); update() only reads blocks after it and
+# never past the indexer's cursor, so refreshing after new blocks are indexed
+# is cheap and a transfer is never counted twice.
+#
+# The series is stamped at the END of each interval, when its totals are
+# known, so it can be joined onto bars with build_feature_frame without
+# lookahead.
+
+METRICS = ('inflow', 'outflow', 'netflow', 'count', 'large')
+
+FLOWS_PATH = os.path.join(os.path.dirname(__file__), '../../data/chain/whale_flows.json')
+
+
+def _reduce_chunk(rows, address, interval, large_value):
+    """Sums one chunk of transactions of ``address`` per interval."""
+    _, _, stamps, senders, recipients, values = zip(*rows)
+    stamps = np.asarray(stamps, dtype=np.int64)
+    # Values are decimal wei strings that may not fit in int64
+    eth = np.asarray(values, dtype=np.float64) / WEI_PER_ETH
+    incoming = np.asarray([to == address for to in recipients])
+    outgoing = np.asarray([sender == address for sender in senders])
+
+    buckets, inverse = np.unique(stamps // interval, return_inverse=True)
+    n = len(buckets)
+    inflow = np.bincount(inverse, weights=np.where(incoming, eth, 0.0), minlength=n)
+    outflow = np.bincount(inverse, weights=np.where(outgoing, eth, 0.0), minlength=n)
+    count = np.bincount(inverse, minlength=n).astype(np.float64)
+    large = np.bincount(inverse, weights=(eth >= large_value).astype(np.float64), minlength=n)
+    return buckets, np.column_stack([inflow, outflow, inflow - outflow, count, large])
+
+
+class WhaleFlows:
+
+    def __init__(self, tracked, interval='1h', large_value=1000.0):
+        """
+        :param tracked: Mapping of category to wallet addresses (config.yaml's wallet_addresses_to_track)
+        :param interval: Bucket size (pandas offset string, e.g. '1h' or '1D')
+        :param large_value: Transfers of at least this many ETH count as large
+        """
+        self.categories = sorted(tracked)
+        self.wallets = {}
+        for category, addresses in tracked.items():
+            for address in addresses:
+                self.wallets.setdefault(address.lower(), set()).add(category)
+        self.interval = pd.Timedelta(interval)
+        self.large_value = float(large_value)
+        self.watermarks = {}                                     # address -> (block, hash) last aggregated
+        self.totals = {category: {} for category in self.categories}   # category -> bucket -> metrics
+
+    def _add(self, category, buckets, sums):
+        totals = self.totals[category]
+        for bucket, row in zip(buckets.tolist(), sums):
+            if bucket in totals:
+                totals[bucket] += row
+            else:
+                totals[bucket] = row.copy()
+
+    def update(self, store, chunk_size=100_000):
+        """
+        Aggregates transactions indexed since the last update.
+
+        :param store: TransactionStore
+        :param chunk_size: Rows read and reduced at a time
+        :return: Number of transactions aggregated
+        """
+        interval = int(self.interval.total_seconds())
+        added = 0
+        for address, categories in self.wallets.items():
+            complete = store.last_block(address)
+            if complete is None:
+                continue
+            block, tx_hash = self.watermarks.get(address, (-1, ''))
+            while True:
+                rows = store.read_after(address, block, tx_hash, complete, chunk_size)
+                if not rows:
+                    break
+                buckets, sums = _reduce_chunk(rows, address, interval, self.large_value)
+                for category in categories:
+                    self._add(category, buckets, sums)
+                block, tx_hash = rows[-1][0], rows[-1][1]
+                self.watermarks[address] = (block, tx_hash)
+                added += len(rows)
+                if len(rows) < chunk_size:
+                    break
+        return added
+
+    def frame(self, start=None, end=None):
+        """
+        Flows as a DataFrame indexed by interval end, with one column per category and metric
+        (e.g. 'exchanges_netflow'); intervals without transfers are zero.
+        """
+        buckets = sorted({bucket for totals in self.totals.values() for bucket in totals})
+        if not buckets:
+            return pd.DataFrame(columns=[f"{c}_{m}" for c in self.categories for m in METRICS], dtype=np.float64)
+
+        interval = int(self.interval.total_seconds())
+        first, last = buckets[0], buckets[-1]
+        matrix = np.zeros((last - first + 1, len(self.categories) * len(METRICS)))
+        for i, category in enumerate(self.categories):
+            totals = self.totals[category]
+            if totals:
+                rows = np.fromiter(totals.keys(), dtype=np.int64, count=len(totals)) - first
+                matrix[rows, i * len(METRICS):(i + 1) * len(METRICS)] = np.stack(list(totals.values()))
+
+        ends = pd.to_datetime((np.arange(first, last + 1) + 1) * interval, unit='s')
+        frame = pd.DataFrame(matrix, index=pd.DatetimeIndex(ends, name='timestamp'),
+                             columns=[f"{c}_{m}" for c in self.categories for m in METRICS])
+        return frame.loc[start:end]
+
+    def save(self, path):
+        """Writes totals and watermarks so the next run only aggregates new blocks."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        state = {
+            'interval': self.interval.total_seconds(),
+            'large_value': self.large_value,
+            'wallets': {address: sorted(categories) for address, categories in self.wallets.items()},
+            'watermarks': self.watermarks,
+            'totals': {category: {str(bucket): row.tolist() for bucket, row in totals.items()}
+                       for category, totals in self.totals.items()},
+        }
+        with open(path + '.tmp', 'w') as f:
+            json.dump(state, f)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path, tracked, interval='1h', large_value=1000.0):
+        """
+        Restores saved state; starts over if it was built with other settings or wallets.
+        """
+        flows = cls(tracked, interval, large_value)
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return flows
+        wallets = {address: sorted(categories) for address, categories in flows.wallets.items()}
+        if (state.get('interval') != flows.interval.total_seconds() or state.get('large_value') != flows.large_value
+                or state.get('wallets') != wallets):
+            return flows
+        flows.watermarks = {address: tuple(mark) for address, mark in state['watermarks'].items()}
+        flows.totals = {category: {int(bucket): np.asarray(row) for bucket, row in totals.items()}
+                        for category, totals in state['totals'].items()}
+        return flows
@@ -1,69 +1,152 @@
-import requests
-from web3 import Web3
-import yaml
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
 import logging
 
+# Add the project root directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.utils.clients import get_client, get_config
+from src.utils.eth_rpc import WEI_PER_ETH
+from src.utils.tx_indexer import get_transaction_store, sync_transactions, sync_transactions_async
+from src.utils.whale_flows import FLOWS_PATH, WhaleFlows
+from src.utils.whale_stream import WhaleDetector, WhaleStream
+
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Load configuration from config.yaml
-with open("config/config.yaml", "r") as file:
-    config = yaml.safe_load(file)
+# Config and Web3 are loaded on first use (see src/utils/clients.py); importing
+# this module no longer connects to Infura or starts monitoring
 
-# Etherscan and Web3 setup
-ETHERSCAN_API_KEY = config['etherscan']['api_key']
-WEB3_INFURA_URL = config['web3']['infura_url']
-WALLET_ADDRESSES_TO_TRACK = config['web3']['wallet_addresses_to_track']
 
-# Initialize Web3
-web3 = Web3(Web3.HTTPProvider(WEB3_INFURA_URL))
+# Wallets to monitor, grouped by category
+def wallet_addresses_to_track():
+    return get_config()['web3']['wallet_addresses_to_track']
 
-# Check if Web3 is connected
-if not web3.isConnected():
-    logging.error("Failed to connect to the Ethereum network. Check your Infura URL.")
-else:
-    logging.info("Connected to the Ethereum network successfully.")
+
+# Initialize Web3 and check the connection once
+def get_web3():
+    web3 = get_client('web3')
+    if not web3.is_connected():
+        logging.error("Failed to connect to the Ethereum network. Check your Infura URL.")
+    else:
+        logging.info("Connected to the Ethereum network successfully.")
+    return web3
 
 # Function to get the balance of a wallet address
 def get_wallet_balance(address):
     try:
+        web3 = get_client('web3')
         balance_wei = web3.eth.get_balance(address)
-        balance_eth = web3.fromWei(balance_wei, 'ether')
+        balance_eth = web3.from_wei(balance_wei, 'ether')
         logging.info(f"Wallet Address: {address} | Balance: {balance_eth} ETH")
         return balance_eth
     except Exception as e:
         logging.error(f"Error fetching balance for {address}: {e}")
         return None
 
-# Function to get the latest transactions of a wallet using Etherscan API
+# Balances of many wallets at one block, grouped into as few requests as possible
+def balance_snapshot(addresses, block=None, method='batch', batch_size=500, max_workers=4, rpc=None):
+    """
+    Reads every balance at the same block, so the snapshot is consistent.
+
+    :param addresses: Wallet addresses
+    :param block: Block number to read at (default: the latest block, fetched once)
+    :param method: 'batch' for JSON-RPC batches of eth_getBalance, 'multicall' for
+                   Multicall3 getEthBalance aggregates
+    :param batch_size: Addresses per request
+    :param max_workers: Requests in flight at once over the pooled session
+    :param rpc: EthRPC client (default: the shared one from config.yaml)
+    :return: Dict with the pinned 'block' and 'balances' (address -> wei)
+    """
+    rpc = rpc or get_client('eth_rpc', pool_size=max_workers)
+    if block is None:
+        block = rpc.block_number()
+    read = {'batch': rpc.get_balances, 'multicall': rpc.multicall_balances}[method]
+
+    addresses = list(dict.fromkeys(addresses))
+    chunks = [addresses[i:i + batch_size] for i in range(0, len(addresses), batch_size)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(lambda chunk: read(chunk, block), chunks)
+        balances = {}
+        for chunk, chunk_balances in zip(chunks, results):
+            balances.update(zip(chunk, chunk_balances))
+    return {'block': block, 'balances': balances}
+
+
+def wei_to_eth(wei):
+    return Decimal(wei) / WEI_PER_ETH
+
+# Latest transactions of a wallet, newest first, from the local index. Only
+# blocks after the last indexed one are requested from Etherscan. Blocking:
+# from a coroutine, await get_wallet_transactions_async instead.
 def get_wallet_transactions(address):
     try:
-        url = f"https://api.etherscan.io/api"
-        params = {
-            'module': 'account',
-            'action': 'txlist',
-            'address': address,
-            'startblock': 0,
-            'endblock': 99999999,
-            'sort': 'desc',
-            'apikey': ETHERSCAN_API_KEY
-        }
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            transactions = response.json().get("result", [])
-            logging.info(f"Fetched {len(transactions)} transactions for {address}.")
-            return transactions
-        else:
-            logging.warning(f"Error fetching transactions: {response.status_code}")
-            return []
+        sync_transactions([address])
+        return _stored_transactions(address)
+    except RuntimeError:
+        raise  # called from a running event loop (see sync_transactions)
+    except Exception as e:
+        logging.error(f"Error in getting transactions for {address}: {e}")
+        return []
+
+async def get_wallet_transactions_async(address):
+    try:
+        await sync_transactions_async([address])
+        return _stored_transactions(address)
     except Exception as e:
         logging.error(f"Error in getting transactions for {address}: {e}")
         return []
 
+def _stored_transactions(address):
+    transactions = get_transaction_store().transactions(address)
+    logging.info(f"Fetched {len(transactions)} transactions for {address}.")
+    return transactions
+
 # Monitor specified wallet addresses
-for category, addresses in WALLET_ADDRESSES_TO_TRACK.items():
-    logging.info(f"\nMonitoring {category}:")
-    for wallet in addresses:
-        balance = get_wallet_balance(wallet)
-        transactions = get_wallet_transactions(wallet)
-        # You can add more logic here to analyze or react to the transactions
+def monitor_wallets():
+    tracked = wallet_addresses_to_track()
+    wallets = [wallet for addresses in tracked.values() for wallet in addresses]
+    snapshot = balance_snapshot(wallets)
+    # Index every wallet concurrently under the Etherscan rate limit
+    sync_transactions(wallets)
+    logging.info(f"Balances at block {snapshot['block']}")
+    for category, addresses in tracked.items():
+        logging.info(f"\nMonitoring {category}:")
+        for wallet in addresses:
+            balance = wei_to_eth(snapshot['balances'][wallet])
+            logging.info(f"Wallet Address: {wallet} | Balance: {balance} ETH")
+
+    # Per-category flow series from the indexed transactions, refreshed incrementally
+    return update_whale_flows(tracked)
+
+# Hourly inflow/outflow/net flow per wallet category, usable as a strategy signal
+# (e.g. build_feature_frame(ohlcv, {'whales': update_whale_flows()}))
+def update_whale_flows(tracked=None, interval='1h', large_value=1000.0, path=FLOWS_PATH):
+    tracked = tracked or wallet_addresses_to_track()
+    flows = WhaleFlows.load(path, tracked, interval, large_value)
+    added = flows.update(get_transaction_store())
+    flows.save(path)
+    logging.info(f"Aggregated {added} new transactions into whale flows")
+    return flows.frame()
+
+# Log a whale event as it happens
+def log_whale_event(event):
+    action = "REVERTED" if event['removed'] else event['direction'].upper()
+    asset = event['token'] or 'ETH'
+    logging.info(f"[{', '.join(event['categories'])}] {action} block {event['block']}: "
+                 f"{event['from']} -> {event['to']} {event['value']} ({asset}) tx {event['tx']}")
+
+# Follow new blocks and report transfers touching any tracked wallet
+def stream_whale_transfers(on_event=log_whale_event, poll_interval=2.0, min_value=0):
+    detector = WhaleDetector(wallet_addresses_to_track(), min_value=min_value)
+    stream = WhaleStream(get_client('eth_rpc'), detector)
+    stream.run(on_event, poll_interval=poll_interval)
+
+if __name__ == "__main__":
+    if '--stream' in sys.argv:
+        stream_whale_transfers()
+    else:
+        monitor_wallets()
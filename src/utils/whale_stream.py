@@ -0,0 +1,230 @@
+import collections
+import logging
+import time
+
+from src.utils.eth_rpc import RPCError
+
+# Block-streaming whale detector.
+#
+# Rather than asking about every tracked wallet, the stream reads each new
+# block once (transactions plus ERC-20 Transfer logs, fetched by block hash
+# in one batched request) and looks every sender and recipient up in a hashed
+# set of tracked addresses. Work per block is proportional to the number of
+# transactions and logs in it, whatever the number of tracked wallets.
+#
+# Recent block hashes are kept so a reorg is noticed when a new block does
+# not extend the chain we saw; events from the orphaned blocks are emitted
+# again with removed=True (like eth_getLogs does) and the new branch is
+# scanned.
+#
+# Events are buffered until poll() returns, so a request failing halfway
+# through catching up keeps the blocks already scanned and their events:
+# the next poll() delivers them and resumes from the first unscanned block.
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+
+
+def _topic_address(topic):
+    return '0x' + topic[-40:].lower()
+
+
+class WhaleDetector:
+
+    def __init__(self, tracked, min_value=0, min_token_amount=None):
+        """
+        :param tracked: Mapping of category (e.g. 'exchanges') to wallet addresses,
+                        as in config.yaml's wallet_addresses_to_track
+        :param min_value: Smallest native transfer reported, in wei
+        :param min_token_amount: Mapping of token address to the smallest raw amount reported
+        """
+        self.labels = {}
+        for category, addresses in tracked.items():
+            for address in addresses:
+                self.labels.setdefault(address.lower(), set()).add(category)
+        self.min_value = min_value
+        self.min_token_amount = {token.lower(): amount for token, amount in (min_token_amount or {}).items()}
+
+    def _event(self, kind, block, tx_hash, sender, recipient, value, token=None, log_index=None):
+        from_labels = self.labels.get(sender, ())
+        to_labels = self.labels.get(recipient, ())
+        return {
+            'kind': kind,
+            'block': block['number'],
+            'block_hash': block['hash'],
+            'tx': tx_hash,
+            'log_index': log_index,
+            'from': sender,
+            'to': recipient,
+            'value': value,
+            'token': token,
+            'categories': sorted(set(from_labels) | set(to_labels)),
+            'direction': 'out' if from_labels and not to_labels else 'in' if to_labels and not from_labels else 'both',
+            'removed': False,
+        }
+
+    def scan(self, block, logs=()):
+        """
+        Whale events in one block.
+
+        :param block: Block with number, hash and full transactions (ints already decoded)
+        :param logs: Transfer logs of that block
+        :return: List of event dicts
+        """
+        labels = self.labels
+        events = []
+        for tx in block['transactions']:
+            sender = tx['from'].lower()
+            recipient = (tx.get('to') or '').lower()
+            if (sender in labels or recipient in labels) and tx['value'] >= self.min_value:
+                events.append(self._event('transfer', block, tx['hash'], sender, recipient, tx['value']))
+
+        for log in logs:
+            topics = log['topics']
+            # ERC-721 transfers share the topic but index the token id (4 topics)
+            if len(topics) != 3 or topics[0] != TRANSFER_TOPIC:
+                continue
+            sender, recipient = _topic_address(topics[1]), _topic_address(topics[2])
+            if sender not in labels and recipient not in labels:
+                continue
+            token = log['address'].lower()
+            amount = int(log['data'], 16) if log['data'] not in ('0x', '') else 0
+            if amount < self.min_token_amount.get(token, 0):
+                continue
+            events.append(self._event('erc20', block, log['transactionHash'], sender, recipient, amount, token,
+                                      int(log['logIndex'], 16)))
+        return events
+
+
+def _decode_block(raw):
+    return {
+        'number': int(raw['number'], 16),
+        'hash': raw['hash'],
+        'parent': raw['parentHash'],
+        'transactions': [{'hash': tx['hash'], 'from': tx['from'], 'to': tx.get('to'), 'value': int(tx['value'], 16)}
+                         for tx in raw['transactions']],
+    }
+
+
+class WhaleStream:
+
+    def __init__(self, rpc, detector, start_block=None, max_reorg_depth=64, batch_blocks=32):
+        """
+        :param rpc: EthRPC client (or anything with call() and batch())
+        :param detector: WhaleDetector
+        :param start_block: First block to scan (default: the current head)
+        :param max_reorg_depth: Blocks remembered for reorg detection
+        :param batch_blocks: Blocks fetched per batch request while catching up
+        """
+        self.rpc = rpc
+        self.detector = detector
+        self.next_block = start_block
+        self.batch_blocks = batch_blocks
+        self.hashes = collections.OrderedDict()  # block number -> hash, newest last
+        self.recent_events = {}                  # block number -> events, for reorg retraction
+        self.max_reorg_depth = max_reorg_depth
+        self.reorgs = 0
+        self.pending = []                        # events scanned but not yet returned by poll()
+
+    def _fetch(self, numbers):
+        raw_blocks = self.rpc.batch([('eth_getBlockByNumber', (hex(n), True)) for n in numbers])
+        blocks = []
+        for raw in raw_blocks:
+            if raw is None:
+                break  # not mined yet on this node
+            blocks.append(_decode_block(raw))
+        logs = self.rpc.batch([('eth_getLogs', ({'blockHash': block['hash'], 'topics': [TRANSFER_TOPIC]},))
+                               for block in blocks]) if blocks else []
+        return list(zip(blocks, logs))
+
+    def _remember(self, block, events):
+        self.hashes[block['number']] = block['hash']
+        self.recent_events[block['number']] = events
+        while len(self.hashes) > self.max_reorg_depth:
+            number, _ = self.hashes.popitem(last=False)
+            self.recent_events.pop(number, None)
+
+    def _rewind(self, number):
+        """Drops remembered blocks from ``number`` on and returns their events as removals."""
+        removed = []
+        for n in sorted((n for n in self.hashes if n >= number), reverse=True):
+            del self.hashes[n]
+            removed.extend(dict(event, removed=True) for event in reversed(self.recent_events.pop(n, [])))
+        self.next_block = number
+        return removed
+
+    def poll(self):
+        """
+        Scans every block between the last one seen and the current head.
+
+        :return: List of events in chain order, including removals after a reorg. If a request
+                 fails, the events of the blocks scanned before it are returned by the next call
+        """
+        head = self.rpc.block_number()
+        if self.next_block is None:
+            self.next_block = head
+        events = self.pending
+
+        while self.next_block <= head:
+            numbers = range(self.next_block, min(head, self.next_block + self.batch_blocks - 1) + 1)
+            fetched = self._fetch(numbers)
+            for block, logs in fetched:
+                number = block['number']
+                parent = self.hashes.get(number - 1)
+                if parent is not None and block['parent'] != parent:
+                    # The chain we followed was replaced; retract back to the fork and rescan
+                    self.reorgs += 1
+                    fork = self._find_fork(number - 1)
+                    logging.warning("Reorg at block %s, rescanning from %s", number, fork)
+                    events.extend(self._rewind(fork))
+                    break
+                block_events = self.detector.scan(block, logs)
+                self._remember(block, block_events)
+                events.extend(block_events)
+                self.next_block = number + 1
+            else:
+                if len(fetched) < len(numbers):
+                    break
+        self.pending = []
+        return events
+
+    def _find_fork(self, number):
+        """Lowest block number whose remembered hash no longer matches the node."""
+        remembered = [n for n in self.hashes if n <= number]
+        canonical = self.rpc.batch([('eth_getBlockByNumber', (hex(n), False)) for n in remembered])
+        fork = number + 1
+        for n, raw in zip(reversed(remembered), reversed(canonical)):
+            if raw is not None and raw['hash'] == self.hashes[n]:
+                break
+            fork = n
+        return fork
+
+    def run(self, on_event, poll_interval=1.0, stop=None, max_backoff=60.0):
+        """
+        Follows the head until ``stop()`` returns True, calling ``on_event`` for each event.
+
+        Transport and RPC errors are logged and retried, waiting ``poll_interval`` after the first
+        failure and twice as long after each further one in a row, up to ``max_backoff``.
+
+        :param on_event: Callable taking one event dict
+        :param poll_interval: Seconds to wait when there is no new block
+        :param stop: Callable returning True to stop (default: run forever)
+        :param max_backoff: Longest wait in seconds between retries of a failing node
+        """
+        failures = 0
+        while not (stop and stop()):
+            scanned = self.next_block
+            try:
+                events = self.poll()
+            except (RPCError, OSError) as e:
+                # requests' connection, timeout and HTTP errors are OSErrors
+                delay = min(max_backoff, poll_interval * 2 ** failures)
+                failures += 1
+                logging.warning("Whale stream poll failed (%s), retrying in %.1fs", e, delay)
+                time.sleep(delay)
+                continue
+            failures = 0
+            for event in events:
+                on_event(event)
+            if self.next_block == scanned:
+                time.sleep(poll_interval)
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src.defi import yield_scheduler
+from src.utils import abi_registry, eth_rpc
+from src.utils.abi_registry import ABI_DIR, AbiRegistry, _keccak256, get_abi, keccak256
+from src.utils.whale_stream import TRANSFER_TOPIC
+
+
+def word(value):
+    return format(value, '064x')
+
+
+class TestAbiRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.abi_dir = os.path.join(self.tmp.name, 'abi')
+        shutil.copytree(ABI_DIR, self.abi_dir)
+        self.registry = AbiRegistry(self.abi_dir, os.path.join(self.tmp.name, 'cache'))
+
+    def test_keccak_vectors(self):
+        self.assertEqual(_keccak256(b'').hex(), 'c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470')
+        # Inputs longer than one 136-byte block
+        self.assertEqual(_keccak256(b'a' * 300).hex(), '5b7e0e47a96f32a88b4f14ca177982790807c40e1a105742ba0fc1babe1ef826')
+        self.assertEqual(keccak256(b'a' * 300), _keccak256(b'a' * 300))
+
+    def test_hard_coded_selectors_match_the_abis(self):
+        aave, compound = self.registry.get('aave'), self.registry.get('compound')
+        self.assertEqual(aave.selector('getReserves'), '0x' + yield_scheduler.GET_RESERVES_SELECTOR)
+        self.assertEqual(aave.selector('getReserveData'), '0x' + yield_scheduler.GET_RESERVE_DATA_SELECTOR)
+        self.assertEqual(compound.selector('getAllMarkets'), '0x' + yield_scheduler.GET_ALL_MARKETS_SELECTOR)
+        self.assertEqual(self.registry.get('erc20').topic('Transfer'), TRANSFER_TOPIC)
+        for selector, sig in ((eth_rpc.AGGREGATE_SELECTOR, 'aggregate((address,bytes)[])'),
+                              (eth_rpc.GET_ETH_BALANCE_SELECTOR, 'getEthBalance(address)'),
+                              (yield_scheduler.SUPPLY_RATE_SELECTOR, 'supplyRatePerBlock()'),
+                              (yield_scheduler.BORROW_RATE_SELECTOR, 'borrowRatePerBlock()')):
+            self.assertEqual(keccak256(sig.encode()).hex()[:8], selector)
+
+    def test_overloads_need_a_signature(self):
+        compound = self.registry.get('compound')
+        with self.assertRaises(KeyError):
+            compound.selector('claimComp')
+        self.assertEqual(compound.selector('claimComp(address)'), '0x' + keccak256(b'claimComp(address)').hex()[:8])
+        with self.assertRaises(KeyError):
+            compound.selector('noSuchFunction')
+
+    def test_parsed_once_and_cached_between_runs(self):
+        first = self.registry.get('aave')
+        self.assertIs(self.registry.get('aave'), first)
+        self.assertIs(self.registry.get(os.path.join(self.abi_dir, 'aave_abi.json')), first)
+
+        # A new process (registry) loads the hashes from the cache
+        with mock.patch.object(abi_registry, 'keccak256', side_effect=AssertionError('hashed again')):
+            cached = AbiRegistry(self.abi_dir, self.registry.cache_dir).get('aave')
+        self.assertEqual(cached.selectors, first.selectors)
+        self.assertEqual(cached.topics, first.topics)
+
+        # Editing the ABI invalidates its cache entry
+        path = os.path.join(self.abi_dir, 'erc20_abi.json')
+        AbiRegistry(self.abi_dir, self.registry.cache_dir).get('erc20')
+        with open(path) as f:
+            text = f.read()
+        with open(path, 'w') as f:
+            f.write(text.replace('"Approval"', '"Approved"'))
+        erc20 = AbiRegistry(self.abi_dir, self.registry.cache_dir).get('erc20')
+        self.assertIn('Approved(address,address,uint256)', erc20.topics)
+        self.assertNotIn('Approval(address,address,uint256)', erc20.topics)
+
+    def test_decode_logs(self):
+        erc20 = self.registry.get('erc20')
+        sender, recipient = '0x' + '11' * 20, '0x' + '22' * 20
+        log = {'topics': [TRANSFER_TOPIC, '0x' + word(int(sender, 16)), '0x' + word(int(recipient, 16))],
+               'data': '0x' + word(10 ** 20)}
+        self.assertEqual(erc20.decode_log(log), ('Transfer', {'from': sender, 'to': recipient, 'value': 10 ** 20}))
+        # ERC-721 Transfer: same topic, token id indexed
+        self.assertIsNone(erc20.decode_log(dict(log, topics=log['topics'] + ['0x' + word(7)], data='0x')))
+        self.assertIsNone(erc20.decode_log(dict(log, topics=['0x' + word(1)])))
+
+        aave = self.registry.get('aave')
+        deposit = aave.event_by_topic[aave.topic('Deposit')]
+        names = [param['name'] for param in deposit['inputs']]
+        log = {'topics': [aave.topic('Deposit'), '0x' + word(1), '0x' + word(2), '0x' + word(3)],
+               'data': '0x' + word(500) + word(1_700_000_000)}
+        name, args = aave.decode_log(log)
+        self.assertEqual(name, 'Deposit')
+        self.assertEqual(list(args), names)
+        self.assertEqual(args['_amount'], 500)
+
+        compound = self.registry.get('compound')
+        text = b'Mint'
+        log = {'topics': [compound.topic('ActionPaused(string,bool)')],
+               'data': '0x' + word(64) + word(1) + word(len(text)) + text.hex().ljust(64, '0')}
+        self.assertEqual(compound.decode_log(log), ('ActionPaused', {'action': 'Mint', 'pauseState': True}))
+
+    def test_shared_registry(self):
+        self.assertIs(get_abi('aave'), get_abi('abi/aave_abi.json'))
+
+
+if __name__ == '__main__':
+    unittest.main()
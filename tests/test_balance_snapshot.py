@@ -0,0 +1,58 @@
+import unittest
+
+from src.tests.eth_stub import EthStub, stub_balance
+from src.utils.eth_rpc import EthRPC, RPCError, decode_aggregate, encode_aggregate
+from src.utils.whale_movement import balance_snapshot
+
+ADDRESSES = [f"0x{i:040x}" for i in range(1, 1201)]
+
+
+class TestBalanceSnapshot(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = EthStub(block=1000).__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.__exit__(None, None, None)
+
+    def setUp(self):
+        self.rpc = EthRPC(self.stub.url, pool_size=4)
+
+    def expected(self, block):
+        return {address: stub_balance(address, block) for address in ADDRESSES}
+
+    def test_batch_snapshot_is_pinned_to_one_block(self):
+        snapshot = balance_snapshot(ADDRESSES, method='batch', batch_size=500, rpc=self.rpc)
+        self.assertEqual(snapshot['block'], 1000)
+        self.assertEqual(snapshot['balances'], self.expected(1000))
+        # One eth_blockNumber plus ceil(1200 / 500) batches
+        self.assertEqual(self.rpc.requests_sent, 4)
+
+    def test_multicall_snapshot(self):
+        snapshot = balance_snapshot(ADDRESSES, block=900, method='multicall', batch_size=400, rpc=self.rpc)
+        self.assertEqual(snapshot['balances'], self.expected(900))
+        self.assertEqual(self.rpc.requests_sent, 3)
+
+    def test_requested_block_is_sent(self):
+        before = len(self.stub.calls)
+        balance_snapshot(ADDRESSES[:3], block=123, rpc=self.rpc)
+        self.assertEqual([params[1] for _, params in self.stub.calls[before:]], ['0x7b'] * 3)
+
+    def test_batch_errors_are_raised(self):
+        with self.assertRaises(RPCError):
+            self.rpc.batch([('eth_blockNumber', ()), ('eth_unknown', ())])
+
+    def test_aggregate_round_trip(self):
+        calls = [(f"0x{i:040x}", '4d2301cc' + f"{i:064x}") for i in range(3)]
+        data = encode_aggregate(calls)
+        self.assertTrue(data.startswith('0x252dba42'))
+        result = self.rpc.call('eth_call', ({'to': '0xcA11bde05977b3631167028862bE2a173976CA11', 'data': data}, 'latest'))
+        block, items = decode_aggregate(result)
+        self.assertEqual(block, 1000)
+        self.assertEqual([int(item.hex(), 16) for item in items], [stub_balance(f"0x{i:040x}", 1000) for i in range(3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
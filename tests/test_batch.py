@@ -0,0 +1,90 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.engine.batch import expand_jobs, flatten_analysis, resolve_strategy, run_batch
+from src.engine.cerebro import run_cerebro
+from src.strategies.momentum import MomentumStrategy
+from src.utils.data_loader import read_ohlcv_csv
+
+MANIFEST = """
+strategies:
+  - MomentumStrategy
+  - {strategy: MeanReversionStrategy, name: MR-20, params: {period: 20}}
+datasets:
+  BTC/USD: data/crypto/BTC_USD_data.csv
+  AAPL: data/stocks/AAPL_data.csv
+cash: [10000, 1000000]
+"""
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.manifest = os.path.join(self.tmp.name, 'manifest.yaml')
+        with open(self.manifest, 'w') as f:
+            f.write(MANIFEST)
+
+    def test_expand_jobs(self):
+        jobs = expand_jobs(self.manifest)
+        self.assertEqual(len(jobs), 8)
+        self.assertEqual([job['id'] for job in jobs], list(range(8)))
+        self.assertEqual((jobs[0]['label'], jobs[0]['dataset'], jobs[0]['cash']),
+                         ('MomentumStrategy', 'BTC/USD', 10000.0))
+        self.assertEqual((jobs[-1]['label'], jobs[-1]['params'], jobs[-1]['cash']),
+                         ('MR-20', {'period': 20}, 1000000.0))
+        self.assertTrue(os.path.isabs(jobs[0]['path']) and os.path.exists(jobs[0]['path']))
+        self.assertIs(resolve_strategy('src.strategies.momentum.MomentumStrategy'), MomentumStrategy)
+        with self.assertRaises(ValueError):
+            resolve_strategy('NoSuchStrategy')
+
+    def test_parallel_batch_matches_single_runs(self):
+        out_dir = os.path.join(self.tmp.name, 'out')
+        with self.assertNoLogs(level='ERROR'):
+            table = run_batch(self.manifest, out_dir, processes=2)
+        self.assertEqual(table['id'].tolist(), list(range(8)))
+        self.assertTrue((table['error'] == '').all())
+        self.assertTrue(os.path.exists(os.path.join(out_dir, 'results.csv')))
+        self.assertEqual(len(pd.read_csv(os.path.join(out_dir, 'results.csv'))), 8)
+
+        datasets = {'BTC/USD': read_ohlcv_csv('data/crypto/BTC_USD_data.csv'),
+                    'AAPL': read_ohlcv_csv('data/stocks/AAPL_data.csv')}
+        for row in table.itertuples():
+            strategy, params = (MomentumStrategy, {}) if row.label == 'MomentumStrategy' else \
+                (resolve_strategy('MeanReversionStrategy'), {'period': 20})
+            _, final_value = run_cerebro(strategy, datasets[row.dataset], row.cash, **params)
+            self.assertAlmostEqual(row.final_value, final_value, places=6)
+        # Analyzer output is flattened into columns
+        for column in ('sharpe', 'max_drawdown', 'win_rate', 'trades.total.total', 'drawdown.max.moneydown',
+                       'returns.rtot'):
+            self.assertIn(column, table.columns)
+
+    def test_failed_job_does_not_stop_the_batch(self):
+        manifest = {'strategies': [{'strategy': 'MomentumStrategy', 'params': {'period': 5}}, 'MomentumStrategy'],
+                    'datasets': {'AAPL': 'data/stocks/AAPL_data.csv'}}
+        with self.assertLogs(level='ERROR'):
+            table = run_batch(manifest, out_dir=None, processes=1)
+        self.assertIn('period', table['error'][0])
+        self.assertEqual(table['error'][1], '')
+        self.assertGreater(table['final_value'][1], 0)
+
+    def test_flatten_analysis(self):
+        analysis = {'total': {'open': 1, 'closed': 2}, 'streak': {'won': {'longest': 3}}, 'text': 'x'}
+        flat = flatten_analysis(analysis, 'trades')
+        self.assertEqual(flat, {'trades.total.open': 1, 'trades.total.closed': 2, 'trades.streak.won.longest': 3})
+
+    @unittest.skipUnless(importlib.util.find_spec('matplotlib'), 'matplotlib is not installed')
+    def test_plots_are_written_headless(self):
+        out_dir = os.path.join(self.tmp.name, 'out')
+        table = run_batch(self.manifest, out_dir, processes=2)
+        for path in table['plot']:
+            self.assertTrue(os.path.getsize(path) > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from src.utils import clients
+
+# Imports a module and prints how many clients it built and whether it read the config
+PROBE = """
+import {module}
+from src.utils import clients
+print(len(clients._clients), clients._config is not None)
+"""
+
+
+class TestClientRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'config.yaml')
+        with open(self.path, 'w') as f:
+            f.write("kraken:\n  api_key: key\n  secret_key: secret\n")
+        os.environ['TRADING_BOT_CONFIG'] = self.path
+        clients.reset()
+        self.builds = []
+
+        @clients.register('fake')
+        def fake(size=1):
+            self.builds.append(size)
+            return object()
+
+    def tearDown(self):
+        clients._factories.pop('fake', None)
+        clients.reset()
+        del os.environ['TRADING_BOT_CONFIG']
+        self.tmp.cleanup()
+
+    def test_config_read_once(self):
+        self.assertEqual(clients.get_config()['kraken']['api_key'], 'key')
+        os.remove(self.path)
+        self.assertEqual(clients.get_config()['kraken']['secret_key'], 'secret')
+
+    def test_client_built_once_and_shared(self):
+        self.assertFalse(clients.is_loaded('fake'))
+        first = clients.get_client('fake', size=4)
+        self.assertIs(clients.get_client('fake', size=8), first)
+        self.assertEqual(self.builds, [4])
+        clients.reset('fake')
+        self.assertIsNot(clients.get_client('fake'), first)
+        self.assertEqual(self.builds, [4, 1])
+
+    def test_concurrent_first_use_builds_once(self):
+        threads = [threading.Thread(target=clients.get_client, args=('fake',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.builds, [1])
+
+    def test_unknown_client(self):
+        with self.assertRaises(KeyError):
+            clients.get_client('nope')
+
+    def test_kraken_client_from_config(self):
+        kraken = clients.get_client('kraken')
+        self.assertEqual((kraken.apiKey, kraken.secret), ('key', 'secret'))
+
+    def test_imports_do_no_client_or_config_work(self):
+        # A fresh interpreter, since modules this process already imported would not run again
+        env = dict(os.environ, TRADING_BOT_CONFIG=os.path.join(self.tmp.name, 'missing.yaml'))
+        for module in ('src.utils.sentiment_analysis', 'src.utils.defi_integration', 'src.utils.whale_movement'):
+            with self.subTest(module=module):
+                out = subprocess.run([sys.executable, '-c', PROBE.format(module=module)], cwd=clients.PROJECT_ROOT,
+                                     env=env, capture_output=True, text=True)
+                self.assertEqual(out.returncode, 0, out.stderr)
+                self.assertEqual(out.stdout.split()[-2:], ['0', 'False'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.data_ingestion.crypto_kraken import last_stored_timestamp, ohlcv_path, sync_many
+from src.utils.data_loader import read_ohlcv_csv
+
+DAY = 86_400_000
+
+
+class FakeExchange:
+    """Serves generated candles the way ccxt's fetch_ohlcv pages them."""
+
+    rateLimit = 1
+
+    def __init__(self, candles, now):
+        self.candles = candles
+        self.now = now
+        self.calls = []
+
+    @staticmethod
+    def parse_timeframe(timeframe):
+        return {'1d': 86400, '1h': 3600}[timeframe]
+
+    def milliseconds(self):
+        return self.now
+
+    async def fetch_ohlcv(self, symbol, timeframe='1d', since=None, limit=None):
+        self.calls.append((symbol, timeframe, since))
+        await asyncio.sleep(0)
+        rows = [c for c in self.candles[(symbol, timeframe)] if since is None or c[0] >= since]
+        return rows[:limit] if since is not None else rows[-limit:]
+
+
+def candles(start, count, step=DAY):
+    return [[start + i * step, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0] for i in range(count)]
+
+
+class TestCryptoSync(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def sync(self, exchange, symbols, timeframes=('1d',), **kwargs):
+        return asyncio.run(sync_many(symbols, timeframes, exchange=exchange, data_dir=self.data_dir, rate=1000, **kwargs))
+
+    def test_appends_only_new_closed_candles(self):
+        start = 1_700_000_000_000 - 1_700_000_000_000 % DAY
+        history = candles(start, 50)
+        # The last candle is still forming
+        exchange = FakeExchange({('BTC/USD', '1d'): history}, now=start + 49 * DAY + 1)
+        self.assertEqual(self.sync(exchange, ['BTC/USD']), {('BTC/USD', '1d'): 49})
+
+        exchange.now = start + 50 * DAY
+        exchange.calls.clear()
+        self.assertEqual(self.sync(exchange, ['BTC/USD']), {('BTC/USD', '1d'): 1})
+        self.assertEqual(exchange.calls, [('BTC/USD', '1d', start + 49 * DAY)])
+
+        path = ohlcv_path('BTC/USD', '1d', self.data_dir)
+        data = read_ohlcv_csv(path)
+        self.assertEqual(len(data), 50)
+        self.assertTrue(data.index.is_unique)
+        self.assertEqual(last_stored_timestamp(path), start + 49 * DAY)
+
+    def test_pages_and_syncs_many_pairs(self):
+        start = 1_600_000_000_000 - 1_600_000_000_000 % DAY
+        books = {}
+        for i in range(20):
+            books[(f'C{i}/USD', '1d')] = candles(start, 30)
+            books[(f'C{i}/USD', '1h')] = candles(start, 100, step=3_600_000)
+        exchange = FakeExchange(books, now=start + 100 * DAY)
+        # Seed one file with the padded Kraken header so it resumes mid-history
+        with open(ohlcv_path('C0/USD', '1d', self.data_dir), 'w') as f:
+            f.write('timestamp , open , high , low , close , volume\n')
+            f.write(f"{time.strftime('%Y-%m-%d', time.gmtime((start + 9 * DAY) / 1000))}, 1, 2, 0.5, 1.5, 10\n")
+
+        results = self.sync(exchange, [f'C{i}/USD' for i in range(20)], ('1d', '1h'), burst=50, limit=7)
+        self.assertEqual(results[('C0/USD', '1d')], 20)
+        self.assertEqual(results[('C1/USD', '1d')], 7)  # a fresh file starts from the latest page
+        self.assertEqual(len(exchange.calls), 39 * 2 + 3)  # fresh pairs confirm with one empty page
+        self.assertEqual(len(read_ohlcv_csv(ohlcv_path('C0/USD', '1d', self.data_dir))), 21)
+
+    def test_rate_limit(self):
+        start = 1_600_000_000_000 - 1_600_000_000_000 % DAY
+        exchange = FakeExchange({(f'C{i}/USD', '1d'): candles(start, 3) for i in range(6)}, now=start + 10 * DAY)
+        began = time.monotonic()
+        asyncio.run(sync_many([f'C{i}/USD' for i in range(6)], exchange=exchange, data_dir=self.data_dir, rate=20, burst=1))
+        # Six requests at 20/s with no burst take at least 5 intervals
+        self.assertGreaterEqual(time.monotonic() - began, 0.24)
+
+
+if __name__ == '__main__':
+    unittest.main()
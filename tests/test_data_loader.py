@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.utils.data_loader import OHLCV_COLUMNS, load_ohlcv, read_ohlcv_csv
+
+
+class TestDataLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_dialects(self):
+        for path in ('data/crypto/BTC_USD_data.csv', 'data/stocks/AAPL_data.csv', 'data/bull_market.csv'):
+            with self.subTest(path=path):
+                data = read_ohlcv_csv(path)
+                self.assertEqual(list(data.columns), OHLCV_COLUMNS)
+                self.assertEqual(data.index.name, 'timestamp')
+                self.assertIsNone(data.index.tz)
+                self.assertTrue(data.index.is_monotonic_increasing)
+                self.assertTrue(all(dtype == np.float64 for dtype in data.dtypes))
+                self.assertFalse(data.isna().any().any())
+
+    def test_aapl_timestamps_are_utc(self):
+        data = read_ohlcv_csv('data/stocks/AAPL_data.csv')
+        self.assertEqual(str(data.index[0]), '2022-01-03 05:00:00')
+        self.assertEqual(data['close'].iloc[0], 182.01)
+
+    def test_cache_round_trip_and_invalidation(self):
+        source = os.path.join(self.cache_dir, 'BTC_USD_data.csv')
+        shutil.copy('data/crypto/BTC_USD_data.csv', source)
+        cold = load_ohlcv(source, cache_dir=self.cache_dir)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)  # the CSV and one cache entry
+        warm = load_ohlcv(source, cache_dir=self.cache_dir)
+        self.assertTrue(warm.equals(cold))
+
+        with open(source, 'a') as f:
+            f.write('2024-11-05, 1.0, 2.0, 0.5, 1.5, 10.0\n')
+        os.utime(source, ns=(0, os.stat(source).st_mtime_ns + 1))
+        refreshed = load_ohlcv(source, cache_dir=self.cache_dir)
+        self.assertEqual(len(refreshed), len(cold) + 1)
+
+    def test_float32(self):
+        data = load_ohlcv('data/bull_market.csv', float32=True, cache_dir=self.cache_dir)
+        self.assertTrue(all(dtype == np.float32 for dtype in data.dtypes))
+        again = load_ohlcv('data/bull_market.csv', float32=True, cache_dir=self.cache_dir)
+        self.assertTrue(again.equals(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.utils import data_logger
+from src.utils.event_recorder import read_events
+
+
+class TestLogTrade(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmp.name, 'trade_log.txt')
+        self.events = os.path.join(self.tmp.name, 'trade_events')
+        patches = [mock.patch.object(data_logger, 'log_file_path', self.log_path),
+                   mock.patch.object(data_logger, 'EVENTS_DIR', self.events),
+                   mock.patch.object(data_logger, '_default_recorder', None)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        recorder = data_logger._default_recorder
+        if recorder is not None:
+            recorder.close()
+        for handler in list(data_logger.logger.handlers):
+            data_logger.logger.removeHandler(handler)
+            handler.close()
+        self.tmp.cleanup()
+
+    def test_lines_and_records(self):
+        data_logger.log_trade(28.5, 'BUY', 101.25, timestamp=60.0)
+        data_logger.log_trade('RSI crossed 70', 'sell', 103.0, timestamp=120.0)
+        data_logger.log_trade('flat', 'hold', 102.0, timestamp=180.0)
+        data_logger.get_trade_recorder().flush()
+
+        with open(self.log_path) as f:
+            lines = [line.split(' - ', 2)[2].rstrip('\n') for line in f]
+        self.assertEqual(lines, ['Signal: 28.5, Decision: BUY, Execution Price: 101.25',
+                                 'Signal: RSI crossed 70, Decision: sell, Execution Price: 103.0',
+                                 'Signal: flat, Decision: hold, Execution Price: 102.0'])
+
+        signals = read_events(self.events, 'signal')
+        self.assertEqual(signals['side'].tolist(), [1, -1, 0])
+        self.assertEqual(signals['price'].tolist(), [101.25, 103.0, 102.0])
+        self.assertEqual(signals['indicator'][0], 28.5)
+        self.assertTrue(math.isnan(signals['indicator'][1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
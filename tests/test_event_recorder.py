@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import backtrader as bt
+import numpy as np
+
+from src.engine.cerebro import run_cerebro, transactions
+from src.engine.live import LiveRunner, PaperBroker, ReplayFeed, live_strategy
+from src.strategies.mean_reversion import MeanReversionStrategy
+from src.strategies.momentum import MomentumStrategy
+from src.utils.data_loader import read_ohlcv_csv
+from src.utils.event_recorder import NULL_RECORDER, EventRecorder, bt_time, read_events
+
+
+class Capture(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record.levelno, record.getMessage(), threading.current_thread().name))
+
+
+class TestEventRecorder(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.btc = read_ohlcv_csv('data/crypto/BTC_USD_data.csv')
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_columnar_round_trip(self):
+        path = os.path.join(self.tmp.name, 'events')
+        # Tiny chunks: every few records go through the writer thread, and with
+        # only two chunks per kind the recording side has to wait for it
+        with EventRecorder(path, level=logging.DEBUG, chunk_size=4, chunks=2) as recorder:
+            for i in range(101):
+                recorder.bar(1_600_000_000.0 + 60 * i, 1.0, 2.0, 0.5, 1.5 + i, 10.0, i / 2)
+            recorder.signal(1_600_000_000.0, -1, 99.5, 'stop_loss', 28.0)
+            recorder.order(1_600_000_000.0, 7, 'Margin', 1, 99.5)
+            recorder.fill(1_600_000_060.0, 8, -1, 100.0, -100.0)
+
+        bars = read_events(path, 'bar')
+        self.assertEqual(len(bars), 101)
+        np.testing.assert_array_equal(bars['close'], 1.5 + np.arange(101))
+        np.testing.assert_array_equal(bars['seq'], np.arange(1, 102))
+        self.assertEqual(str(bars['time'].iloc[1]), '2020-09-13 12:27:40')
+        signal = read_events(path, 'signal').iloc[0]
+        self.assertEqual((signal.side, signal.reason, signal.price, signal.seq), (-1, 2, 99.5, 102))
+        order = read_events(path, 'order').iloc[0]
+        self.assertEqual((order.ref, order.status), (7, 7))
+        self.assertEqual(read_events(path, 'fill')['value'].tolist(), [-100.0])
+        self.assertEqual(recorder.counts, {'bar': 101, 'signal': 1, 'order': 1, 'fill': 1})
+
+    def test_flush_interval(self):
+        path = os.path.join(self.tmp.name, 'events')
+        with EventRecorder(path, flush_interval=0.05) as recorder:
+            recorder.fill(1_600_000_000.0, 1, 1, 100.0, 100.0)
+            # One record in a 4096-row chunk: only the interval gets it to disk before close()
+            deadline = time.monotonic() + 5.0
+            while not len(read_events(path, 'fill')) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(read_events(path, 'fill')['price'].tolist(), [100.0])
+
+            recorder.fill(1_600_000_060.0, 2, -1, 101.0, -101.0)
+            deadline = time.monotonic() + 5.0
+            while len(read_events(path, 'fill')) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(read_events(path, 'fill')['ref'].tolist(), [1, 2])
+
+    def test_shared_between_threads(self):
+        with EventRecorder(chunk_size=16, chunks=2, flush_interval=0.001) as recorder:
+            def produce(side):
+                for i in range(2000):
+                    recorder.signal(float(i), side, 100.0 + i)
+
+            threads = [threading.Thread(target=produce, args=(side,)) for side in (1, -1, 1, -1)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            signals = recorder.frame('signal')
+        self.assertEqual(len(signals), 8000)
+        self.assertEqual(sorted(signals['seq']), list(range(1, 8001)))
+        self.assertEqual((signals['side'] == 1).sum(), 4000)
+
+    def test_levels_and_formatting_off_the_hot_path(self):
+        logger = logging.getLogger('test_event_recorder')
+        logger.propagate = False
+        handler = Capture()
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        logger.setLevel(logging.INFO)
+
+        with EventRecorder(level=logging.DEBUG, logger=logger) as recorder:
+            recorder.bar(0.0, 1.0, 1.0, 1.0, 1.0)
+            recorder.signal(86400.0, 1, 20910.8, 'entry', 28.25)
+        # Bars are recorded but below the logger's level, so never formatted
+        self.assertEqual(handler.records,
+                         [(logging.INFO, '1970-01-02 00:00:00 signal BUY (entry) at 20910.80, indicator 28.2500',
+                           'event-recorder')])
+
+        recorder = EventRecorder(level=logging.INFO)
+        self.assertEqual((recorder.debug, recorder.info), (False, True))
+        recorder.close()
+        self.assertEqual((NULL_RECORDER.debug, NULL_RECORDER.info), (False, False))
+
+    def test_backtrader_strategies(self):
+        # Bars before the indicators' minimum period never reach next()
+        for strategy, warmup in ((MomentumStrategy, 8), (MeanReversionStrategy, 9)):
+            with self.subTest(strategy=strategy.__name__):
+                with EventRecorder(level=logging.DEBUG) as recorder:
+                    result, _ = run_cerebro(strategy, self.btc, 1000000.0,
+                                            analyzers={'transactions': bt.analyzers.Transactions}, recorder=recorder)
+                    bars, fills, orders = recorder.frame('bar'), recorder.frame('fill'), recorder.frame('order')
+
+                self.assertEqual(len(bars), len(self.btc) - warmup)
+                self.assertEqual(bars['close'].iloc[-1], self.btc['close'].iloc[-1])
+                self.assertEqual(bars['time'].iloc[-1], self.btc.index[-1])
+                expected = transactions(result)
+                self.assertEqual(list(zip(fills['time'], fills['size'], fills['price'])), expected)
+                self.assertEqual(len(recorder.frame('signal')), len(orders[orders['status'] == 1]))
+
+    def test_live_runner(self):
+        with EventRecorder(level=logging.INFO) as recorder:
+            broker = PaperBroker(1000000.0, recorder)
+            runner = LiveRunner(live_strategy(MomentumStrategy, recorder=recorder), ReplayFeed(self.btc), broker, recorder)
+            asyncio.run(runner.run())
+            fills, signals = recorder.frame('fill'), recorder.frame('signal')
+        self.assertEqual(list(zip(fills['time'], fills['size'], fills['price'])), broker.fills)
+        self.assertEqual(len(signals), runner.orders)
+        self.assertEqual(recorder.counts['bar'], 0)
+
+    def test_bt_time(self):
+        self.assertEqual(bt_time(bt.date2num(self.btc.index[3].to_pydatetime())), self.btc.index[3].timestamp())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from src.utils.feature_feed import asof_join, build_feature_frame, feature_data, line_name, read_signal_csv
+
+
+def bars(n=6):
+    index = pd.date_range('2024-01-01', periods=n, freq='D', name='timestamp')
+    close = np.arange(100.0, 100.0 + n)
+    return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': 1.0}, index=index)
+
+
+class RecordSignals(bt.Strategy):
+
+    def __init__(self):
+        self.seen = []
+
+    def next(self):
+        self.seen.append((self.data.sentiment[0], self.data.whales_inflow[0]))
+
+
+class TestFeatureFeed(unittest.TestCase):
+
+    def test_asof_join_never_looks_ahead(self):
+        signal = pd.Series([1.0, 2.0, 3.0], index=pd.to_datetime(['2024-01-01 12:00', '2024-01-03 00:00', '2024-01-04 06:00']))
+        aligned = asof_join(bars().index, signal)
+        # 01-01 00:00 precedes the first value; 01-03 sees its own value; 01-04 00:00 does not see 06:00
+        np.testing.assert_array_equal(aligned.to_numpy(), [np.nan, 1.0, 2.0, 2.0, 3.0, 3.0])
+
+    def test_delay_and_max_age(self):
+        signal = pd.Series([1.0, 2.0], index=pd.to_datetime(['2024-01-01', '2024-01-02']))
+        delayed = asof_join(bars().index, signal, delay='1D', fill=0.0)
+        np.testing.assert_array_equal(delayed.to_numpy(), [0.0, 1.0, 2.0, 2.0, 2.0, 2.0])
+        fresh = asof_join(bars().index, signal, max_age='1D', fill=0.0)
+        np.testing.assert_array_equal(fresh.to_numpy(), [1.0, 2.0, 2.0, 0.0, 0.0, 0.0])
+
+    def test_tz_aware_signals_are_aligned_in_utc(self):
+        signal = pd.Series([5.0], index=pd.DatetimeIndex(['2024-01-02 01:00'], tz='Europe/Berlin'))
+        aligned = asof_join(bars().index, signal, fill=0.0)
+        np.testing.assert_array_equal(aligned.to_numpy(), [0.0, 5.0, 5.0, 5.0, 5.0, 5.0])
+
+    def test_build_feature_frame_names_columns(self):
+        whales = pd.DataFrame({'inflow': [1.0, 2.0], 'outflow': [3.0, 4.0]},
+                              index=pd.to_datetime(['2024-01-02', '2024-01-04']))
+        sentiment = pd.Series([0.5], index=pd.to_datetime(['2024-01-03']))
+        frame = build_feature_frame(bars(), {'reddit/CryptoCurrency': sentiment, 'whales': whales})
+        self.assertEqual(list(frame.columns)[5:], ['reddit_cryptocurrency', 'whales_inflow', 'whales_outflow'])
+        self.assertEqual(frame['whales_outflow'].tolist(), [0.0, 3.0, 3.0, 4.0, 4.0, 4.0])
+        self.assertEqual(line_name('7d apy'), 'f_7d_apy')
+
+    def test_read_signal_csv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'sentiment.csv')
+            with open(path, 'w') as f:
+                f.write("date      , sentiment\n2024-01-03, 0.3\n2024-01-01, -0.2\n")
+            signal = read_signal_csv(path)
+        self.assertEqual(list(signal.columns), ['sentiment'])
+        self.assertEqual(signal['sentiment'].tolist(), [-0.2, 0.3])
+
+    def test_feature_data_exposes_lines(self):
+        whales = pd.DataFrame({'inflow': [7.0]}, index=pd.to_datetime(['2024-01-05']))
+        sentiment = pd.Series([0.1, 0.4], index=pd.to_datetime(['2024-01-01', '2024-01-04']))
+        frame = build_feature_frame(bars(), {'sentiment': sentiment, 'whales_inflow': whales})
+
+        cerebro = bt.Cerebro()
+        cerebro.addstrategy(RecordSignals)
+        cerebro.adddata(feature_data(frame))
+        strategy = cerebro.run()[0]
+        self.assertEqual(strategy.seen, list(zip(frame['sentiment'], frame['whales_inflow'])))
+
+
+if __name__ == '__main__':
+    unittest.main()
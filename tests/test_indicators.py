@@ -0,0 +1,117 @@
+import unittest
+
+import backtrader as bt
+import numpy as np
+
+from src.engine.cerebro import run_cerebro
+from src.indicators import batch, online
+from src.utils.data_loader import read_ohlcv_csv
+
+PERIODS = (2, 14, 20)
+
+
+class Recorder(bt.Strategy):
+    params = dict(period=14)
+
+    def __init__(self):
+        p = self.params.period
+        self.lines_ = {
+            'sma': bt.indicators.SimpleMovingAverage(self.data.close, period=p),
+            'stddev': bt.indicators.StandardDeviation(self.data.close, period=p),
+            'smma': bt.indicators.SmoothedMovingAverage(self.data.close, period=p),
+            'rsi': bt.indicators.RSI(self.data.close, period=p),
+            'atr': bt.indicators.AverageTrueRange(self.data, period=p),
+        }
+        self.values = {name: [] for name in self.lines_}
+
+    def prenext(self):
+        for name, line in self.lines_.items():
+            self.values[name].append(line[0])
+
+    def next(self):
+        self.prenext()
+
+
+def backtrader_values(data_df, period):
+    result, _ = run_cerebro(Recorder, data_df, period=period)
+    # One value per bar; bars before an indicator's minperiod hold backtrader's NaN
+    return {name: np.asarray(recorded, dtype=np.float64) for name, recorded in result.values.items()}
+
+
+class TestIndicators(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.datasets = {
+            'BTC/USD': read_ohlcv_csv('data/crypto/BTC_USD_data.csv'),
+            'AAPL': read_ohlcv_csv('data/stocks/AAPL_data.csv'),
+        }
+        cls.expected = {(name, period): backtrader_values(data_df, period)
+                        for name, data_df in cls.datasets.items() for period in PERIODS}
+
+    def check(self, name, values, expected, exact):
+        if exact:
+            np.testing.assert_array_equal(values, expected, err_msg=name)
+        else:
+            np.testing.assert_allclose(values, expected, rtol=1e-9, atol=1e-9 * np.nanmax(np.abs(expected)),
+                                       err_msg=name)
+
+    def check_stddev(self, values, expected, close):
+        # Backtrader's mean(x^2) - mean(x)^2 is only accurate to about eps * max(x)^2, so
+        # nearly flat windows are compared on the variance at that scale
+        np.testing.assert_allclose(values ** 2, expected ** 2, rtol=1e-9, atol=64 * np.finfo(float).eps * np.max(close) ** 2)
+
+    def cases(self):
+        return [(name, data_df, period, self.expected[(name, period)])
+                for name, data_df in self.datasets.items() for period in PERIODS]
+
+    def test_batch_matches_backtrader(self):
+        for name, data_df, p, expected in self.cases():
+            with self.subTest(dataset=name, period=p):
+                h, l, c = (data_df[column].to_numpy() for column in ('high', 'low', 'close'))
+                self.check('sma', batch.sma(c, p), expected['sma'], exact=False)
+                self.check_stddev(batch.stddev(c, p), expected['stddev'], c)
+                self.check('smma', batch.smma(c, p), expected['smma'], exact=True)
+                self.check('rsi', batch.rsi(c, p), expected['rsi'], exact=True)
+                self.check('atr', batch.atr(h, l, c, p), expected['atr'], exact=True)
+
+    def test_online_matches_backtrader(self):
+        for name, data_df, p, expected in self.cases():
+            with self.subTest(dataset=name, period=p):
+                h, l, c = (data_df[column].to_numpy() for column in ('high', 'low', 'close'))
+                self.check('sma', online.replay(online.SMA(p), c), expected['sma'], exact=False)
+                self.check_stddev(online.replay(online.StdDev(p), c), expected['stddev'], c)
+                self.check('smma', online.replay(online.SMMA(p), c), expected['smma'], exact=True)
+                self.check('rsi', online.replay(online.RSI(p), c), expected['rsi'], exact=True)
+                self.check('atr', online.replay(online.ATR(p), h, l, c), expected['atr'], exact=True)
+
+    def test_warmup_and_long_runs(self):
+        rng = np.random.default_rng(0)
+        close = 30_000 + np.cumsum(rng.normal(0, 50, 20_000))
+        high, low = close + rng.uniform(0, 40, len(close)), close - rng.uniform(0, 40, len(close))
+        for p in PERIODS:
+            # Same NaN warm-up as the array versions, and no drift after many resyncs
+            np.testing.assert_allclose(online.replay(online.SMA(p), close), batch.sma(close, p), rtol=1e-12)
+            np.testing.assert_allclose(online.replay(online.StdDev(p), close) ** 2, batch.stddev(close, p) ** 2,
+                                       rtol=1e-9, atol=64 * np.finfo(float).eps * np.max(close) ** 2)
+            np.testing.assert_array_equal(online.replay(online.RSI(p), close), batch.rsi(close, p))
+            np.testing.assert_array_equal(online.replay(online.ATR(p), high, low, close), batch.atr(high, low, close, p))
+
+    def test_live_updates_continue_a_replayed_history(self):
+        close = read_ohlcv_csv('data/crypto/BTC_USD_data.csv')['close'].to_numpy()
+        rsi = online.RSI(14)
+        online.replay(rsi, close[:-5])
+        live = [rsi.update(value) for value in close[-5:].tolist()]
+        self.assertEqual(live, batch.rsi(close, 14)[-5:].tolist())
+        self.assertEqual(rsi.value, live[-1])
+
+    def test_flat_prices(self):
+        rsi, stddev = online.RSI(3), online.StdDev(3)
+        values = [(rsi.update(100.0), stddev.update(100.0)) for _ in range(6)]
+        self.assertTrue(np.isnan(values[-1][0]))
+        self.assertEqual(values[-1][1], 0.0)
+        self.assertFalse(hasattr(rsi, '__dict__'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import asyncio
+import time
+import unittest
+
+import backtrader as bt
+
+from src.engine.cerebro import run_cerebro, transactions
+from src.engine.live import (Bar, LatencyHistogram, LiveRunner, PaperBroker, QueueFeed, ReplayFeed, TradeBars,
+                             live_strategy)
+from src.strategies.mean_reversion import MeanReversionStrategy
+from src.strategies.momentum import MomentumStrategy
+from src.utils.data_loader import read_ohlcv_csv
+
+
+def run_live(strategy, feed, cash=10000.0, **params):
+    runner = LiveRunner(live_strategy(strategy, **params), feed, PaperBroker(cash))
+    asyncio.run(runner.run())
+    return runner
+
+
+async def async_iter(items):
+    for item in items:
+        yield item
+
+
+class TestLiveRunner(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.datasets = {
+            'BTC/USD': read_ohlcv_csv('data/crypto/BTC_USD_data.csv'),
+            'AAPL': read_ohlcv_csv('data/stocks/AAPL_data.csv'),
+        }
+
+    def assert_parity(self, strategy, cash=10000.0, **params):
+        for name, data_df in self.datasets.items():
+            with self.subTest(dataset=name, strategy=strategy.__name__, cash=cash, params=params):
+                result, bt_value = run_cerebro(strategy, data_df, cash, analyzers={'transactions': bt.analyzers.Transactions},
+                                               **params)
+                runner = run_live(strategy, ReplayFeed(data_df), cash, **params)
+                self.assertEqual(runner.broker.fills, transactions(result))
+                self.assertAlmostEqual(runner.broker.value, bt_value, places=6)
+                self.assertEqual(runner.bars, len(data_df))
+                self.assertEqual(runner.tick_to_signal.count, len(data_df))
+                self.assertEqual(runner.signal_to_order.count, runner.orders)
+
+    def test_mean_reversion_matches_backtrader(self):
+        self.assert_parity(MeanReversionStrategy)
+        self.assert_parity(MeanReversionStrategy, cash=1000000.0, period=20)
+
+    def test_momentum_matches_backtrader(self):
+        self.assert_parity(MomentumStrategy)
+        self.assert_parity(MomentumStrategy, cash=1000000.0)
+        self.assert_parity(MomentumStrategy, cash=1000000.0, rsi_period=14, stop_loss=0.05, take_profit=0.1)
+
+    def test_accelerated_replay(self):
+        data_df = self.datasets['BTC/USD']
+        span = (data_df.index[-1] - data_df.index[0]).total_seconds()
+        speed = span / 0.25   # the whole history in a quarter of a second
+        start = time.perf_counter()
+        runner = run_live(MomentumStrategy, ReplayFeed(data_df, speed), 1000000.0)
+        elapsed = time.perf_counter() - start
+        self.assertGreaterEqual(elapsed, 0.25)
+        self.assertLess(elapsed, 5.0)
+        self.assertEqual(runner.broker.fills, run_live(MomentumStrategy, ReplayFeed(data_df), 1000000.0).broker.fills)
+        self.assertGreater(runner.tick_to_signal.percentile(50), 0)
+        self.assertIn('p99', str(runner.signal_to_order))
+
+    def test_pushed_bars(self):
+        data_df = self.datasets['BTC/USD'].iloc[:100]
+        feed = QueueFeed()
+
+        async def websocket():
+            for ts, row in data_df.iterrows():
+                feed.put(Bar(ts, row.open, row.high, row.low, row.close, row.volume))
+                await asyncio.sleep(0)
+            feed.close()
+
+        async def main():
+            runner = LiveRunner(live_strategy(MomentumStrategy), feed, PaperBroker(1000000.0))
+            await asyncio.gather(websocket(), runner.run())
+            return runner
+
+        runner = asyncio.run(main())
+        expected = run_live(MomentumStrategy, ReplayFeed(data_df), 1000000.0)
+        self.assertEqual(runner.bars, 100)
+        self.assertEqual(runner.broker.fills, expected.broker.fills)
+
+    def test_trades_roll_up_into_bars(self):
+        trades = [(0.0, 10.0, 1.0), (20.0, 12.0, 2.0), (59.0, 9.0, 1.0), (60.0, 11.0, 3.0), (185.0, 13.0, 1.0)]
+
+        async def collect():
+            return [bar async for bar in TradeBars(async_iter(trades), interval=60.0)]
+
+        bars = asyncio.run(collect())
+        self.assertEqual([(b.time, b.open, b.high, b.low, b.close, b.volume) for b in bars],
+                         [(0.0, 10.0, 12.0, 9.0, 9.0, 4.0), (60.0, 11.0, 11.0, 11.0, 11.0, 3.0),
+                          (180.0, 13.0, 13.0, 13.0, 13.0, 1.0)])
+
+    def test_feed_errors_propagate(self):
+        async def broken():
+            yield Bar(0, 1.0, 1.0, 1.0, 1.0)
+            raise ConnectionError('feed dropped')
+
+        runner = LiveRunner(live_strategy(MomentumStrategy), broken())
+        with self.assertRaises(ConnectionError):
+            asyncio.run(runner.run())
+        self.assertEqual(runner.bars, 1)
+
+    def test_histogram_percentiles(self):
+        histogram = LatencyHistogram('test')
+        self.assertIsNone(histogram.percentile(50))
+        for ns in range(1, 100_001):
+            histogram.record(ns)
+        for q in (1, 50, 90, 99, 100):
+            exact = 1000 * q
+            self.assertLessEqual(abs(histogram.percentile(q) - exact), exact * 0.125)
+        self.assertEqual(histogram.percentile(100), 100_000)
+        self.assertEqual((histogram.min, histogram.count), (1, 100_000))
+        self.assertLess(len(histogram.counts), 150)
+
+    def test_unknown_strategy_or_param(self):
+        with self.assertRaises(TypeError):
+            live_strategy(MomentumStrategy, period=5)
+        with self.assertRaises(ValueError):
+            live_strategy(bt.Strategy)
+
+
+if __name__ == '__main__':
+    unittest.main()
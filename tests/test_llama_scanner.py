@@ -0,0 +1,128 @@
+import json
+import socket
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.defi.llama_scanner import (ProtocolHistory, ProtocolScanner, filter_protocols, iter_json_array,
+                                    protocols_table)
+from src.defi.yield_farming_zerion import fetch_defi_data
+from src.tests.llama_stub import LlamaStub, fake_protocols
+
+
+def old_filter(protocols, min_tvl, min_apy):
+    """The dict-based filter fetch_defi_data used before the scanner."""
+    selected = []
+    for protocol in protocols:
+        tvl = protocol.get('tvl') if protocol.get('tvl') is not None else 0
+        apy = protocol.get('apy') if protocol.get('apy') is not None else 0
+        if tvl >= min_tvl and apy >= min_apy:
+            selected.append({'name': protocol.get('name', 'Unknown'), 'tvl': tvl, 'apy': apy,
+                             'chain': protocol.get('chain', 'Unknown')})
+    return sorted(selected, key=lambda x: x['apy'], reverse=True)
+
+
+class TestIterJsonArray(unittest.TestCase):
+
+    def test_any_chunking_gives_the_same_elements(self):
+        items = [{'name': 'Ünïcode ✓', 'tvl': 1.5}, [1, 2], 3, {'nested': {'a': [None, True]}}, 'x', 12345]
+        raw = json.dumps(items, ensure_ascii=False).encode()
+        for size in (1, 2, 3, 7, len(raw)):
+            chunks = [raw[i:i + size] for i in range(0, len(raw), size)]
+            self.assertEqual(list(iter_json_array(chunks)), items, size)
+
+    def test_empty_and_invalid_payloads(self):
+        self.assertEqual(list(iter_json_array([b' [ ] '])), [])
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'{"error": "rate limited"}']))
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'[{"a": 1}, {"b"']))
+        with self.assertRaises(ValueError):
+            list(iter_json_array([]))
+
+
+class TestProtocolScanner(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = LlamaStub().__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.__exit__(None, None, None)
+
+    def setUp(self):
+        self.protocols = fake_protocols(500)
+        self.stub.set_protocols(self.protocols)
+        self.stub.not_modified = 0
+        self.cache = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache.cleanup)
+        self.history = ProtocolHistory(':memory:')
+        self.addCleanup(self.history.close)
+
+    def scanner(self):
+        return ProtocolScanner(self.stub.url, cache_dir=self.cache.name, history=self.history)
+
+    def test_filter_matches_the_old_dict_filter(self):
+        table = protocols_table(self.protocols)
+        for min_tvl, min_apy in ((1000, 2), (0, 0), (4_000_000, 30)):
+            ranked = filter_protocols(table, min_tvl, min_apy)[['name', 'tvl', 'apy', 'chain']]
+            self.assertEqual(ranked.to_dict('records'), old_filter(self.protocols, min_tvl, min_apy))
+
+    def test_filter_by_chain_and_top(self):
+        ranked = filter_protocols(protocols_table(self.protocols), 1000, 2, chain='Solana', top=5)
+        self.assertEqual(len(ranked), 5)
+        self.assertTrue((ranked['chain'] == 'Solana').all())
+        self.assertTrue(np.all(np.diff(ranked['apy'].to_numpy()) <= 0))
+
+    def test_unchanged_payload_is_not_downloaded_again(self):
+        scanner = self.scanner()
+        first = scanner.scan()
+        self.assertEqual(scanner.last_status, 200)
+        self.assertEqual(len(first), 500)
+
+        second = scanner.scan()
+        self.assertEqual(scanner.last_status, 304)
+        self.assertIs(second, first)
+        self.assertEqual(self.stub.not_modified, 1)
+        self.assertEqual(len(self.history.times()), 1)
+
+    def test_cached_table_survives_a_restart(self):
+        expected = self.scanner().scan()
+        scanner = self.scanner()
+        table = scanner.scan()
+        self.assertEqual(scanner.last_status, 304)
+        self.assertEqual(table.to_dict('records'), expected.to_dict('records'))
+
+    def test_changed_payload_is_recorded_and_deltas_computed(self):
+        scanner = self.scanner()
+        scanner.scan()
+        before = self.history.times()[0]
+
+        changed = [dict(p, apy=(p['apy'] or 0) + 1.0) if p['name'] == 'Protocol 1' else p for p in self.protocols]
+        self.stub.set_protocols(changed)
+        table = scanner.scan()
+        self.assertEqual(scanner.last_status, 200)
+        self.assertEqual(table.loc[table['name'] == 'Protocol 1', 'apy'].item(), self.protocols[1]['apy'] + 1.0)
+        self.assertEqual(len(self.history.times()), 2)
+
+        deltas = self.history.deltas(before)
+        self.assertEqual(deltas.iloc[0]['name'], 'Protocol 1')
+        self.assertAlmostEqual(deltas.iloc[0]['apy_delta'], 1.0)
+        self.assertTrue((deltas['apy_delta'].iloc[1:] == 0).all())
+
+    def test_fetch_defi_data_keeps_its_return_shape(self):
+        result = fetch_defi_data(scanner=self.scanner())
+        self.assertEqual(result, old_filter(self.protocols, 1000, 2))
+
+    def test_fetch_defi_data_returns_none_on_errors(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        scanner = ProtocolScanner(f"http://127.0.0.1:{port}/protocols", cache_dir=self.cache.name)
+        self.assertIsNone(fetch_defi_data(scanner=scanner))
+
+
+if __name__ == '__main__':
+    unittest.main()
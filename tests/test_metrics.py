@@ -0,0 +1,99 @@
+import unittest
+
+import backtrader as bt
+import numpy as np
+
+from src.engine.batch import EquityCurve
+from src.engine.cerebro import run_cerebro, transactions
+from src.engine.metrics import METRICS, compute_metrics, fill_arrays, pad_trades, trade_pnl, vector_metrics
+from src.engine.sweep import sweep
+from src.engine.vectorized import run_vectorized
+from src.strategies.mean_reversion import MeanReversionStrategy
+from src.strategies.momentum import MomentumStrategy
+from src.utils.data_loader import read_ohlcv_csv
+
+
+class TestMetrics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.datasets = {name: read_ohlcv_csv(path) for name, path in (
+            ('AAPL', 'data/stocks/AAPL_data.csv'),
+            ('BTC', 'data/crypto/BTC_USD_data.csv'),
+            ('bull', 'data/bull_market.csv'),
+        )}
+
+    def test_matches_backtrader_analyzers(self):
+        analyzers = {'transactions': bt.analyzers.Transactions, 'trades': bt.analyzers.TradeAnalyzer,
+                     'drawdown': bt.analyzers.DrawDown, 'equity': EquityCurve}
+        for name, data_df in self.datasets.items():
+            for strategy in (MomentumStrategy, MeanReversionStrategy):
+                with self.subTest(dataset=name, strategy=strategy.__name__):
+                    result, final_value = run_cerebro(strategy, data_df, 1000000.0, analyzers=analyzers)
+                    fills = transactions(result)
+                    position, traded = fill_arrays(fills, len(data_df), data_df.index)
+                    metrics = compute_metrics(result.analyzers.equity.get_analysis(), trade_pnl(fills), position,
+                                              traded)
+
+                    trades = result.analyzers.trades.get_analysis()
+                    drawdown = result.analyzers.drawdown.get_analysis()
+                    closed = trades.get('total', {}).get('closed', 0)
+                    self.assertEqual(metrics['trades'], closed)
+                    if closed:
+                        self.assertAlmostEqual(metrics['win_rate'], trades.won.total / closed * 100)
+                    self.assertAlmostEqual(metrics['max_drawdown'], drawdown.max.drawdown)
+                    self.assertEqual(metrics['max_drawdown_len'], drawdown.max.len)
+                    self.assertAlmostEqual(metrics['total_return_pct'], (final_value / 1000000.0 - 1) * 100)
+
+    def test_batch_equals_single_runs(self):
+        data_df = self.datasets['AAPL']
+        results = [run_vectorized(MomentumStrategy, data_df, 1000000.0, rsi_period=period) for period in (6, 8, 14)]
+        batch = vector_metrics(results)
+        self.assertEqual(set(batch), set(METRICS))
+        for row, result in enumerate(results):
+            single = vector_metrics(result)
+            for name in METRICS:
+                np.testing.assert_allclose(batch[name][row], single[name], err_msg=name)
+
+    def test_trade_pnl(self):
+        # Long 2 at 10 closed at 12; long 1 at 10 flipped by a sell of 3 at 11 to short 2, closed at 8
+        fills = [(0, 2, 10.0), (1, -2, 12.0), (2, 1, 10.0), (3, -3, 11.0), (4, 2, 8.0)]
+        np.testing.assert_allclose(trade_pnl(fills), [4.0, 1.0, 6.0])
+        np.testing.assert_allclose(trade_pnl([(0, 1, 10.0)]), [])
+        padded = pad_trades([np.array([1.0]), np.array([]), np.array([2.0, -1.0])])
+        self.assertEqual(padded.shape, (3, 2))
+        self.assertEqual(np.isnan(padded).sum(), 3)
+
+    def test_exposure_and_turnover(self):
+        equity = np.array([100.0, 110.0, 99.0, 121.0, 121.0])
+        position, traded = fill_arrays([(1, 1, 10.0), (3, -1, 12.0)], 5)
+        np.testing.assert_array_equal(position, [0, 1, 1, 0, 0])
+        metrics = compute_metrics(equity, trade_pnl([(1, 1, 10.0), (3, -1, 12.0)]), position, traded)
+        self.assertAlmostEqual(metrics['exposure'], 40.0)
+        self.assertAlmostEqual(metrics['turnover'], 22.0 / equity.mean())
+        self.assertAlmostEqual(metrics['max_drawdown'], 10.0)
+        self.assertEqual(metrics['max_drawdown_len'], 1)
+        self.assertAlmostEqual(metrics['total_return_pct'], 21.0)
+        self.assertEqual((metrics['trades'], metrics['win_rate'], metrics['profit_factor']), (1, 100.0, np.inf))
+
+        # No closed trades: win rate and profit factor are undefined, not 0% and infinite
+        flat = compute_metrics(equity, trade_pnl([(1, 1, 10.0)]), position, traded)
+        self.assertEqual(flat['trades'], 0)
+        self.assertTrue(np.isnan(flat['win_rate']))
+        self.assertTrue(np.isnan(flat['profit_factor']))
+        batch = compute_metrics(np.stack([equity, equity]), pad_trades([np.array([2.0]), np.array([])]))
+        self.assertEqual((batch['win_rate'][0], batch['profit_factor'][0]), (100.0, np.inf))
+        self.assertTrue(np.isnan(batch['win_rate'][1]))
+        self.assertTrue(np.isnan(batch['profit_factor'][1]))
+
+    def test_sweep_metrics(self):
+        data_df = self.datasets['AAPL']
+        table = sweep(MomentumStrategy, data_df, {'rsi_period': [8, 14]}, processes=1, metrics=True)
+        for row in table.itertuples():
+            expected = vector_metrics(run_vectorized(MomentumStrategy, data_df, rsi_period=row.rsi_period), 252)
+            self.assertEqual(row.trades, expected['trades'])
+        self.assertNotIn('sharpe', sweep(MomentumStrategy, data_df, [{}], processes=1).columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.engine.optimize import Study
+from src.engine.sweep import sweep
+from src.strategies.mean_reversion import MeanReversionStrategy
+from src.strategies.momentum import MomentumStrategy
+from src.utils.data_loader import read_ohlcv_csv
+
+SPACE = {
+    'rsi_period': list(range(4, 22, 2)),
+    'rsi_oversold': [20, 25, 30, 35, 40],
+    'rsi_overbought': [60, 65, 70, 75, 80],
+    'stop_loss': [0.01, 0.02, 0.05],
+    'take_profit': [0.02, 0.05, 0.1],
+}
+
+
+class TestOptimize(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = read_ohlcv_csv('data/crypto/BTC_USD_data.csv')
+        grid = sweep(MomentumStrategy, cls.data, SPACE, processes=1, cash=1000000.0, metrics=True, sort_by='sharpe')
+        cls.grid_best = grid['sharpe'][0]
+        cls.grid_bars = len(grid) * len(cls.data)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_reaches_grid_best_with_fewer_bars(self):
+        study = Study(MomentumStrategy, self.data, SPACE, cash=1000000.0)
+        while study.bar_evaluations < self.grid_bars // 10:
+            best = study.optimize(10)
+            if best is not None and best['value'] >= self.grid_best:
+                break
+        self.assertAlmostEqual(best['value'], self.grid_best)
+        self.assertLess(study.bar_evaluations, self.grid_bars // 10)
+        trials = study.trials_frame()
+        # Most trials stop on a prefix of the history
+        self.assertGreater((trials['state'] == 'pruned').mean(), 0.5)
+        self.assertLess(trials.loc[trials['state'] == 'pruned', 'bars'].max(), 2 * len(self.data))
+
+    def test_resume_from_disk(self):
+        path = os.path.join(self.tmp.name, 'studies', 'momentum.jsonl')
+        straight = Study(MomentumStrategy, self.data, SPACE, cash=1000000.0, seed=3)
+        straight.optimize(40)
+
+        first = Study(MomentumStrategy, self.data, SPACE, path=path, cash=1000000.0, seed=3)
+        first.optimize(25)
+        resumed = Study(MomentumStrategy, self.data, SPACE, path=path, cash=1000000.0, seed=3)
+        self.assertEqual(len(resumed.trials), 25)
+        resumed.optimize(15)
+        pd.testing.assert_frame_equal(resumed.trials_frame(), straight.trials_frame())
+        with open(path) as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 41)
+        self.assertEqual(json.loads(lines[0])['strategy'], 'MomentumStrategy')
+
+        with self.assertRaises(ValueError):
+            Study(MomentumStrategy, self.data, SPACE, path=path, cash=1000000.0, seed=4)
+        # Same settings and number of bars, other prices
+        shifted = self.data.assign(close=self.data['close'] * 1.01)
+        with self.assertRaises(ValueError):
+            Study(MomentumStrategy, shifted, SPACE, path=path, cash=1000000.0, seed=3)
+
+    def test_resume_after_a_partial_write(self):
+        path = os.path.join(self.tmp.name, 'momentum.jsonl')
+        Study(MomentumStrategy, self.data, SPACE, path=path, cash=1000000.0, seed=3).optimize(5)
+        with open(path) as f:
+            lines = f.readlines()
+        # A crash while appending the sixth trial
+        with open(path, 'a') as f:
+            f.write(lines[-1][:len(lines[-1]) // 2])
+
+        with self.assertLogs(level='WARNING'):
+            resumed = Study(MomentumStrategy, self.data, SPACE, path=path, cash=1000000.0, seed=3)
+        self.assertEqual(len(resumed.trials), 5)
+        resumed.optimize(1)
+        with open(path) as f:
+            self.assertEqual([json.loads(line)['number'] for line in f.readlines()[1:]], list(range(6)))
+
+    def test_exhausts_small_space(self):
+        study = Study(MeanReversionStrategy, self.data, {'period': [5, 10, 20, 30]}, startup=2)
+        study.optimize(100)
+        # Every config ends up run on the full history exactly once
+        complete = study.trials_frame().query("state == 'complete'")
+        self.assertEqual(sorted(complete['period']), [5, 10, 20, 30])
+        self.assertEqual(study.optimize(10), study.best)
+
+    def test_drawdown_pruning(self):
+        study = Study(MomentumStrategy, self.data, SPACE, cash=100000.0, max_drawdown=0.0, startup=20)
+        study.optimize(20)
+        trials = study.trials_frame()
+        # Trials starting on the first rung are pruned there as soon as they lose anything
+        self.assertTrue((trials.loc[trials['bars'] == study.rungs[0], 'state'] == 'pruned').all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.utils.score_cache import ScoreCache
+from src.utils.sentiment_scorer import SentimentScorer
+
+
+class TestScoreCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'scores.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_bulk_round_trip_and_counters(self):
+        cache = ScoreCache(self.path)
+        cache.put_many('textblob', '0.18', {'btc up': 0.5, 'btc down': -0.25})
+        cache.put_many('hf', 'abc', {'btc up': {'label': 'POSITIVE', 'score': 0.9}})
+        found = cache.get_many('textblob', '0.18', ['btc up', 'btc down', 'eth flat'])
+        self.assertEqual(found, {'btc up': 0.5, 'btc down': -0.25})
+        self.assertEqual(cache.get_many('hf', 'abc', ['btc up']), {'btc up': {'label': 'POSITIVE', 'score': 0.9}})
+        self.assertEqual(cache.get_many('hf', 'def', ['btc up']), {})  # new model revision
+        self.assertEqual(cache.stats()['hits'], 3)
+        self.assertEqual(cache.stats()['misses'], 2)
+        cache.close()
+
+        reopened = ScoreCache(self.path)
+        self.assertEqual(len(reopened), 3)
+        self.assertEqual(reopened.get_many('textblob', '0.18', ['btc down']), {'btc down': -0.25})
+
+    def test_cached_computes_only_misses(self):
+        cache = ScoreCache(':memory:')
+        computed = []
+
+        def compute(texts):
+            computed.extend(texts)
+            return [len(text) / 10 for text in texts]
+
+        self.assertEqual(cache.cached('len', 1, ['ab', 'abc', 'ab'], compute), [0.2, 0.3, 0.2])
+        self.assertEqual(cache.cached('len', 1, ['abc', 'abcd'], compute), [0.3, 0.4])
+        self.assertEqual(computed, ['ab', 'abc', 'abcd'])
+
+    def test_lru_eviction(self):
+        cache = ScoreCache(':memory:', max_entries=3)
+        cache.put_many('s', 1, {'a': 1.0, 'b': 2.0, 'c': 3.0})
+        time.sleep(0.01)
+        cache.get_many('s', 1, ['a'])  # 'a' is now the most recently used
+        time.sleep(0.01)
+        cache.put_many('s', 1, {'d': 4.0})
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(set(cache.get_many('s', 1, ['a', 'b', 'c', 'd'])), {'a', 'c', 'd'})
+
+    def test_scorer_uses_cache(self):
+        calls = []
+
+        def pipeline(texts, batch_size=None, truncation=False):
+            calls.append(list(texts))
+            return [{'label': 'POSITIVE', 'score': 0.75} for _ in texts]
+
+        cache = ScoreCache(':memory:')
+        scorer = SentimentScorer(device=-1, pipeline_factory=lambda *args: pipeline, cache=lambda: cache)
+        scorer.classify(['one', 'two'])
+        self.assertEqual(scorer.score(['two', 'three']), [0.75, 0.75])
+        self.assertEqual(calls, [['one', 'two'], ['three']])
+
+
+if __name__ == '__main__':
+    unittest.main()
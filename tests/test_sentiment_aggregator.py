@@ -0,0 +1,92 @@
+import asyncio
+import time
+import unittest
+
+from src.utils.sentiment_aggregator import SentimentSource, aggregate_sentiment
+
+
+class RateLimited(Exception):
+    pass
+
+
+def slow(texts, delay):
+    def fetch():
+        time.sleep(delay)
+        return texts
+    return fetch
+
+
+def score(texts):
+    return [1.0 if 'up' in text else -1.0 for text in texts]
+
+
+class TestAggregateSentiment(unittest.TestCase):
+
+    def test_sources_run_concurrently(self):
+        sources = [SentimentSource(f"s{i}", slow([f"up {i}"], 0.2)) for i in range(4)]
+        result = asyncio.run(aggregate_sentiment(sources, score))
+        self.assertLess(result['elapsed'], 0.6)
+        self.assertEqual(result['counts'], {f"s{i}": 1 for i in range(4)})
+        self.assertEqual(result['overall'], 1.0)
+
+    def test_partial_results_on_failure_and_timeout(self):
+        def broken():
+            raise ValueError("bad response")
+
+        sources = [
+            SentimentSource("news", slow(["up", "down", "down"], 0.0)),
+            SentimentSource("broken", broken),
+            SentimentSource("stuck", slow(["up"], 1.0), timeout=0.1),
+        ]
+        result = asyncio.run(aggregate_sentiment(sources, score))
+        self.assertEqual(result['counts'], {'news': 3})
+        self.assertAlmostEqual(result['overall'], -1 / 3)
+        self.assertEqual(result['errors']['stuck'], 'timeout')
+        self.assertIn('bad response', result['errors']['broken'])
+        self.assertLess(result['elapsed'], 0.5)
+
+    def test_rate_limit_backoff_does_not_block_loop(self):
+        attempts = []
+
+        def limited():
+            attempts.append(time.perf_counter())
+            if len(attempts) < 3:
+                raise RateLimited()
+            return ["up"]
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            source = SentimentSource("twitter", limited, retries=3, backoff=0.05, retry_on=(RateLimited,))
+            result = await aggregate_sentiment([source], score)
+            task.cancel()
+            return result, ticks
+
+        result, ticks = asyncio.run(main())
+        self.assertEqual(result['counts'], {'twitter': 1})
+        self.assertEqual(len(attempts), 3)
+        self.assertGreater(ticks, 5)
+
+    def test_non_retryable_error_is_not_retried(self):
+        attempts = []
+
+        def broken():
+            attempts.append(1)
+            raise ValueError()
+
+        source = SentimentSource("x", broken, retries=3, backoff=0.01, retry_on=(RateLimited,))
+        result = asyncio.run(aggregate_sentiment([source], score))
+        self.assertEqual(len(attempts), 1)
+        self.assertEqual(result['overall'], 0)
+        self.assertIn('x', result['errors'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from src.utils.sentiment_scorer import SentimentScorer, signed_score
+
+
+class FakePipeline:
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None, truncation=False):
+        self.calls.append((list(texts), batch_size))
+        return [{'label': 'POSITIVE' if 'up' in text else 'NEGATIVE', 'score': 0.5 + len(text) / 100} for text in texts]
+
+
+class TestSentimentScorer(unittest.TestCase):
+
+    def setUp(self):
+        self.loads = []
+        self.fake = FakePipeline()
+
+        def factory(model, revision, device):
+            self.loads.append(device)
+            return self.fake
+
+        self.scorer = SentimentScorer(device=-1, batch_size=4, pipeline_factory=factory)
+
+    def test_model_loads_lazily_once(self):
+        self.assertEqual(self.loads, [])
+        self.scorer.classify(['btc up'])
+        self.scorer.classify(['btc down'])
+        self.assertEqual(self.loads, [-1])
+
+    def test_batches_keep_input_order(self):
+        texts = ['a much longer headline that goes up', 'down', 'up', 'sideways and down']
+        results = self.scorer.classify(texts)
+        self.assertEqual(len(self.fake.calls), 1)
+        self.assertEqual(self.fake.calls[0][1], 4)
+        self.assertEqual(self.fake.calls[0][0], sorted(texts, key=len))
+        self.assertEqual([r['label'] for r in results], ['POSITIVE', 'NEGATIVE', 'POSITIVE', 'NEGATIVE'])
+        self.assertAlmostEqual(self.scorer.score(texts)[1], -0.54)
+
+    def test_empty_batch_does_not_load(self):
+        self.assertEqual(self.scorer.classify([]), [])
+        self.assertEqual(self.loads, [])
+
+    def test_signed_score(self):
+        self.assertEqual(signed_score({'label': 'NEGATIVE', 'score': 0.9}), -0.9)
+        self.assertEqual(signed_score({'label': 'NEUTRAL', 'score': 0.9}), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import pandas as pd
+
+from src.data_ingestion.stocks_alpaca import backfill_stock_data, date_chunks
+from src.utils.data_loader import read_ohlcv_csv
+
+
+class FakeBars:
+
+    def __init__(self, df):
+        self.df = df
+
+
+class FakeREST:
+    """Answers get_bars from a generated business-day calendar."""
+
+    def __init__(self, fail_first=0, fail_after=None):
+        self.fail_first = fail_first
+        self.fail_after = fail_after
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_bars(self, symbol, timeframe, start=None, end=None, adjustment='raw'):
+        with self.lock:
+            self.calls.append((symbol, start))
+            calls = len(self.calls)
+        if calls <= self.fail_first:
+            raise ConnectionError("transient")
+        if self.fail_after is not None and calls > self.fail_after:
+            raise RuntimeError("crash")
+        index = pd.date_range(start, end, freq='B', tz='UTC', inclusive='left') + pd.Timedelta(hours=5)
+        index = index[index < pd.Timestamp(end)]
+        close = [100.0 + i.dayofyear for i in index]
+        return FakeBars(pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close,
+                                      'volume': 1000, 'trade_count': 10, 'vwap': close},
+                                     index=pd.DatetimeIndex(index, name='timestamp')))
+
+
+class TestStockBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_date_chunks(self):
+        chunks = date_chunks('2022-01-01', '2022-12-31', 90)
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(chunks[0][0], pd.Timestamp('2022-01-01', tz='UTC'))
+        self.assertEqual(chunks[-1][1], pd.Timestamp('2023-01-01', tz='UTC'))
+
+    def test_parallel_backfill_with_retries(self):
+        api = FakeREST(fail_first=3)
+        results = backfill_stock_data(['AAPL', 'MSFT', 'SPY'], '2022-01-01', '2022-12-31', chunk_days=30,
+                                      max_workers=3, api=api, data_dir=self.data_dir, backoff=0)
+        self.assertEqual(set(results.values()), {260})
+        data = read_ohlcv_csv(f'{self.data_dir}/MSFT_data.csv')
+        self.assertEqual(len(data), 260)
+        self.assertTrue(data.index.is_unique)
+
+    def test_resume_after_crash(self):
+        crashing = FakeREST(fail_after=4)
+        first = backfill_stock_data(['AAPL'], '2022-01-01', '2022-12-31', chunk_days=30, max_workers=1,
+                                    api=crashing, data_dir=self.data_dir, retries=0)
+        self.assertIsInstance(first['AAPL'], RuntimeError)
+
+        api = FakeREST()
+        second = backfill_stock_data(['AAPL'], '2022-01-01', '2022-12-31', chunk_days=30, max_workers=1,
+                                     api=api, data_dir=self.data_dir)
+        self.assertEqual(api.calls[0][1], pd.Timestamp('2022-05-01', tz='UTC').isoformat())
+        data = read_ohlcv_csv(f'{self.data_dir}/AAPL_data.csv')
+        self.assertEqual(len(data), 260)
+        self.assertTrue(data.index.is_unique)
+        self.assertEqual(second['AAPL'], 260 - len(data.loc[:'2022-04-30']))
+
+    def test_appends_to_existing_layout(self):
+        shutil.copy('data/stocks/AAPL_data.csv', f'{self.data_dir}/AAPL_data.csv')
+        backfill_stock_data(['AAPL'], '2022-12-01', '2023-01-31', chunk_days=30, max_workers=1,
+                            api=FakeREST(), data_dir=self.data_dir)
+        data = read_ohlcv_csv(f'{self.data_dir}/AAPL_data.csv')
+        self.assertTrue(data.index.is_unique)
+        self.assertEqual(str(data.index[-1].date()), '2023-01-31')
+        self.assertEqual(data.loc['2022-01-03', 'close'].iloc[0], 182.01)
+
+    def test_backfills_earlier_range_after_later_one(self):
+        later = backfill_stock_data(['AAPL'], '2022-01-01', '2022-12-31', chunk_days=30, max_workers=1,
+                                    api=FakeREST(), data_dir=self.data_dir)
+        api = FakeREST()
+        earlier = backfill_stock_data(['AAPL'], '2021-01-01', '2021-12-31', chunk_days=30, max_workers=1,
+                                      api=api, data_dir=self.data_dir)
+        self.assertEqual((later['AAPL'], earlier['AAPL']), (260, 261))
+        data = read_ohlcv_csv(f'{self.data_dir}/AAPL_data.csv')
+        self.assertEqual(len(data), 521)
+        self.assertTrue(data.index.is_unique and data.index.is_monotonic_increasing)
+        self.assertEqual(str(data.index[0].date()), '2021-01-01')
+
+        # Both ranges are checkpointed: rerunning either fetches nothing
+        api = FakeREST()
+        again = backfill_stock_data(['AAPL'], '2021-01-01', '2022-12-31', chunk_days=30, max_workers=1,
+                                    api=api, data_dir=self.data_dir)
+        self.assertEqual((again['AAPL'], api.calls), (0, []))
+
+    def test_timeframes_use_separate_files(self):
+        from alpaca_trade_api.rest import TimeFrame
+        daily = backfill_stock_data(['AAPL'], '2022-01-01', '2022-03-31', chunk_days=30, max_workers=1,
+                                    api=FakeREST(), data_dir=self.data_dir)
+        # The daily checkpoint does not cover the hourly file, so every chunk is fetched again
+        hourly = backfill_stock_data(['AAPL'], '2022-01-01', '2022-03-31', chunk_days=30, max_workers=1,
+                                     api=FakeREST(), data_dir=self.data_dir, timeframe=TimeFrame.Hour)
+        self.assertEqual(hourly['AAPL'], daily['AAPL'])
+        self.assertTrue(os.path.exists(f'{self.data_dir}/AAPL_1Hour_data.csv'))
+        self.assertEqual(len(read_ohlcv_csv(f'{self.data_dir}/AAPL_data.csv')), daily['AAPL'])
+
+
+if __name__ == '__main__':
+    unittest.main()
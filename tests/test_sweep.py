@@ -0,0 +1,44 @@
+import unittest
+
+from src.engine.sweep import SharedOHLCV, param_grid, sweep
+from src.engine.vectorized import run_vectorized
+from src.strategies.momentum import MomentumStrategy
+from src.utils.data_loader import read_ohlcv_csv
+
+
+class TestSweep(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = read_ohlcv_csv('data/stocks/AAPL_data.csv')
+        cls.grid = {'rsi_period': [6, 8, 14], 'stop_loss': [0.01, 0.02]}
+
+    def test_param_grid(self):
+        combos = param_grid(self.grid)
+        self.assertEqual(len(combos), 6)
+        self.assertEqual(combos[0], {'rsi_period': 6, 'stop_loss': 0.01})
+
+    def test_shared_block_round_trip(self):
+        with SharedOHLCV(self.data) as shared:
+            arrays = shared.arrays()
+            self.assertTrue((arrays['index'] == self.data.index).all())
+            self.assertEqual(arrays['close'].tolist(), self.data['close'].tolist())
+
+    def test_parallel_matches_serial(self):
+        table = sweep(MomentumStrategy, self.data, self.grid, processes=2)
+        self.assertEqual(len(table), 6)
+        self.assertTrue(table['final_value'].is_monotonic_decreasing)
+        for row in table.itertuples():
+            expected = run_vectorized(MomentumStrategy, self.data, rsi_period=row.rsi_period, stop_loss=row.stop_loss)
+            self.assertAlmostEqual(row.final_value, expected.final_value)
+            self.assertEqual(row.fills, len(expected.fills))
+
+    def test_backtrader_engine(self):
+        grid = [{'rsi_period': 14}]
+        fast = sweep(MomentumStrategy, self.data, grid, processes=1)
+        slow = sweep(MomentumStrategy, self.data, grid, processes=1, engine='backtrader')
+        self.assertAlmostEqual(fast['final_value'][0], slow['final_value'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import time
+import unittest
+
+from src.utils.tx_indexer import (RateLimited, TransactionStore, index_addresses, sync_transactions,
+                                  sync_transactions_async)
+
+
+def tx(address, block, index):
+    return {'hash': f"0x{address[-4:]}{block:08x}{index:04x}", 'blockNumber': str(block), 'timeStamp': str(1_600_000_000 + block),
+            'transactionIndex': str(index), 'from': address, 'to': '0xdead', 'value': str(10 ** 20 + block),
+            'gas': '21000', 'gasPrice': '1000000000', 'gasUsed': '21000', 'isError': '0',
+            'contractAddress': '', 'functionName': ''}
+
+
+class FakeEtherscan:
+    """Pages an in-memory chain the way txlist does with sort=asc."""
+
+    def __init__(self, chain, rate_limit_every=0):
+        self.chain = chain
+        self.rate_limit_every = rate_limit_every
+        self.calls = []
+
+    async def txlist(self, address, start_block, end_block=99999999, page=1, offset=1000):
+        self.calls.append((address, start_block, time.monotonic()))
+        limited = self.rate_limit_every and len(self.calls) % self.rate_limit_every == 0
+        await asyncio.sleep(0.001)
+        if limited:
+            raise RateLimited("Max rate limit reached")
+        # Etherscan matches addresses case-insensitively
+        rows = [t for t in self.chain.get(address.lower(), []) if start_block <= int(t['blockNumber']) <= end_block]
+        return rows[(page - 1) * offset:page * offset]
+
+
+def history(address, blocks, per_block=1):
+    return [tx(address, block, i) for block in blocks for i in range(per_block)]
+
+
+class TestTransactionIndexer(unittest.TestCase):
+
+    def setUp(self):
+        self.store = TransactionStore(':memory:')
+
+    def tearDown(self):
+        self.store.close()
+
+    def index(self, fetcher, addresses, **kwargs):
+        kwargs.setdefault('rate', 1000)
+        return asyncio.run(index_addresses(addresses, fetcher, self.store, **kwargs))
+
+    def test_second_sync_only_fetches_new_blocks(self):
+        chain = {'0xaaaa': history('0xaaaa', range(100, 130))}
+        fetcher = FakeEtherscan(chain)
+        self.assertEqual(self.index(fetcher, ['0xAAAA'], page_size=10), {'0xAAAA': 30})
+        self.assertEqual(self.store.last_block('0xaaaa'), 129)
+
+        chain['0xaaaa'] += history('0xaaaa', range(200, 203))
+        fetcher.calls.clear()
+        self.assertEqual(self.index(fetcher, ['0xaaaa'], page_size=10), {'0xaaaa': 3})
+        self.assertEqual([start for _, start, _ in fetcher.calls], [130])
+        self.assertEqual(self.store.count('0xaaaa'), 33)
+
+        stored = self.store.transactions('0xaaaa')
+        self.assertEqual([t['blockNumber'] for t in stored[:3]], [202, 201, 200])
+        self.assertEqual(stored[0]['value'], str(10 ** 20 + 202))
+
+    def test_pages_split_inside_a_block(self):
+        # 4 transactions per block, 10 per page: pages end mid-block
+        chain = {'0xbbbb': history('0xbbbb', range(1, 11), per_block=4)}
+        self.assertEqual(self.index(FakeEtherscan(chain), ['0xbbbb'], page_size=10), {'0xbbbb': 40})
+        self.assertEqual(self.store.last_block('0xbbbb'), 10)
+
+    def test_many_addresses_share_the_rate_limit(self):
+        addresses = [f"0x{i:04x}" for i in range(10)]
+        fetcher = FakeEtherscan({address: history(address, range(1, 6)) for address in addresses})
+        start = time.monotonic()
+        results = self.index(fetcher, addresses, rate=50, burst=1, concurrency=10)
+        elapsed = time.monotonic() - start
+        self.assertEqual(results, {address: 5 for address in addresses})
+        # 10 requests at 50/s with no burst take at least 9 intervals
+        self.assertGreaterEqual(elapsed, 9 / 50 * 0.9)
+        self.assertEqual(self.store.count(), 50)
+
+    def test_rate_limited_requests_are_retried(self):
+        fetcher = FakeEtherscan({'0xcccc': history('0xcccc', range(1, 4))}, rate_limit_every=2)
+        results = self.index(fetcher, ['0xcccc', '0xdddd'], backoff=0.001)
+        self.assertEqual(results, {'0xcccc': 3, '0xdddd': 0})
+
+    def test_sync_inside_an_event_loop(self):
+        fetcher = FakeEtherscan({'0xeeee': history('0xeeee', range(1, 4))})
+
+        async def caller():
+            with self.assertRaisesRegex(RuntimeError, 'sync_transactions_async'):
+                sync_transactions(['0xeeee'], fetcher, self.store, rate=1000)
+            return await sync_transactions_async(['0xeeee'], fetcher, self.store, rate=1000)
+
+        self.assertEqual(asyncio.run(caller()), {'0xeeee': 3})
+        self.assertEqual(sync_transactions(['0xeeee'], fetcher, self.store, rate=1000), {'0xeeee': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+import backtrader as bt
+import numpy as np
+
+from src.engine.cerebro import run_cerebro, transactions
+from src.engine.vectorized import run_vectorized
+from src.strategies.mean_reversion import MeanReversionStrategy
+from src.strategies.momentum import MomentumStrategy
+from src.tests.backtesting import EnhancedStrategy
+from src.utils.data_loader import read_ohlcv_csv
+
+
+def run_backtrader(strategy, data_df, cash=10000.0, **params):
+    result, final_value = run_cerebro(strategy, data_df, cash, analyzers={'transactions': bt.analyzers.Transactions}, **params)
+    return [(size, price) for _, size, price in transactions(result)], final_value
+
+
+def bearish_first_half(bars):
+    return np.where(np.arange(bars) < bars // 2, -0.5, 0.5)
+
+
+class TestVectorizedParity(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.datasets = {
+            'BTC/USD': read_ohlcv_csv('data/crypto/BTC_USD_data.csv'),
+            'AAPL': read_ohlcv_csv('data/stocks/AAPL_data.csv'),
+        }
+
+    def assert_parity(self, strategy, cash=10000.0, sentiment=None, trades=None, **params):
+        """
+        :param sentiment: Constant score passed to run_vectorized, or a function of the number of bars
+                          returning a per-bar 'sentiment' column; backtrader always reads the column
+        :param trades: If set, whether every dataset must have fills
+        """
+        for name, data_df in self.datasets.items():
+            with self.subTest(dataset=name, strategy=strategy.__name__, cash=cash, sentiment=sentiment, params=params):
+                kwargs = {}
+                if callable(sentiment):
+                    data_df = data_df.assign(sentiment=sentiment(len(data_df)))
+                elif sentiment is not None:
+                    kwargs['sentiment'] = sentiment
+                bt_df = data_df if sentiment is None or callable(sentiment) else data_df.assign(sentiment=sentiment)
+                bt_fills, bt_value = run_backtrader(strategy, bt_df, cash, **params)
+                result = run_vectorized(strategy, data_df, cash, **kwargs, **params)
+                if trades is not None:
+                    self.assertEqual(bool(bt_fills), trades)
+                self.assertEqual([(size, price) for _, size, price in result.fills], bt_fills)
+                self.assertAlmostEqual(result.final_value, bt_value, places=6)
+                self.assertAlmostEqual(result.value[-1], bt_value, places=6)
+
+    def test_mean_reversion(self):
+        self.assert_parity(MeanReversionStrategy)
+        self.assert_parity(MeanReversionStrategy, period=20)
+        self.assert_parity(MeanReversionStrategy, cash=1000000.0)
+
+    def test_momentum(self):
+        self.assert_parity(MomentumStrategy)
+        self.assert_parity(MomentumStrategy, rsi_period=14, rsi_oversold=30, rsi_overbought=70)
+        self.assert_parity(MomentumStrategy, stop_loss=0.05, take_profit=0.1)
+        self.assert_parity(MomentumStrategy, cash=1000000.0)
+
+    def test_enhanced(self):
+        self.assert_parity(EnhancedStrategy, cash=1000000.0, sentiment=0.5, trades=True, rsi_lower=45)
+        # Below sentiment_threshold: never enters
+        self.assert_parity(EnhancedStrategy, cash=1000000.0, sentiment=-0.5, trades=False, rsi_lower=45)
+        # Per-bar column, bearish for the first half of the history: enters later than on constant sentiment
+        self.assert_parity(EnhancedStrategy, cash=1000000.0, sentiment=bearish_first_half, trades=True, rsi_lower=45)
+        self.assert_parity(EnhancedStrategy, cash=1000000.0, sentiment=bearish_first_half, trades=True,
+                           rsi_period=8, rsi_lower=30)
+
+    def test_unknown_param(self):
+        with self.assertRaises(TypeError):
+            run_vectorized(MomentumStrategy, self.datasets['AAPL'], period=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from src.engine.metrics import bars_per_year, vector_metrics
+from src.engine.sweep import param_grid
+from src.engine.vectorized import Indicators, run_vectorized
+from src.engine.walkforward import walk_forward, walk_forward_windows
+from src.indicators.batch import rsi
+from src.strategies.momentum import MomentumStrategy
+from src.utils.data_loader import read_ohlcv_csv
+
+
+class TestWalkForward(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = read_ohlcv_csv('data/bull_market.csv')
+        cls.grid = {'rsi_period': [4, 8], 'rsi_oversold': [30, 40], 'rsi_overbought': [60, 70]}
+
+    def test_windows(self):
+        self.assertEqual(walk_forward_windows(10, 4, 3), [(0, 4, 4, 7), (3, 7, 7, 10)])
+        self.assertEqual(walk_forward_windows(11, 4, 3, anchored=True), [(0, 4, 4, 7), (0, 7, 7, 10), (0, 10, 10, 11)])
+        self.assertEqual(walk_forward_windows(4, 4, 3), [])
+
+    def test_indicator_views(self):
+        close = self.data['close'].to_numpy()
+        indicators = Indicators(close)
+        view = indicators.view(20, 40).view(5, 10)
+        np.testing.assert_array_equal(view.rsi(8), rsi(close, 8)[25:30])
+        self.assertEqual((len(view), view.first(8), indicators.first(8)), (5, 0, 8))
+        # A full-history Indicators reproduces a plain run
+        plain = run_vectorized(MomentumStrategy, self.data, 1.0)
+        shared = run_vectorized(MomentumStrategy, self.data, 1.0, indicators=indicators)
+        self.assertEqual(plain.fills, shared.fills)
+        with self.assertRaises(ValueError):
+            run_vectorized(MomentumStrategy, self.data, indicators=view)
+
+    def test_folds_pick_the_best_train_params(self):
+        result = walk_forward(MomentumStrategy, self.data, self.grid, 20, 8, processes=1, cash=1.0)
+        windows = walk_forward_windows(len(self.data), 20, 8)
+        self.assertEqual(len(result.folds), len(windows))
+        indicators = Indicators(self.data['close'])
+        periods = bars_per_year(self.data.index)
+        for row, (train_start, train_end, test_start, test_end) in zip(result.folds.itertuples(), windows):
+            train = self.data.iloc[train_start:train_end]
+            scores = [vector_metrics(run_vectorized(MomentumStrategy, train, 1.0,
+                                                    indicators=indicators.view(train_start, train_end), **params),
+                                     periods)['sharpe']
+                      for params in param_grid(self.grid)]
+            self.assertEqual(row.train_score, np.nanmax(scores))
+            self.assertEqual(row.test_start, self.data.index[test_start])
+
+    def test_lower_is_better_objectives(self):
+        combos = param_grid(self.grid)
+        train = self.data.iloc[:20]
+        drawdowns = [vector_metrics(run_vectorized(MomentumStrategy, train, 1.0, **params))['max_drawdown']
+                     for params in combos]
+        result = walk_forward(MomentumStrategy, self.data, self.grid, 20, 8, objective='max_drawdown', processes=1,
+                              cash=1.0)
+        self.assertEqual(result.folds['train_score'][0], min(drawdowns))
+        result = walk_forward(MomentumStrategy, self.data, self.grid, 20, 8, objective='max_drawdown', maximize=True,
+                              processes=1, cash=1.0)
+        self.assertEqual(result.folds['train_score'][0], max(drawdowns))
+        with self.assertRaises(ValueError):
+            walk_forward(MomentumStrategy, self.data, self.grid, 20, 8, objective='drawdown', processes=1)
+
+    def test_stitched_equity(self):
+        serial = walk_forward(MomentumStrategy, self.data, self.grid, 20, 8, processes=1, cash=1.0)
+        parallel = walk_forward(MomentumStrategy, self.data, self.grid, 20, 8, processes=2, cash=1.0)
+        self.assertTrue(serial.equity.equals(parallel.equity))
+        self.assertEqual(serial.folds['params'].tolist(), parallel.folds['params'].tolist())
+        self.assertEqual(len(serial.equity), len(self.data) - 20)
+        self.assertTrue((serial.equity.index == self.data.index[20:]).all())
+        # Each fold's returns are chained onto the previous fold's final value
+        growth = np.prod(1 + serial.folds['total_return_pct'].to_numpy() / 100)
+        self.assertAlmostEqual(serial.equity.iloc[-1], growth)
+        self.assertAlmostEqual(serial.metrics['total_return_pct'], (growth - 1) * 100)
+
+    def test_indicators_computed_once(self):
+        with mock.patch('src.engine.vectorized.rsi', wraps=rsi) as spy:
+            walk_forward(MomentumStrategy, self.data, self.grid, 20, 8, anchored=True, processes=1)
+        self.assertEqual(sorted(call.args[1] for call in spy.call_args_list), [4, 8])
+
+
+if __name__ == '__main__':
+    unittest.main()
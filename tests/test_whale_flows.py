@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.utils.tx_indexer import TransactionStore
+from src.utils.whale_flows import WhaleFlows
+
+EXCHANGE = '0x' + 'aa' * 20
+FUND = '0x' + 'bb' * 20
+OTHER = '0x' + '11' * 20
+ETH = 10 ** 18
+T0 = 1_700_000_000 - 1_700_000_000 % 3600
+
+
+def tx(block, index, sender, recipient, eth, offset, error=0):
+    return {'hash': f"0x{block:08x}{index:04x}", 'blockNumber': block, 'timeStamp': T0 + offset,
+            'transactionIndex': index, 'from': sender, 'to': recipient, 'value': str(eth * ETH), 'isError': error}
+
+
+class TestWhaleFlows(unittest.TestCase):
+
+    def setUp(self):
+        self.store = TransactionStore(':memory:')
+        self.tracked = {'exchanges': [EXCHANGE.upper().replace('0X', '0x')], 'funds': [FUND]}
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_interval_totals_per_category(self):
+        self.store.add(EXCHANGE, [
+            tx(1, 0, OTHER, EXCHANGE, 500, 10),
+            tx(1, 1, EXCHANGE, OTHER, 2000, 20),
+            tx(2, 0, OTHER, EXCHANGE, 7, 3600 * 2 + 5),
+            tx(2, 1, OTHER, EXCHANGE, 10 ** 6, 3600 * 2 + 6, error=1),
+        ], last_block=2)
+        self.store.add(FUND, [tx(1, 2, FUND, EXCHANGE, 1, 30)], last_block=1)
+
+        flows = WhaleFlows(self.tracked, interval='1h', large_value=1000)
+        self.assertEqual(flows.update(self.store), 4)
+        frame = flows.frame()
+
+        self.assertEqual(list(frame.index), list(pd.to_datetime([T0 + 3600, T0 + 7200, T0 + 10800], unit='s')))
+        self.assertEqual(frame['exchanges_inflow'].tolist(), [500.0, 0.0, 7.0])
+        self.assertEqual(frame['exchanges_outflow'].tolist(), [2000.0, 0.0, 0.0])
+        self.assertEqual(frame['exchanges_netflow'].tolist(), [-1500.0, 0.0, 7.0])
+        self.assertEqual(frame['exchanges_count'].tolist(), [2.0, 0.0, 1.0])
+        self.assertEqual(frame['exchanges_large'].tolist(), [1.0, 0.0, 0.0])
+        self.assertEqual(frame['funds_outflow'].tolist(), [1.0, 0.0, 0.0])
+
+    def test_incremental_update_matches_full_rebuild(self):
+        rng = np.random.default_rng(0)
+        batches = []
+        for b in range(5):
+            batch = [tx(b * 100 + i // 3, i, *(rng.permutation([EXCHANGE, OTHER])), int(rng.integers(1, 3000)),
+                        int(b * 20_000 + i * 37)) for i in range(300)]
+            batches.append(batch)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'flows.json')
+            for b, batch in enumerate(batches):
+                self.store.add(EXCHANGE, batch, last_block=b * 100 + 99)
+                flows = WhaleFlows.load(path, self.tracked)
+                self.assertEqual(flows.update(self.store, chunk_size=64), len(batch))
+                flows.save(path)
+            incremental = WhaleFlows.load(path, self.tracked).frame()
+
+        full = WhaleFlows(self.tracked)
+        full.update(self.store, chunk_size=1000)
+        pd.testing.assert_frame_equal(incremental, full.frame())
+        self.assertEqual(incremental['exchanges_count'].sum(), 1500)
+
+    def test_blocks_past_the_indexer_cursor_wait(self):
+        self.store.add(EXCHANGE, [tx(1, 0, OTHER, EXCHANGE, 1, 0), tx(2, 0, OTHER, EXCHANGE, 2, 1)], last_block=1)
+        flows = WhaleFlows(self.tracked)
+        self.assertEqual(flows.update(self.store), 1)
+        self.store.add(EXCHANGE, [], last_block=2)
+        self.assertEqual(flows.update(self.store), 1)
+        self.assertEqual(flows.frame()['exchanges_inflow'].sum(), 3.0)
+
+    def test_changed_wallets_start_over(self):
+        self.store.add(EXCHANGE, [tx(1, 0, OTHER, EXCHANGE, 1, 0)], last_block=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'flows.json')
+            flows = WhaleFlows(self.tracked)
+            flows.update(self.store)
+            flows.save(path)
+            moved = WhaleFlows.load(path, {'funds': [EXCHANGE, FUND]})
+        self.assertEqual(moved.watermarks, {})
+        self.assertEqual(moved.update(self.store), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import threading
+import time
+import unittest
+
+import requests
+
+from src.tests.eth_stub import EthStub, SimulatedChain
+from src.utils.eth_rpc import EthRPC
+from src.utils.whale_stream import WhaleDetector, WhaleStream
+
+WHALE = '0x' + 'aa' * 20
+FUND = '0x' + 'bb' * 20
+OTHER = '0x' + '11' * 20
+USDT = '0x' + 'dd' * 20
+TRACKED = {'exchanges': [WHALE.upper().replace('0X', '0x')], 'funds': [FUND]}
+
+
+class TestWhaleStream(unittest.TestCase):
+
+    def setUp(self):
+        self.chain = SimulatedChain(start=100)
+        self.stub = EthStub(chain=self.chain).__enter__()
+        self.stream = WhaleStream(EthRPC(self.stub.url), WhaleDetector(TRACKED, min_token_amount={USDT: 1000}),
+                                  start_block=101)
+
+    def tearDown(self):
+        self.stub.__exit__(None, None, None)
+
+    def test_detects_transfers_and_token_logs(self):
+        self.chain.mine([(OTHER, OTHER, 5), (WHALE, OTHER, 10 ** 21)])
+        self.chain.mine([(OTHER, FUND, 5000, USDT), (OTHER, FUND, 10, USDT), (WHALE, FUND, 7)])
+        events = self.stream.poll()
+        self.assertEqual([(e['kind'], e['block'], e['value'], e['categories'], e['direction']) for e in events], [
+            ('transfer', 101, 10 ** 21, ['exchanges'], 'out'),
+            ('transfer', 102, 7, ['exchanges', 'funds'], 'both'),
+            ('erc20', 102, 5000, ['funds'], 'in'),
+        ])
+        self.assertEqual(events[2]['token'], USDT)
+        self.assertEqual(self.stream.poll(), [])
+
+    def test_reorg_retracts_orphaned_events(self):
+        self.chain.mine([(WHALE, OTHER, 1)])
+        self.chain.mine([(OTHER, FUND, 2)])
+        first = self.stream.poll()
+        self.assertEqual([e['value'] for e in first], [1, 2])
+
+        # Block 102 is replaced and a new block 103 arrives on the new branch
+        self.chain.reorg(1, [[(OTHER, WHALE, 3)], [(FUND, OTHER, 4)]])
+        events = self.stream.poll()
+        self.assertEqual([(e['value'], e['removed']) for e in events], [(2, True), (3, False), (4, False)])
+        self.assertEqual(self.stream.reorgs, 1)
+        self.assertEqual(self.stream.hashes[103], self.chain.blocks[103]['hash'])
+
+    def test_failed_request_keeps_scanned_events(self):
+        stream = WhaleStream(self.stream.rpc, self.stream.detector, start_block=101, batch_blocks=2)
+        for value in range(4):
+            self.chain.mine([(WHALE, OTHER, value)])
+        batch, calls = stream.rpc.batch, []
+
+        def flaky_batch(requests_):
+            calls.append(requests_)
+            if len(calls) == 3:
+                raise requests.ConnectionError('connection reset')
+            return batch(requests_)
+
+        stream.rpc.batch = flaky_batch
+        with self.assertRaises(requests.ConnectionError):
+            stream.poll()
+        self.assertEqual(stream.next_block, 103)
+        self.assertEqual([e['value'] for e in stream.poll()], [0, 1, 2, 3])
+        self.assertEqual(stream.poll(), [])
+
+    def test_run_survives_a_failed_request(self):
+        self.chain.mine([(WHALE, OTHER, 0)])
+        events = []
+
+        def on_event(event):
+            events.append(event)
+            if len(events) == 1:
+                self.stub.fail_requests = 1
+                self.chain.mine([(WHALE, OTHER, 1)])
+
+        with self.assertLogs(level='WARNING') as logs:
+            self.stream.run(on_event, poll_interval=0.001, stop=lambda: len(events) == 2)
+        self.assertEqual([e['value'] for e in events], [0, 1])
+        self.assertIn('503', logs.output[0])
+
+    def test_keeps_up_with_a_fast_chain(self):
+        stop = threading.Event()
+
+        def produce():
+            for i in range(300):
+                self.chain.mine([(OTHER, OTHER, 1)] * 50 + [(WHALE, OTHER, i)])
+                time.sleep(0.001)
+            stop.set()
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        events = []
+        self.stream.run(events.append, poll_interval=0.001, stop=lambda: stop.is_set() and self.stream.next_block > self.chain.head)
+        producer.join()
+        self.assertEqual([e['value'] for e in events], list(range(300)))
+
+
+if __name__ == '__main__':
+    unittest.main()
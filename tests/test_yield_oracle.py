@@ -0,0 +1,145 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src.defi.yield_oracle import ReplayYieldOracle, YieldOracle, make_snapshot
+from src.defi.yield_scheduler import LendingMarkets
+from src.tests.eth_stub import EthStub, MockAavePool, MockComptroller, MockCToken
+from src.utils import defi_integration
+from src.utils.defi_integration import LIVE_ORACLE, check_yield_and_reinvest
+from src.utils.eth_rpc import EthRPC
+
+POOL = '0x' + 'aa' * 20
+COMPTROLLER = '0x' + 'cc' * 20
+RESERVES = [f"0x{i:040x}" for i in range(1, 6)]
+
+
+def ray(percent):
+    return int(percent * 10 ** 27 // 100)
+
+
+class FakeClock:
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestYieldOracle(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = EthStub(block=500).__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.__exit__(None, None, None)
+
+    def setUp(self):
+        self.pool = MockAavePool(POOL, RESERVES)
+        for i, reserve in enumerate(RESERVES):
+            self.pool.set_rates(reserve, ray(2 + i), ray(5 + i))
+        self.ctoken = MockCToken('0x' + 'c1' * 20, supply_rate=10 ** 9, borrow_rate=2 * 10 ** 9)
+        contracts = [self.pool, MockComptroller(COMPTROLLER, [self.ctoken]), self.ctoken]
+        self.stub.contracts = {contract.address: contract for contract in contracts}
+        self.rpc = EthRPC(self.stub.url)
+        self.markets = LendingMarkets(self.rpc, aave_pool=POOL, comptroller=COMPTROLLER)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_reads_come_from_memory_and_expire(self):
+        clock = FakeClock()
+        oracle = YieldOracle(self.markets, ttl=60, clock=clock)
+        self.assertIsNone(oracle.supply_apy('aave'))
+        oracle.refresh()
+
+        requests = self.rpc.requests_sent
+        for _ in range(1000):
+            best = oracle.supply_apy('aave')
+        self.assertEqual(self.rpc.requests_sent, requests)
+        self.assertAlmostEqual(best, 6.0)
+        self.assertAlmostEqual(oracle.supply_apy('aave', RESERVES[1]), 3.0)
+        self.assertEqual(oracle.snapshot()['block'], 500)
+
+        clock.now += 61
+        self.assertIsNone(oracle.supply_apy('aave'))
+
+    def test_background_worker_refreshes_and_survives_errors(self):
+        oracle = YieldOracle(self.markets, ttl=5, refresh_interval=0.01)
+        with oracle:
+            deadline = time.monotonic() + 5
+            while oracle.snapshot() is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertAlmostEqual(oracle.supply_apy('aave'), 6.0)
+
+            self.pool.set_rates(RESERVES[0], ray(9), ray(10))
+            while oracle.supply_apy('aave') != 9.0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertAlmostEqual(oracle.supply_apy('aave'), 9.0)
+
+            # A failing read keeps the last good snapshot
+            with mock.patch.object(self.markets, 'read', side_effect=RuntimeError('node down')):
+                errors = oracle.errors
+                while oracle.errors == errors and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                self.assertAlmostEqual(oracle.supply_apy('aave'), 9.0)
+        self.assertFalse(oracle._thread.is_alive())
+
+    def test_recorded_history_replays_without_lookahead(self):
+        path = os.path.join(self.tmp.name, 'rates.csv')
+        clock = FakeClock(1_700_000_000.0)
+        oracle = YieldOracle(self.markets, history_path=path, clock=clock)
+        for hour, percent in enumerate((2, 4, 3)):
+            self.pool.set_rates(RESERVES[0], ray(10 + percent), ray(20))
+            self.stub.block = 500 + hour
+            clock.now = 1_700_000_000.0 + 3600 * hour
+            oracle.refresh()
+        self.stub.block = 500
+
+        replay = ReplayYieldOracle.from_csv(path)
+        self.assertEqual(len(replay.snapshots), 3)
+        start = pd.Timestamp(1_700_000_000, unit='s')
+        self.assertIsNone(replay.supply_apy('aave', now=start - pd.Timedelta('1s')))
+        self.assertAlmostEqual(replay.supply_apy('aave', now=start), 12.0)
+        self.assertAlmostEqual(replay.supply_apy('aave', now=start + pd.Timedelta('59min')), 12.0)
+        self.assertAlmostEqual(replay.supply_apy('aave', now=start + pd.Timedelta('1h')), 14.0)
+        self.assertAlmostEqual(replay.supply_apy('aave', now=start + pd.Timedelta('5h')), 13.0)
+        self.assertEqual(replay.snapshot(start + pd.Timedelta('1h'))['block'], 501)
+
+    def test_replay_cursor_matches_a_full_search(self):
+        times = np.sort(np.random.default_rng(0).uniform(0, 10_000, 200))
+        replay = ReplayYieldOracle([make_snapshot({('aave', 'x'): {'supply_apy': t, 'borrow_apy': 0}}, t)
+                                    for t in times], ttl=500)
+        queries = np.concatenate([np.linspace(-100, 10_500, 2000), np.random.default_rng(1).uniform(0, 10_000, 300)])
+        for now in queries:
+            i = np.searchsorted(times, now, side='right') - 1
+            expected = times[i] if i >= 0 and now - times[i] <= 500 else None
+            self.assertEqual(replay.supply_apy('aave', now=float(now)), expected)
+
+    def test_reinvest_uses_oracle_rates(self):
+        replay = ReplayYieldOracle([make_snapshot({('aave', 'a'): {'supply_apy': 7.0, 'borrow_apy': 9.0},
+                                                   ('compound', 'c'): {'supply_apy': 5.0, 'borrow_apy': 8.0}}, 0.0)])
+        self.assertEqual(check_yield_and_reinvest(replay, now=10.0), 'aave')
+        # No rates yet at that time: the example yields decide
+        self.assertEqual(check_yield_and_reinvest(replay, now=-10.0), 'compound')
+        with mock.patch.object(defi_integration, 'running_yield_oracle', return_value=None):
+            self.assertEqual(check_yield_and_reinvest(LIVE_ORACLE), 'compound')
+
+    def test_backtest_never_reads_the_live_oracle(self):
+        live = ReplayYieldOracle([make_snapshot({('aave', 'a'): {'supply_apy': 9.0, 'borrow_apy': 9.0},
+                                                 ('compound', 'c'): {'supply_apy': 1.0, 'borrow_apy': 8.0}}, 0.0)])
+        with mock.patch.object(defi_integration, 'running_yield_oracle', return_value=live):
+            # No oracle given (a backtest without yield history): the example yields decide
+            self.assertEqual(check_yield_and_reinvest(now=10.0), 'compound')
+            self.assertEqual(check_yield_and_reinvest(LIVE_ORACLE, now=10.0), 'aave')
+
+
+if __name__ == '__main__':
+    unittest.main()
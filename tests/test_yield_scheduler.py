@@ -0,0 +1,124 @@
+import asyncio
+import unittest
+
+from src.defi.yield_scheduler import LendingMarkets, YieldScheduler, per_block_to_apy, ray_to_apy
+from src.tests.eth_stub import EthStub, MockAavePool, MockComptroller, MockCToken
+from src.utils.eth_rpc import EthRPC
+
+RAY = 10 ** 27
+POOL = '0x' + 'aa' * 20
+COMPTROLLER = '0x' + 'cc' * 20
+RESERVES = [f"0x{i:040x}" for i in range(1, 41)]
+
+
+def ray(percent):
+    return int(percent * RAY // 100)
+
+
+class TestYieldScheduler(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = EthStub().__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.__exit__(None, None, None)
+
+    def setUp(self):
+        self.pool = MockAavePool(POOL, RESERVES)
+        for i, reserve in enumerate(RESERVES):
+            self.pool.set_rates(reserve, ray(1 + i / 10), ray(3 + i / 10))
+        self.ctokens = [MockCToken(f"0x{0xc0 + i:040x}", supply_rate=10 ** 9 * (i + 1), borrow_rate=2 * 10 ** 9 * (i + 1))
+                        for i in range(20)]
+        contracts = [self.pool, MockComptroller(COMPTROLLER, self.ctokens), *self.ctokens]
+        self.stub.contracts = {contract.address: contract for contract in contracts}
+        self.stub.block = 100
+        self.stub.calls.clear()
+        self.rpc = EthRPC(self.stub.url)
+        self.markets = LendingMarkets(self.rpc, aave_pool=POOL, comptroller=COMPTROLLER, batch_size=25)
+
+    def mine(self):
+        self.stub.block += 1
+
+    def test_discovery_and_batched_read(self):
+        rates = self.markets.read()
+        self.assertEqual(len(rates), 60)
+        self.assertAlmostEqual(rates[('aave', RESERVES[3])]['supply_apy'], 1.3)
+        self.assertAlmostEqual(rates[('aave', RESERVES[3])]['borrow_apy'], 3.3)
+        ctoken = self.ctokens[4]
+        self.assertAlmostEqual(rates[('compound', ctoken.address)]['supply_apy'], per_block_to_apy(5 * 10 ** 9))
+        # One discovery batch, then 40 + 2 * 20 eth_calls in batches of 25
+        self.assertEqual(self.rpc.requests_sent, 1 + 4)
+
+    def test_reads_are_pinned_to_the_polled_block(self):
+        scheduler = YieldScheduler(self.markets)
+        asyncio.run(scheduler.poll(now=0.0))
+        blocks = {params[1] for method, params in self.stub.calls[1:] if method == 'eth_call' and params[1] != 'latest'}
+        self.assertEqual(blocks, {hex(100)})
+
+    def test_only_moves_past_the_threshold_trigger(self):
+        scheduler = YieldScheduler(self.markets, min_change=0.25)
+        first = asyncio.run(scheduler.poll(now=0.0))
+        self.assertEqual(len(first), 60)
+        self.assertTrue(all(event['previous'] is None for event in first))
+
+        # No new block: nothing is read
+        requests = self.rpc.requests_sent
+        self.assertEqual(asyncio.run(scheduler.poll(now=12.0)), [])
+        self.assertEqual(self.rpc.requests_sent, requests + 1)
+
+        # Two small moves of the same reserve add up to one report
+        self.pool.set_rates(RESERVES[0], ray(1.15), ray(3))
+        self.mine()
+        self.assertEqual(asyncio.run(scheduler.poll(now=24.0)), [])
+        self.pool.set_rates(RESERVES[0], ray(1.3), ray(3))
+        self.mine()
+        events = asyncio.run(scheduler.poll(now=36.0))
+        self.assertEqual([(e['protocol'], e['market']) for e in events], [('aave', RESERVES[0])])
+        self.assertAlmostEqual(events[0]['change'], 0.3)
+        self.assertAlmostEqual(events[0]['previous']['supply_apy'], 1.0)
+        self.assertEqual(events[0]['block'], 102)
+
+    def test_interval_adapts_to_rate_speed(self):
+        scheduler = YieldScheduler(self.markets, min_change=0.5, min_interval=12, max_interval=3600)
+        asyncio.run(scheduler.poll(now=0.0))
+        self.mine()
+        asyncio.run(scheduler.poll(now=60.0))
+        self.assertEqual(scheduler.interval, 3600)
+
+        # 1 point in 60 s: poll about as often as the threshold allows
+        self.pool.set_rates(RESERVES[5], ray(2.5), ray(3.5))
+        self.mine()
+        asyncio.run(scheduler.poll(now=120.0))
+        self.assertAlmostEqual(scheduler.interval, 30.0)
+
+        # The interval lengthens again as the market calms down
+        intervals = []
+        for i in range(3, 8):
+            self.mine()
+            asyncio.run(scheduler.poll(now=60.0 * i))
+            intervals.append(scheduler.interval)
+        self.assertEqual(intervals, sorted(intervals))
+        self.assertGreater(intervals[-1], 500)
+
+    def test_run_awaits_async_callbacks(self):
+        scheduler = YieldScheduler(self.markets, min_interval=0.0, max_interval=0.0)
+        seen = []
+
+        async def on_change(event):
+            seen.append(event['market'])
+
+        polls = iter(range(3))
+        asyncio.run(scheduler.run(on_change, stop=lambda: next(polls, None) is None))
+        self.assertEqual(len(seen), 60)
+
+    def test_unit_conversions(self):
+        self.assertAlmostEqual(ray_to_apy(ray(4.2)), 4.2)
+        # 5% APR over 7200 blocks a day, compounded daily
+        rate = int(0.05 / 365 / 7200 * 10 ** 18)
+        self.assertAlmostEqual(per_block_to_apy(rate), 5.127, places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()